@@ -3,20 +3,55 @@
 The functions in the module extract the midpoint price and trade signs from the
 order book in the ITCH data.
 
+The replay of the order book and the trade signs use the lifecycle of the
+limit orders of the day (itch_order_lifecycle_data function). The results
+differ from the ones of the original data in three cases:
+
+- the messages ('E', 'C', 'F' and 'D') of the orders added before the start
+  of the data are counted and not used. Before, they stopped the replay with
+  an error.
+- the hidden trades ('T') have the trade sign 0. Before, the hidden trades
+  with the order id 0 took the sign of a fully executed order, because the
+  id of the executed orders was changed to 0.
+- the volume of a full execution ('F') is the volume left in the order after
+  the partial executions and the partial cancels ('C'). Before, the partial
+  cancels were not removed.
+
 This script requires the following modules:
     * numpy
+    * os
     * pandas
+    * sys
     * itch_data_tools_data_extract
+    * market_data_codec_shared
+    * market_data_pyramid_shared
+    * market_data_storage_shared
 
 The module contains the following functions:
+    * itch_order_lifecycle_data - extracts the lifecycle of the limit orders
+     of a day.
+    * itch_order_lifecycle_load - loads the lifecycle of the limit orders of
+     a day.
+    * itch_order_book_depth - returns the number of orders in a price level.
+    * itch_order_book_levels - saves the first price levels of the book in a
+     sample of the depth.
+    * itch_order_book_batch - calls the metric hooks with a batch of messages
+     of the replay.
+    * itch_order_book_replay - replays the messages of the order book.
     * itch_midpoint_millisecond_data - extracts the midpoint price of a day in
      milliseconds.
     * itch_midpoint_second_data - extracts the midpoint price of a day in
      seconds.
+    * itch_order_book_data - saves the snapshots, metrics and depth of the
+     order book of a day.
     * itch_trade_signs_millisecond_data - extracts the trade signs of a day in
      milliseconds.
     * itch_trade_signs_second_data - extracts the trade signs of a day in
      seconds.
+    * itch_events_millisecond_data - extracts the midpoint price changes and
+     the trades of a day in milliseconds.
+    * itch_pyramid_data - resamples the midpoint price and trade signs of a
+     day in several resolutions.
     * main - the main function of the script.
 
 .. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
@@ -25,30 +60,50 @@ The module contains the following functions:
 # -----------------------------------------------------------------------------
 # Modules
 
-import gzip
 import numpy as np
 import os
-import pandas as pd
-import pickle
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'market_shared', 'market_algorithms'))
 
 import itch_data_tools_data_extraction
+import market_data_codec_shared
+import market_data_pyramid_shared
+import market_data_storage_shared
+
+# Metrics computed in the replay of the order book of the full day
+# (itch_order_book_data function)
+__metrics__ = {
+    'order_flow_imbalance': itch_data_tools_data_extraction
+    .itch_metric_order_flow_imbalance,
+    'cancels': itch_data_tools_data_extraction.itch_metric_cancels,
+    'depth_best': itch_data_tools_data_extraction.itch_metric_depth_best,
+    'midpoint_variance': itch_data_tools_data_extraction
+    .itch_metric_midpoint_variance
+}
 
 # -----------------------------------------------------------------------------
 
 
-def itch_midpoint_millisecond_data(ticker, date):
-    """Extracts the midpoint price data for a day in milliseconds.
+def itch_order_lifecycle_data(ticker, date):
+    """Extracts the lifecycle of the limit orders of a day.
 
-    Extracts the midpoint price from the TotalView-ITCH data for a day. The
-    data is obtained for the open market time (9h40 to 15h50). To fill the time
-    spaces when nothing happens we replicate the last value calculated until a
-    change in the price happens.
+    The original data is read once. Every limit order is saved with its id,
+    side, add time, price and original shares, and every message that changes
+    an order ('E', 'C', 'F' and 'D') is saved with the shares it removes from
+    the order and the shares left after it. The messages of the orders added
+    before the start of the data have the order -1 and their number is
+    printed. The executions of non-displayed orders ('T') are saved apart.
+    The replay of the order book and the extraction of the trade signs use
+    the index instead of the original data.
 
     :param ticker: string of the abbreviation of the stock to be analized
      (i.e. 'AAPL').
     :param date: string with the date of the data to be extracted
      (i.e. '2008-01-02').
-    :return: tuple -- The function returns a tuple with numpy arrays.
+    :return: dict -- The function returns a dictionary with the structured
+     numpy arrays of the orders, events and hidden trades.
     """
 
     date_sep = date.split('-')
@@ -56,215 +111,729 @@ def itch_midpoint_millisecond_data(ticker, date):
     month = date_sep[1]
     day = date_sep[2]
 
+    function_name = itch_order_lifecycle_data.__name__
+    itch_data_tools_data_extraction \
+        .itch_function_header_print_data(function_name, ticker, ticker, year,
+                                         month, day)
+
     try:
 
-        # Load data
-        data = np.genfromtxt(gzip.open(
-            f'../../itch_data/original_data_{year}/{year}{month}{day}'
-            + f'_{ticker}.csv.gz'), dtype='str', skip_header=1, delimiter=',')
+        # Pandas is only imported by the jobs that read the original data
+        import pandas as pd
+
+        # Load full data using cols with values time, order, type, shares and
+        # price
+        data = pd.read_csv(itch_data_tools_data_extraction
+                           .itch_original_data_open(ticker, date),
+                           usecols=(0, 2, 3, 4, 5),
+                           dtype={'Time': 'uint32', 'Order': 'uint64',
+                                  'T': str, 'Shares': 'int64',
+                                  'Price': 'int64'})
 
-        # Lists of times, ids, types, volumes and prices
-        # List of all the available information in the data excluding the last
-        # two columns
-        times_ = np.array([int(mytime) for mytime in data[:, 0]])
-        ids_ = np.array([int(myid) for myid in data[:, 2]])
+    except FileNotFoundError as e:
+        print('No data')
+        print(e)
+        print()
+        return None
 
-        # List of order types:
-        # "B" = 1 - > Add buy order
-        # "S" = 2 - > Add sell order
-        # "E" = 3 - > Execute outstanding order in part
-        # "C" = 4 - > Cancel outstanding order in part
-        # "F" = 5 - > Execute outstanding order in full
-        # "D" = 6 - > Delete outstanding order in full
-        # "X" = 7 - > Bulk volume for the cross event
-        # "T" = 8 - > Execute non-displayed order
-
-        types_ = np.array([1 * (mytype == 'B') +
-                           2 * (mytype == 'S') +
-                           3 * (mytype == 'E') +
-                           4 * (mytype == 'C') +
-                           5 * (mytype == 'F') +
-                           6 * (mytype == 'D') +
-                           7 * (mytype == 'X') +
-                           8 * (mytype == 'T') for mytype in data[:, 3]])
-        prices_ = np.array([int(myprice) for myprice in data[:, 5]])
-
-        ids = ids_[types_ < 7]
-        times = times_[types_ < 7]
-        types = types_[types_ < 7]
-        prices = prices_[types_ < 7]
-
-        # Reference lists
-        # Reference lists using the original values or the length of the
-        # original lists
-        prices_ref = 1 * prices
-        types_ref = 0 * types
-        times_ref = 0 * times
-        index_ref = 0 * types
-        newids = {}
-        insertnr = {}
-        hv = 0
-
-        # Help lists with the data of the buy orders and sell orders
-        hv_prices = prices[types < 3]
-        hv_types = types[types < 3]
-        hv_times = times[types < 3]
-
-        # Fill the reference lists where the values of 'T' are 'E', 'C', 'F',
-        # 'D'
-        # For the data in the length of the ids list (all data)
-        for iii in range(len(ids)):
-
-            # If the data is a sell or buy order
-            if (types[iii] < 3):
-
-                # Insert in the dictionary newids a key with the valor of the
-                # id and the value of hv (a counter)
-                newids[ids[iii]] = hv
-
-                # Insert in the dictionary insertnr a key with the valor of the
-                # id and the value of the for counter
-                insertnr[ids[iii]] = iii
-
-                # Increase the value of hv
-                hv += 1
-
-            # If the data is not a sell or buy order
-            else:
-
-                # Fill the values of prices_ref with no prices ('E', 'C', 'F',
-                # 'D') with the price of the order
-                prices_ref[iii] = hv_prices[newids[ids[iii]]]
-                # Fill the values of types_ref with no  prices ('E', 'C', 'F',
-                # 'D') with the type of the order
-                types_ref[iii] = hv_types[newids[ids[iii]]]
-                # Fill the values of time_ref with no  prices ('E', 'C', 'F',
-                # 'D') with the time of the order
-                times_ref[iii] = hv_times[newids[ids[iii]]]
-                # Fill the values of index_ref with no  prices ('E', 'C', 'F',
-                # 'D') with the position of the sell or buy order
-                index_ref[iii] = insertnr[ids[iii]]
-
-        # Minimum and maximum trade price
-
-        # The minimum price allowed is 0.9 times the price of
-        # the minimum value of all full executed orders.
-        minP = round(0.9 * (1. * prices_ref[types == 5] / 10000).min(), 2)
-        # The maximum price allowed is 1.1 times the price of
-        # the maximum value of all full executed orders.
-        maxP = round(1.1 * (1. * prices_ref[types == 5] / 10000).max(), 2)
-        # Values between maxP and minP with step of 0.01 cents
-        valuesP = minP + 0.01 * np.arange(int((maxP - minP) / 0.01))
-        maxP = valuesP.max()
-
-        # Construct quotes and spread
-        # Sell values started at 0
-        nAsk = 0 * valuesP
-        # Last value of nAsk set to 1
-        nAsk[-1] = 1
-        # Buy values starte at 0
-        nBid = 0 * valuesP
-        # First value of nBid set to 1
-        nBid[0] = 1
-        # Set bestAsk and bestAskOld to a high value
-        bestAsk = 10000000.
-        bestAskOld = 10000000.
-        # Set bestBid and bestBidOld a low value
-        bestBid = 0.
-        bestBidOld = 0.
-        # Create lists for best asks, bids and times
-        bestAsks = []
-        bestBids = []
-        bestTimes = []
-
-        # Finding the best asks and best bids
-
-        # For the data in the length of the ids list (all data)
-        for iii in range(len(ids)):
-
-            # Incoming limit orders
-
-            myPriceIndex = int(round(1. * (1. * prices_ref[iii] / 10000 - minP)
-                               / 0.01))
-
-            # Initializing bestAksOld and bestBidOld
-            bestAskOld = 1 * bestAsk
-            bestBidOld = 1 * bestBid
-
-            # The price is greater than the minP
-            if (myPriceIndex >= 0 and
-                    myPriceIndex < len(valuesP)):
+    times = data['Time'].values
+    ids = data['Order'].values
+    shares = data['Shares'].values
+    prices = data['Price'].values
+
+    # Same codes of the types used in the replay of the order book
+    types = np.zeros(len(data), dtype=np.int8)
+    for code, letter in enumerate('BSECFDXT', 1):
+        types[data['T'].values == letter] = code
+
+    # The messages of every order are put together in the order of the day,
+    # starting with the add message
+    book_pos = np.nonzero(types < 7)[0]
+    sort = book_pos[np.argsort(ids[book_pos], kind='stable')]
+    is_add = types[sort] < 3
+
+    # Add message of the order of every message. The messages of orders added
+    # before the start of the data have no add message
+    last_add = np.maximum.accumulate(
+        np.where(is_add, np.arange(len(sort)), -1))
+    known = (last_add >= 0) \
+        * (ids[sort[np.maximum(last_add, 0)]] == ids[sort]) > 0
+    add_msg = sort[np.maximum(last_add, 0)]
+
+    # Shares removed from the order by the partial executions and cancels
+    partial = ((types[sort] == 3) + (types[sort] == 4) > 0) * shares[sort]
+    removed = np.cumsum(partial)
+    removed = removed - removed[np.maximum(last_add, 0)]
+    left = np.maximum(shares[add_msg] - removed, 0)
+
+    # The full executions and deletes remove the shares left in the order
+    full = (types[sort] == 5) + (types[sort] == 6) > 0
+    order_num = np.cumsum(types < 3) - 1
+
+    msg_order = np.full(len(data), -1, dtype=np.int64)
+    msg_shares = 1 * shares
+    msg_left = np.zeros(len(data), dtype=np.int64)
+    msg_order[sort[known]] = order_num[add_msg[known]]
+    msg_shares[sort[known]] = np.where(full, left, shares[sort])[known]
+    msg_left[sort[known]] = np.where(full, 0, left)[known]
+
+    add_pos = np.nonzero(types < 3)[0]
+    orders = np.zeros(len(add_pos), dtype=[('id', 'u8'), ('side', 'i1'),
+                                           ('message', 'u4'), ('time', 'u4'),
+                                           ('price', 'i8'), ('shares', 'u4')])
+    orders['id'] = ids[add_pos]
+    orders['side'] = types[add_pos]
+    orders['message'] = add_pos
+    orders['time'] = times[add_pos]
+    orders['price'] = prices[add_pos]
+    orders['shares'] = shares[add_pos]
+
+    event_pos = np.nonzero((types > 2) * (types < 7))[0]
+    events = np.zeros(len(event_pos), dtype=[('message', 'u4'),
+                                             ('time', 'u4'), ('type', 'i1'),
+                                             ('order', 'i4'),
+                                             ('shares', 'u4'),
+                                             ('remaining', 'u4')])
+    events['message'] = event_pos
+    events['time'] = times[event_pos]
+    events['type'] = types[event_pos]
+    events['order'] = msg_order[event_pos]
+    events['shares'] = msg_shares[event_pos]
+    events['remaining'] = msg_left[event_pos]
+
+    # The messages of the orders added before the start of the data are not
+    # used by the replay and the trade signs
+    unknown = events['type'][events['order'] < 0]
+    if (len(unknown)):
+        unknown_types = ', '.join(f'{np.sum(unknown == code)} {letter}'
+                                  for code, letter in enumerate('ECFD', 3))
+        print(f'{len(unknown)} messages of orders added before the start of'
+              + f' the data are not used ({unknown_types})')
+
+    hidden_pos = np.nonzero(types == 8)[0]
+    hidden = np.zeros(len(hidden_pos), dtype=[('message', 'u4'),
+                                              ('time', 'u4'), ('price', 'i8'),
+                                              ('shares', 'u4')])
+    hidden['message'] = hidden_pos
+    hidden['time'] = times[hidden_pos]
+    hidden['price'] = prices[hidden_pos]
+    hidden['shares'] = shares[hidden_pos]
+
+    lifecycle = {'orders': orders, 'events': events, 'hidden': hidden}
+
+    # Saving data
+    itch_data_tools_data_extraction \
+        .itch_save_data(function_name, lifecycle, ticker, ticker, year, month,
+                        day)
+
+    return lifecycle
+
+# -----------------------------------------------------------------------------
+
+
+def itch_order_lifecycle_load(ticker, date):
+    """Loads the lifecycle of the limit orders of a day.
+
+    When the index of the day was not saved before, it is extracted from the
+    original data.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :return: dict -- The function returns a dictionary with the structured
+     numpy arrays of the orders, events and hidden trades (FileNotFoundError
+     is raised if there is no data of the day).
+    """
+
+    date_sep = date.split('-')
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
+
+    try:
+        return market_data_storage_shared.market_storage_load(
+            f'../../itch_data/data_extraction_{year}/itch_order_lifecycle'
+            + f'_data/itch_order_lifecycle_data_{year}{month}{day}'
+            + f'_{ticker}.pickle')
+
+    except FileNotFoundError:
+        lifecycle = itch_order_lifecycle_data(ticker, date)
+
+    if (lifecycle is None):
+        raise FileNotFoundError(f'No ITCH data of {ticker} the {date}')
+
+    return lifecycle
+
+# -----------------------------------------------------------------------------
+
+
+def itch_order_book_depth(n_orders, price, min_price):
+    """Returns the number of orders in the price level of a price.
+
+    :param n_orders: numpy array with the number of orders in every price
+     level of a side of the book.
+    :param price: float with the price of the level.
+    :param min_price: float with the price of the first level.
+    :return: int -- The function returns the number of orders (0 if the price
+     is out of the levels of the book).
+    """
+
+    level = int(round((price - min_price) / 0.01))
+
+    if (0 <= level < len(n_orders)):
+        return int(n_orders[level])
+
+    return 0
+
+# -----------------------------------------------------------------------------
+
+
+def itch_order_book_levels(depth, sample, s_ask, s_bid, prices):
+    """Saves the first price levels of the book in a sample of the depth.
+
+    The levels are the price levels with visible shares, starting from the
+    best quotes. When a side has less levels than the columns of the depth
+    arrays, the last columns keep a price and shares of 0.
+
+    :param depth: dictionary with the arrays (samples x levels) of the prices
+     and shares of the levels of the sides of the book.
+    :param sample: int with the row of the sample in the depth arrays.
+    :param s_ask: numpy array with the shares in every price level of the
+     sell side of the book.
+    :param s_bid: numpy array with the shares in every price level of the
+     buy side of the book.
+    :param prices: numpy array with the price of every level.
+    :return: None -- The function saves the levels in the depth arrays and
+     does not return a value.
+    """
+
+    n_levels = depth['ask_price'].shape[1]
+
+    ask_levels = np.flatnonzero(s_ask > 0)[:n_levels]
+    bid_levels = np.flatnonzero(s_bid > 0)[::-1][:n_levels]
+
+    depth['ask_price'][sample, :len(ask_levels)] = prices[ask_levels]
+    depth['ask_shares'][sample, :len(ask_levels)] = s_ask[ask_levels]
+    depth['bid_price'][sample, :len(bid_levels)] = prices[bid_levels]
+    depth['bid_shares'][sample, :len(bid_levels)] = s_bid[bid_levels]
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def itch_order_book_batch(hooks, metrics, periods, first, times, types,
+                          prices_ref, types_ref, changes, quotes):
+    """Calls the metric hooks with a batch of messages of the replay.
+
+    Every hook is called once with a dictionary with the arrays of the batch:
+    the times, types, prices and sides ('B' = 1, 'S' = 2) of the orders of the
+    messages, the best quotes before and after every message, the period of
+    every message, and the start time and the number of orders at the best
+    quotes at the end of every period. A hook returns an array with a value
+    for every period.
+
+    :param hooks: dictionary with the names and functions of the metrics.
+    :param metrics: dictionary with the lists of the values of the metrics.
+     The values of the batch are appended.
+    :param periods: dictionary with the lists of the start times and of the
+     orders at the best quotes of the periods of the batch.
+    :param first: int with the position of the first message of the batch in
+     the replay.
+    :param times: numpy array with the times of the messages of the batch.
+    :param types: numpy array with the types of the messages of the batch.
+    :param prices_ref: numpy array with the price of the order of every
+     message of the batch.
+    :param types_ref: numpy array with the type of the order of every message
+     of the batch.
+    :param changes: tuple with the lists of the positions, best asks and best
+     bids of the changes of the quotes in the batch.
+    :param quotes: tuple with the best ask and the best bid before the batch.
+    :return: None -- The function appends the values to the metrics and does
+     not return a value.
+    """
+
+    positions, asks, bids = changes
+
+    # Quotes after every message. The index -1 is the quote before the batch
+    change_idx = np.searchsorted(np.array(positions, dtype=np.int64) - first,
+                                 np.arange(len(times)), side='right') - 1
+    ask = np.append(asks, quotes[0])[change_idx]
+    bid = np.append(bids, quotes[1])[change_idx]
+
+    period_time = np.array(periods['time'])
+
+    batch = {'times': times,
+             'types': types,
+             'prices': prices_ref,
+             'sides': np.where(types < 3, types, types_ref),
+             'ask': ask,
+             'bid': bid,
+             'ask_before': np.append(quotes[0], ask[:-1]),
+             'bid_before': np.append(quotes[1], bid[:-1]),
+             'period': np.searchsorted(period_time, times, side='right') - 1,
+             'period_time': period_time,
+             'depth_ask': np.array(periods['depth_ask']),
+             'depth_bid': np.array(periods['depth_bid'])}
+
+    metrics['time'].append(period_time)
+    for name, hook in hooks.items():
+        metrics[name].append(hook(batch))
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def itch_order_book_replay(times, ids, types, prices_ref, types_ref, book,
+                           snapshot_times=(), hooks=None, hook_period=1000,
+                           hook_batch=100000, shares=None, depth_times=(),
+                           depth_levels=0):
+    """Replays the messages of the order book from a state of the book.
+
+    The best ask and the best bid are updated with every message. Before the
+    first message at or after every snapshot time, the state of the book is
+    saved in a snapshot. A snapshot keeps the number of orders in every price
+    level and the best quotes. The orders in the book are not saved, as the
+    messages replayed after a snapshot already have the price and type of
+    their orders in the lifecycle index.
+
+    Other metrics are computed in the same replay with the hooks. The
+    messages are divided in periods and the hooks are called with batches of
+    whole periods (itch_order_book_batch function), so the metrics are
+    computed with numpy arrays instead of a call for every message.
+
+    When the book has the shares in every price level ('s_ask' and 's_bid'),
+    the shares are updated with the shares added and removed by the messages,
+    and the first price levels of every side are saved before the first
+    message at or after every depth time (itch_order_book_levels function).
+    The depth arrays are allocated before the replay.
+
+    :param times: numpy array with the times of the messages.
+    :param ids: numpy array with the order ids of the messages.
+    :param types: numpy array with the types of the messages.
+    :param prices_ref: numpy array with the price of the order of every
+     message.
+    :param types_ref: numpy array with the type of the order of every message.
+    :param book: dictionary with the state of the order book. The state is
+     updated by the replay.
+    :param snapshot_times: list of ints with the times in milliseconds of the
+     snapshots (default ()).
+    :param hooks: dictionary with the names and functions of the metrics
+     (default None, no metrics are computed).
+    :param hook_period: int with the length in milliseconds of the periods of
+     the metrics (default 1000).
+    :param hook_batch: int with the minimum number of messages of a batch of
+     the hooks (default 100000).
+    :param shares: numpy array with the shares added or removed by every
+     message (default None, the shares are not updated).
+    :param depth_times: numpy array with the times in milliseconds of the
+     samples of the depth (default ()).
+    :param depth_levels: int with the number of price levels of every side in
+     the samples of the depth (default 0).
+    :return: tuple -- The function returns a tuple with lists of the times,
+     the best asks and the best bids when the quotes change, a list with the
+     snapshots, a dictionary with the start time and the values of the
+     metrics of every period with messages and a dictionary with the times,
+     prices and shares of the samples of the depth.
+    """
+
+    minP = book['min_price']
+    nAsk = book['n_ask']
+    nBid = book['n_bid']
+    bestAsk = book['best_ask']
+    bestBid = book['best_bid']
+    valuesP = minP + 0.01 * np.arange(len(nAsk))
+
+    # Shares in every price level and samples of the depth
+    sAsk = book.get('s_ask')
+    sBid = book.get('s_bid')
+    trackS = shares is not None and sAsk is not None
+    depth_times = np.asarray(depth_times) if trackS else np.array([])
+    depth = {'time': depth_times,
+             'ask_price': np.zeros((len(depth_times), depth_levels)),
+             'ask_shares': np.zeros((len(depth_times), depth_levels),
+                                    dtype=np.int64),
+             'bid_price': np.zeros((len(depth_times), depth_levels)),
+             'bid_shares': np.zeros((len(depth_times), depth_levels),
+                                    dtype=np.int64)}
+    depth_idx = 0
+
+    # Create lists for best asks, bids and times
+    bestAsks = []
+    bestBids = []
+    bestTimes = []
+
+    snapshots = []
+    snap_times = list(snapshot_times)
+
+    # Positions of the changes of the quotes, periods of the current batch
+    # and values of the metrics
+    bestPos = []
+    hooks = hooks or {}
+    periods = {'time': [], 'depth_ask': [], 'depth_bid': []}
+    metrics = {name: [] for name in ['time'] + list(hooks)}
+    hook_first = 0
+    hook_change = 0
+    hook_quotes = (bestAsk, bestBid)
+    if (len(times)):
+        hook_end = times[0] - times[0] % hook_period + hook_period
+
+    # Finding the best asks and best bids
+
+    # For the data in the length of the ids list (all data)
+    for iii in range(len(ids)):
+
+        # End of a period of the metrics. The book has the state after the
+        # last message of the period
+        if (hooks and times[iii] >= hook_end):
+
+            periods['time'].append(hook_end - hook_period)
+            periods['depth_ask'].append(
+                itch_order_book_depth(nAsk, bestAsk, minP))
+            periods['depth_bid'].append(
+                itch_order_book_depth(nBid, bestBid, minP))
+            hook_end = times[iii] - times[iii] % hook_period + hook_period
+
+            # Batch of whole periods
+            if (iii - hook_first >= hook_batch):
+                itch_order_book_batch(
+                    hooks, metrics, periods, hook_first,
+                    times[hook_first:iii], types[hook_first:iii],
+                    prices_ref[hook_first:iii], types_ref[hook_first:iii],
+                    (bestPos[hook_change:], bestAsks[hook_change:],
+                     bestBids[hook_change:]), hook_quotes)
+
+                hook_first = iii
+                hook_change = len(bestPos)
+                hook_quotes = (bestAsk, bestBid)
+                periods = {'time': [], 'depth_ask': [], 'depth_bid': []}
+
+        # Snapshot of the book before the first message of the period
+        while (snap_times and times[iii] >= snap_times[0]):
+
+            snapshots.append({
+                'time': snap_times.pop(0),
+                'n_ask': nAsk.astype(np.int32),
+                'n_bid': nBid.astype(np.int32),
+                'best_ask': bestAsk,
+                'best_bid': bestBid})
+
+        # Depth of the book before the first message of the sample
+        while (depth_idx < len(depth_times)
+                and times[iii] >= depth_times[depth_idx]):
+
+            itch_order_book_levels(depth, depth_idx, sAsk, sBid, valuesP)
+            depth_idx += 1
+
+        # Incoming limit orders
+
+        myPriceIndex = int(round(1. * (1. * prices_ref[iii] / 10000 - minP)
+                           / 0.01))
+
+        # Initializing bestAksOld and bestBidOld
+        bestAskOld = 1 * bestAsk
+        bestBidOld = 1 * bestBid
+
+        # The price is greater than the minP
+        if (myPriceIndex >= 0 and
+                myPriceIndex < len(valuesP)):
+
+            # If the order is a sell
+            if (types[iii] == 2):
+
+                if (nAsk[myPriceIndex] == 0):
+
+                    # The bestAsk is the minimum value between the previous
+                    # bestAsk and the value in valuesP with id myPriceIndex
+                    bestAsk = min(bestAsk, valuesP[myPriceIndex])
+
+                # Increase the value of nAsk to 1 (value arrived the book)
+                nAsk[myPriceIndex] += 1
+
+            # If the order is a buy
+            if (types[iii] == 1):
+
+                if (nBid[myPriceIndex] == 0):
+
+                    # The bestBid is the maximum value between the previous
+                    # bestBid and the value in valuesP with id myPriceIndex
+                    bestBid = max(bestBid, valuesP[myPriceIndex])
+
+                # Increase the value of nBid to 1 (value arrived the book)
+                nBid[myPriceIndex] += 1
+
+            # limit orders completely leaving
+
+            # If the order is a full executed order or if the order is a
+            # full delete order
+            if (types[iii] == 5
+                    or types[iii] == 6):
 
                 # If the order is a sell
+                if (types_ref[iii] == 2):
+
+                    # Reduce the value in nAsk to 0 (value left the book)
+                    nAsk[myPriceIndex] -= 1
+
+                    # If the value is not in the book and if the value is
+                    # the best ask
+                    if (nAsk[myPriceIndex] == 0 and
+                            valuesP[myPriceIndex] == bestAsk):
+
+                        # The best ask is the minimum value of the prices
+                        # that are currently in the order book
+                        bestAsk = valuesP[nAsk > 0].min()
+
+                else:
+
+                    # Reduce the value in nBid to 0 (value left the book)
+                    nBid[myPriceIndex] -= 1
+
+                    # If the value is not in the book and if the value is
+                    # the best bid
+                    if (nBid[myPriceIndex] == 0
+                            and valuesP[myPriceIndex] == bestBid):
+
+                        # The best bid is the maximum value of the prices
+                        # that are currently in the order book
+                        bestBid = valuesP[nBid > 0].max()
+
+            # Shares added to the level or removed from the level
+            if (trackS):
+
                 if (types[iii] == 2):
+                    sAsk[myPriceIndex] += shares[iii]
+                elif (types[iii] == 1):
+                    sBid[myPriceIndex] += shares[iii]
+                elif (types_ref[iii] == 2):
+                    sAsk[myPriceIndex] -= shares[iii]
+                else:
+                    sBid[myPriceIndex] -= shares[iii]
+
+        # If the bestAsk changes or and if the bestBid changes
+        if (bestAsk != bestAskOld
+                or bestBid != bestBidOld):
+
+            # Append the values of bestTimes, bestAsks and bestBids
+            bestTimes.append(times[iii])
+            bestAsks.append(bestAsk)
+            bestBids.append(bestBid)
+            bestPos.append(iii)
 
-                    if (nAsk[myPriceIndex] == 0):
+    # Last batch of the metrics
+    if (hooks and len(times) > hook_first):
 
-                        # The bestAsk is the minimum value between the previous
-                        # bestAsk and the value in valuesP with id myPriceIndex
-                        bestAsk = min(bestAsk, valuesP[myPriceIndex])
+        periods['time'].append(hook_end - hook_period)
+        periods['depth_ask'].append(itch_order_book_depth(nAsk, bestAsk, minP))
+        periods['depth_bid'].append(itch_order_book_depth(nBid, bestBid, minP))
 
-                    # Increase the value of nAsk to 1 (value arrived the book)
-                    nAsk[myPriceIndex] += 1
+        itch_order_book_batch(
+            hooks, metrics, periods, hook_first, times[hook_first:],
+            types[hook_first:], prices_ref[hook_first:],
+            types_ref[hook_first:],
+            (bestPos[hook_change:], bestAsks[hook_change:],
+             bestBids[hook_change:]), hook_quotes)
 
-                # If the order is a buy
-                if (types[iii] == 1):
+    metrics = {name: np.concatenate(values) for name, values
+               in metrics.items() if values}
 
-                    if (nBid[myPriceIndex] == 0):
+    # Samples after the last message
+    while (depth_idx < len(depth_times)):
 
-                        # The bestBid is the maximum value between the previous
-                        # bestBid and the value in valuesP with id myPriceIndex
-                        bestBid = max(bestBid, valuesP[myPriceIndex])
+        itch_order_book_levels(depth, depth_idx, sAsk, sBid, valuesP)
+        depth_idx += 1
 
-                    # Increase the value of nBid to 1 (value arrived the book)
-                    nBid[myPriceIndex] += 1
+    book['best_ask'] = bestAsk
+    book['best_bid'] = bestBid
+
+    return (bestTimes, bestAsks, bestBids, snapshots, metrics, depth)
+
+# -----------------------------------------------------------------------------
 
-                # limit orders completely leaving
 
-                # If the order is a full executed order or if the order is a
-                # full delete order
-                if (types[iii] == 5
-                        or types[iii] == 6):
+def itch_midpoint_millisecond_data(ticker, date, time_start=None,
+                                   time_end=None, snapshot_minutes=None,
+                                   lifecycle=None, hooks=None,
+                                   depth_levels=None, depth_period=1000):
+    """Extracts the midpoint price data for a day in milliseconds.
 
-                    # If the order is a sell
-                    if (types_ref[iii] == 2):
+    Extracts the midpoint price from the TotalView-ITCH data for a day. The
+    data is obtained for the open market time (9h40 to 15h50). To fill the time
+    spaces when nothing happens we replicate the last value calculated until a
+    change in the price happens.
 
-                        # Reduce the value in nAsk to 0 (value left the book)
-                        nAsk[myPriceIndex] -= 1
+    The full day replay can save snapshots of the order book
+    (itch_order_book_data function). With the snapshots, a time window of the
+    day can be replayed starting from the last snapshot before the window,
+    with the messages of the lifecycle index after the snapshot. In this case
+    the first values are the quotes in the book at the start of the window.
 
-                        # If the value is not in the book and if the value is
-                        # the best ask
-                        if (nAsk[myPriceIndex] == 0 and
-                                valuesP[myPriceIndex] == bestAsk):
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :param time_start: int with the time in milliseconds of the start of the
+     window (default None, the full day is replayed).
+    :param time_end: int with the time in milliseconds of the end of the
+     window (default None, the end of the day).
+    :param snapshot_minutes: int with the minutes between the snapshots of
+     the order book (default None, no snapshots are saved). Only used in the
+     full day replay.
+    :param lifecycle: dictionary with the lifecycle of the limit orders of the
+     day (default None, the saved index is loaded).
+    :param hooks: dictionary with the names and functions of the metrics
+     computed in every second of the replay (default None, no metrics are
+     computed). The metrics of the full day replay are saved.
+    :param depth_levels: int with the number of price levels of every side of
+     the book saved at the end of every period of the open market time
+     (default None, the depth is not saved). Only used in the full day
+     replay.
+    :param depth_period: int with the length in milliseconds of the periods of
+     the depth (default 1000).
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
 
-                            # The best ask is the minimum value of the prices
-                            # that are currently in the order book
-                            bestAsk = valuesP[nAsk > 0].min()
+    date_sep = date.split('-')
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
 
-                    else:
+    try:
 
-                        # Reduce the value in nBid to 0 (value left the book)
-                        nBid[myPriceIndex] -= 1
+        if (time_start is None):
+            time_snapshot = 0
 
-                        # If the value is not in the book and if the value is
-                        # the best bid
-                        if (nBid[myPriceIndex] == 0
-                                and valuesP[myPriceIndex] == bestBid):
+        else:
+            # Last snapshot of the book before the start of the window
+            book_snapshots = market_data_storage_shared.market_storage_load(
+                f'../../itch_data/data_extraction_{year}/'
+                + f'itch_order_book_snapshots/itch_order_book_snapshots'
+                + f'_{year}{month}{day}_{ticker}.pickle')
+            snap_idx = np.searchsorted(book_snapshots['times'], time_start,
+                                       side='right') - 1
+            snapshot = book_snapshots['snapshots'][max(0, snap_idx)]
+            time_snapshot = snapshot['time']
+
+        # Messages of the limit orders from the lifecycle index of the day.
+        # The price and type of the order of every message ('E', 'C', 'F',
+        # 'D') are the ones of its add message
+        if (lifecycle is None):
+            lifecycle = itch_order_lifecycle_load(ticker, date)
+
+        (times_, ids_, types_, prices_ref_, types_ref_, _, shares_) = \
+            itch_data_tools_data_extraction \
+            .itch_order_lifecycle_messages(lifecycle)
 
-                            # The best bid is the maximum value of the prices
-                            # that are currently in the order book
-                            bestBid = valuesP[nBid > 0].max()
+        # List of order types:
+        # "B" = 1 - > Add buy order
+        # "S" = 2 - > Add sell order
+        # "E" = 3 - > Execute outstanding order in part
+        # "C" = 4 - > Cancel outstanding order in part
+        # "F" = 5 - > Execute outstanding order in full
+        # "D" = 6 - > Delete outstanding order in full
 
-            # If the bestAsk changes or and if the bestBid changes
-            if (bestAsk != bestAskOld
-                    or bestBid != bestBidOld):
+        # Messages in the replay window
+        first = np.searchsorted(times_, time_snapshot)
+        last = len(times_) if time_end is None \
+            else np.searchsorted(times_, time_end)
+
+        ids = ids_[first:last]
+        times = times_[first:last]
+        types = types_[first:last]
+        prices_ref = prices_ref_[first:last]
+        types_ref = types_ref_[first:last]
+        shares = shares_[first:last]
+
+        if (time_start is None):
+
+            # Minimum and maximum trade price
+
+            # The minimum price allowed is 0.9 times the price of
+            # the minimum value of all full executed orders.
+            minP = round(0.9 * (1. * prices_ref[types == 5] / 10000).min(), 2)
+            # The maximum price allowed is 1.1 times the price of
+            # the maximum value of all full executed orders.
+            maxP = round(1.1 * (1. * prices_ref[types == 5] / 10000).max(), 2)
+            # Values between maxP and minP with step of 0.01 cents
+            levels = int((maxP - minP) / 0.01)
+
+            # Construct quotes and spread
+            # Sell values started at 0
+            nAsk = np.zeros(levels)
+            # Last value of nAsk set to 1
+            nAsk[-1] = 1
+            # Buy values starte at 0
+            nBid = np.zeros(levels)
+            # First value of nBid set to 1
+            nBid[0] = 1
+
+            # Set bestAsk to a high value and bestBid to a low value
+            book = {'min_price': minP, 'n_ask': nAsk, 'n_bid': nBid,
+                    'best_ask': 10000000., 'best_bid': 0.}
+
+            # Shares in every price level for the depth of the book
+            if (depth_levels):
+                book['s_ask'] = np.zeros(levels, dtype=np.int64)
+                book['s_bid'] = np.zeros(levels, dtype=np.int64)
 
-                # Append the values of bestTimes, bestAsks and bestBids
-                bestTimes.append(times[iii])
-                bestAsks.append(bestAsk)
-                bestBids.append(bestBid)
-                bestAskOld = bestAsk
-                bestBidOld = bestBid
+        else:
+            book = {'min_price': book_snapshots['min_price'],
+                    'n_ask': snapshot['n_ask'].astype(float),
+                    'n_bid': snapshot['n_bid'].astype(float),
+                    'best_ask': snapshot['best_ask'],
+                    'best_bid': snapshot['best_bid']}
+
+        if (time_start is None and snapshot_minutes is not None):
+            snapshot_times = range(0, 24 * 3600 * 1000,
+                                   snapshot_minutes * 60 * 1000)
+        else:
+            snapshot_times = ()
+
+        # The depth is sampled at the end of every period of the open market
+        # time (9h40 to 15h50)
+        depth_start = np.arange(34800 * 1000, 57000 * 1000, depth_period)
+
+        (bestTimes, bestAsks, bestBids, snapshots, metrics, depth) = \
+            itch_order_book_replay(times, ids, types, prices_ref, types_ref,
+                                   book, snapshot_times, hooks,
+                                   shares=shares,
+                                   depth_times=depth_start + depth_period,
+                                   depth_levels=depth_levels or 0)
+
+        if (snapshots):
+            itch_data_tools_data_extraction \
+                .itch_save_data('itch_order_book_snapshots',
+                                {'min_price': book['min_price'],
+                                 'times': np.array([snap['time'] for snap
+                                                    in snapshots]),
+                                 'snapshots': snapshots},
+                                ticker, ticker, year, month, day)
+
+        if (metrics and time_start is None):
+            itch_data_tools_data_extraction \
+                .itch_save_data('itch_order_book_metrics', metrics, ticker,
+                                ticker, year, month, day)
+
+        if (len(depth['time'])):
+            depth['time'] = depth_start
+            itch_data_tools_data_extraction \
+                .itch_save_data('itch_order_book_depth', depth, ticker,
+                                ticker, year, month, day)
+
+        if (time_start is not None):
+
+            # Quotes in the book at the start of the window
+            start = np.searchsorted(bestTimes, time_start)
+            start_ask = bestAsks[start - 1] if start \
+                else snapshot['best_ask']
+            start_bid = bestBids[start - 1] if start \
+                else snapshot['best_bid']
+
+            bestTimes = [time_start] + bestTimes[start:]
+            bestAsks = [start_ask] + bestAsks[start:]
+            bestBids = [start_bid] + bestBids[start:]
 
         # Calculating the spread, midpoint and time
 
@@ -343,29 +912,38 @@ def itch_midpoint_second_data(ticker, date):
 
     assert not np.sum(midpoint_s == 0)
 
-    # Saving data
+    # Saving data. The midpoint price is saved in half cent ticks with an
+    # implicit time axis
     itch_data_tools_data_extraction \
-        .itch_save_data(function_name, (full_time, midpoint_s), ticker, ticker,
-                        year, month, day)
+        .itch_save_data(function_name,
+                        market_data_codec_shared
+                        .market_encode_prices(full_time, midpoint_s, 0.005),
+                        ticker, ticker, year, month, day)
 
     return (full_time, midpoint_s)
 
 # -----------------------------------------------------------------------------
 
 
-def itch_trade_signs_millisecond_data(ticker, date):
-    """Obtain the trade signs data for a day in milliseconds.
+def itch_order_book_data(ticker, date, snapshot_minutes=30, depth_levels=10):
+    """Saves the snapshots, metrics and depth of the order book of a day.
 
-    Extracts the trade signs from the TotalView-ITCH data for a day. The
-    data is obtained for the open market time (9h40 to 15h50). To fill the time
-    spaces when nothing happens we just fill with zeros indicating that there
-    were neither a buy nor a sell.
+    The order book of the full day is replayed once with the snapshots, the
+    metrics of every second (__metrics__) and the samples of the depth. The
+    snapshots are used to replay time windows of the day later. The midpoint
+    price extraction does not compute them, so the function only runs when
+    the data is asked (the 'book' stage).
 
     :param ticker: string of the abbreviation of the stock to be analized
      (i.e. 'AAPL').
     :param date: string with the date of the data to be extracted
      (i.e. '2008-01-02').
-    :return: tuple -- The function returns a tuple with numpy arrays.
+    :param snapshot_minutes: int with the minutes between the snapshots of
+     the order book (default 30).
+    :param depth_levels: int with the number of price levels of every side of
+     the book saved every second (default 10).
+    :return: None -- The function saves the data in files and does not return
+     a value.
     """
 
     date_sep = date.split('-')
@@ -373,111 +951,78 @@ def itch_trade_signs_millisecond_data(ticker, date):
     month = date_sep[1]
     day = date_sep[2]
 
-    try:
-
-        # Load full data using cols with values time, order, type, shares and
-        # price
-        data = pd.read_csv(gzip.open(
-            f'../../itch_data/original_data_{year}/{year}{month}{day}_{ticker}'
-            + f'.csv.gz', 'rt'), usecols=(0, 2, 3, 4, 5),
-            dtype={'Time': 'uint32', 'Order': 'uint64', 'T': str,
-                   'Shares': 'uint16', 'Price': 'float64'})
-
-        data['Price'] = data['Price'] / 10000
-
-        # Select only trade orders. Visible ('E' and 'F') and hidden ('T')
-        trade_pos = np.array(data['T'] == 'E') + np.array(data['T'] == 'F') \
-            + np.array(data['T'] == 'T')
-        trade_data = data[trade_pos]
-
-        # Converting the data in numpy arrays
-        trade_data_time = trade_data['Time'].values
-        trade_data_order = trade_data['Order'].values
-        trade_data_types = 3 * np.array(trade_data['T'] == 'E') \
-            + 4 * np.array(trade_data['T'] == 'F') \
-            + 5 * np.array(trade_data['T'] == 'T')
-        trade_data_volume = trade_data['Shares'].values
-        trade_data_price = trade_data['Price'].values
-
-        # Select only limit orders
-        limit_pos = np.array(data['T'] == 'B') + np.array(data['T'] == 'S')
-        limit_data = data[limit_pos]
-
-        # Reduce the values to only the ones that have the same order number as
-        # trade orders
-        limit_data = limit_data[limit_data.Order.isin(trade_data['Order'])]
-
-        # Converting the data in numpy arrays
-        limit_data_order = limit_data['Order'].values
-        limit_data_types = 1 * np.array(limit_data['T'] == 'S') \
-            - 1 * np.array(limit_data['T'] == 'B')
-        limit_data_volume = limit_data['Shares'].values
-        limit_data_price = limit_data['Price'].values
-
-        # Arrays to store the info of the identified trades
-        length_trades = len(trade_data)
-        trade_times = 1 * trade_data_time
-        trade_signs = np.zeros(length_trades)
-        trade_volumes = np.zeros(length_trades, dtype='uint16')
-        trade_price = np.zeros(length_trades)
-
-        # In the for loop is assigned the price, trade sign and volume of each
-        # trade.
-        for t_idx in range(length_trades):
-
-            try:
-
-                # limit orders that have the same order as the trade order
-                l_idx = np.where(limit_data_order
-                                 == trade_data_order[t_idx])[0][0]
-
-                # Save values that are independent of the type
-                # Price of the trade (Limit data)
-                trade_price[t_idx] = limit_data_price[l_idx]
-
-                # Trade sign identification
-                trade = limit_data_types[l_idx]
-
-                if (trade == 1):
-                    trade_signs[t_idx] = 1.
-                else:
-                    trade_signs[t_idx] = -1.
-
-                # The volume depends on the trade type. If it is 4 the
-                # value is taken from the limit data and the order number
-                # is deleted from the data. If it is 3 the
-                # value is taken from the trade data and then the
-                # value of the volume in the limit data must be
-                # reduced with the value of the trade data
-                volume_type = trade_data_types[t_idx]
-
-                if (volume_type == 4):
+    function_name = itch_order_book_data.__name__
+    itch_data_tools_data_extraction \
+        .itch_function_header_print_data(function_name, ticker, ticker, year,
+                                         month, day)
 
-                    trade_volumes[t_idx] = limit_data_volume[l_idx]
-                    limit_data_order[l_idx] = 0
+    itch_midpoint_millisecond_data(ticker, date,
+                                   snapshot_minutes=snapshot_minutes,
+                                   hooks=__metrics__,
+                                   depth_levels=depth_levels)
 
-                else:
+    return None
 
-                    trade_volumes[t_idx] = trade_data_volume[t_idx]
-                    diff_volumes = limit_data_volume[l_idx] \
-                        - trade_data_volume[t_idx]
+# -----------------------------------------------------------------------------
 
-                    assert diff_volumes > 0
 
-                    limit_data_volume[l_idx] = diff_volumes
+def itch_trade_signs_millisecond_data(ticker, date, lifecycle=None):
+    """Obtain the trade signs data for a day in milliseconds.
 
-            except IndexError:
+    Extracts the trade signs from the TotalView-ITCH data for a day. The
+    data is obtained for the open market time (9h40 to 15h50). To fill the time
+    spaces when nothing happens we just fill with zeros indicating that there
+    were neither a buy nor a sell.
 
-                pass
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :param lifecycle: dictionary with the lifecycle of the limit orders of the
+     day (default None, the saved index is loaded).
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
 
-        assert len(trade_signs != 0) == len(trade_data_types != 5)
+    try:
 
-        # To use the hidden trades, I change the values in the computed arrays
-        # with # the information of visible trades to have the hidden
-        # information.
-        hidden_pos = trade_data_types == 5
-        trade_volumes[hidden_pos] = trade_data_volume[hidden_pos]
-        trade_price[hidden_pos] = trade_data_price[hidden_pos]
+        if (lifecycle is None):
+            lifecycle = itch_order_lifecycle_load(ticker, date)
+
+        orders = lifecycle['orders']
+        hidden = lifecycle['hidden']
+
+        # Visible trades ('E' and 'F'). The trade sign, price and type are the
+        # ones of the executed limit order. The volume of a full execution is
+        # the volume left in the order after the partial executions and
+        # cancels
+        visible = lifecycle['events'][(lifecycle['events']['type'] == 3)
+                                      + (lifecycle['events']['type'] == 5)]
+        known = visible['order'] >= 0
+
+        visible_signs = np.zeros(len(visible))
+        visible_signs[known] = np.where(
+            orders['side'][visible['order'][known]] == 2, 1., -1.)
+        visible_volumes = np.zeros(len(visible), dtype=np.int64)
+        visible_volumes[known] = visible['shares'][known]
+        visible_price = np.zeros(len(visible))
+        visible_price[known] = \
+            orders['price'][visible['order'][known]] / 10000
+
+        # The hidden trades ('T') have no sign, and their volume and price are
+        # the ones of the trade
+        trade_order = np.argsort(np.concatenate((visible['message'],
+                                                 hidden['message'])),
+                                 kind='stable')
+
+        trade_times = np.concatenate((visible['time'],
+                                      hidden['time']))[trade_order]
+        trade_signs = np.concatenate((visible_signs,
+                                      np.zeros(len(hidden))))[trade_order]
+        trade_volumes = np.concatenate((visible_volumes,
+                                        hidden['shares']))[trade_order] \
+            .astype('uint16')
+        trade_price = np.concatenate((visible_price,
+                                      hidden['price'] / 10000))[trade_order]
 
         # Open market time 9h40 - 15h50
         market_time = (trade_times / 3600 / 1000 >= 9.5) & \
@@ -528,7 +1073,7 @@ def itch_trade_signs_second_data(ticker, date):
     # Reproducing the paper time values. In her results the time interval
     # for the trade signs is [34801, 57000]
     full_time = np.array(range(34801, 57001))
-    trade_signs_s = np.zeros(len(full_time))
+    trade_signs_s = np.zeros(len(full_time), dtype=np.int8)
 
     for t_idx, t_val in enumerate(full_time):
 
@@ -537,16 +1082,137 @@ def itch_trade_signs_second_data(ticker, date):
         trade_sum = np.sum(trade_signs_ms[condition])
         trade_signs_s[t_idx] = np.sign(trade_sum)
 
-    # Saving data
+    # Saving data. The trade signs are saved as int8 values with an implicit
+    # time axis
     itch_data_tools_data_extraction \
-        .itch_save_data(function_name, (full_time, trade_signs_s), ticker,
-                        ticker, year, month, day)
+        .itch_save_data(function_name,
+                        market_data_codec_shared
+                        .market_encode_signs(full_time, trade_signs_s),
+                        ticker, ticker, year, month, day)
 
     return (full_time, trade_signs_s)
 
 # -----------------------------------------------------------------------------
 
 
+def itch_events_millisecond_data(ticker, date):
+    """Extracts the midpoint price changes and the trades of a day.
+
+    The midpoint price is saved only when it changes and the trades are saved
+    one by one, both with their time in milliseconds. The events keep the full
+    time resolution of the ITCH data without filling every millisecond of the
+    day.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :return: dict -- The function returns a dictionary with numpy arrays.
+    """
+
+    date_sep = date.split('-')
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
+
+    function_name = itch_events_millisecond_data.__name__
+    itch_data_tools_data_extraction \
+        .itch_function_header_print_data(function_name, ticker, ticker, year,
+                                         month, day)
+
+    # Extract data. The lifecycle index of the day is loaded once for the
+    # midpoint price and the trade signs
+    try:
+        lifecycle = itch_order_lifecycle_load(ticker, date)
+
+    except FileNotFoundError as e:
+        print('No data')
+        print(e)
+        print()
+        return None
+
+    (time_mid, midpoint,
+        _, _, spread) = itch_midpoint_millisecond_data(ticker, date,
+                                                       lifecycle=lifecycle)
+    (time_trade, trade_signs,
+        trade_volumes, _) = itch_trade_signs_millisecond_data(
+            ticker, date, lifecycle=lifecycle)
+
+    events = {'midpoint_time': time_mid.astype(np.int32),
+              'midpoint': midpoint,
+              'spread': spread,
+              'trade_time': time_trade.astype(np.int32),
+              'trade_sign': trade_signs.astype(np.int8),
+              'trade_volume': trade_volumes}
+
+    # Saving data
+    itch_data_tools_data_extraction \
+        .itch_save_data(function_name, events, ticker, ticker, year, month,
+                        day)
+
+    return events
+
+# -----------------------------------------------------------------------------
+
+
+def itch_pyramid_data(ticker, date, resolutions=(100, 1000, 5000, 60000)):
+    """Resamples the midpoint price and trade signs in several resolutions.
+
+    Using the events saved by the itch_events_millisecond_data function,
+    computes in one pass the midpoint price and the sum of the trade signs of
+    a day for every resolution. The resolution of 1000 ms has the same values
+    of the second data.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :param resolutions: list of ints with the length in milliseconds of the
+     intervals (default (100, 1000, 5000, 60000)). Every resolution must be a
+     multiple of the previous one.
+    :return: dict -- The function returns a dictionary with a tuple of numpy
+     arrays for every resolution.
+    """
+
+    date_sep = date.split('-')
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
+
+    function_name = itch_pyramid_data.__name__
+    itch_data_tools_data_extraction \
+        .itch_function_header_print_data(function_name, ticker, ticker, year,
+                                         month, day)
+
+    try:
+        # Load data
+        events = market_data_storage_shared.market_storage_load(
+            f'../../itch_data/data_extraction_{year}/itch_events_millisecond'
+            + f'_data/itch_events_millisecond_data_{year}{month}{day}'
+            + f'_{ticker}.pickle')
+
+        # Market time in milliseconds. 34800 s = 9h40 - 57000 s = 15h50
+        levels = market_data_pyramid_shared \
+            .market_pyramid_levels(events['midpoint_time'], events['midpoint'],
+                                   events['trade_time'], events['trade_sign'],
+                                   34800 * 1000, 57000 * 1000, resolutions)
+
+        # Saving data
+        itch_data_tools_data_extraction \
+            .itch_save_data(function_name, levels, ticker, ticker, year,
+                            month, day)
+
+        return levels
+
+    except FileNotFoundError as e:
+        print('No data')
+        print(e)
+        print()
+        return None
+
+# -----------------------------------------------------------------------------
+
+
 def main():
     """The main function of the script.
 
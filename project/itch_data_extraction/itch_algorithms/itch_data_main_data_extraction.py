@@ -4,7 +4,9 @@ The functions in the module extract and plot of the ITCH data.
 
 This script requires the following modules:
     * itertools.product
-    * multiprocessing
+    * os
+    * sys
+    * market_data_parallel_shared
     * itch_data_analysis_data_extraction
     * itch_data_plot_data_extraction
     * itch_data_tools_data_extraction
@@ -21,8 +23,13 @@ The module contains the following functions:
 # Modules
 
 from itertools import product as iprod
-import multiprocessing as mp
+import os
+import sys
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'market_shared', 'market_algorithms'))
+
+import market_data_parallel_shared
 import itch_data_analysis_data_extraction
 import itch_data_plot_data_extraction
 import itch_data_tools_data_extraction
@@ -30,32 +37,106 @@ import itch_data_tools_data_extraction
 # -----------------------------------------------------------------------------
 
 
-def itch_data_plot_generator(tickers, dates):
+def itch_data_plot_generator(tickers, dates,
+                             stages=('extract', 'response', 'plot')):
     """Generates all the analysis and plots from the ITCH data.
 
     :param tickers: list of the string abbreviation of the stocks to be
      analized (i.e. ['AAPL', 'MSFT']).
     :param dates: list of strings with the date of the data to be extracted
      (i.e. ['2008-01-02', '2008-01-03]).
+    :param stages: iterable of strings with the stages to run ('extract',
+     'response' and 'plot', default all of them). The 'seek' stage builds
+     the seek copies of the original files and the 'book' stage saves the
+     snapshots, metrics and depth of the order book. They only run when
+     they are asked.
     :return: None -- The function saves the data in a file and does not return
      a value.
     """
 
-    # Parallel computing
-    with mp.Pool(processes=mp.cpu_count()) as pool:
+    # Parallel computing. The largest jobs are scheduled first and every
+    # worker reads the inputs of its next job while the current job runs
+    costs_path = '../../itch_data/job_costs.pickle'
+    # The lifecycle index keeps the decompressed text of the orders in memory
+    # as strings, so the memory of its jobs is much larger than the
+    # compressed file
+    memory_factor = 40
+
+    # Seek copies of the original files for the reads of time windows. The
+    # original files are only read
+    if ('seek' in stages):
+        market_data_parallel_shared \
+            .market_parallel_starmap(itch_data_tools_data_extraction
+                                     .itch_seek_index_build,
+                                     iprod(tickers, dates),
+                                     itch_data_tools_data_extraction
+                                     .itch_job_input_paths, costs_path,
+                                     prefetch_depth=1)
+
+    if ('extract' in stages):
+
+        # Lifecycle of the limit orders. The original files are read once and
+        # the next functions use the index of every day
+        market_data_parallel_shared \
+            .market_parallel_starmap(itch_data_analysis_data_extraction
+                                     .itch_order_lifecycle_data,
+                                     iprod(tickers, dates),
+                                     itch_data_tools_data_extraction
+                                     .itch_job_input_paths, costs_path,
+                                     memory_factor=memory_factor,
+                                     prefetch_depth=1)
 
         # Basic functions
-        pool.starmap(itch_data_analysis_data_extraction
-                     .itch_midpoint_second_data,
-                     iprod(tickers, dates))
-        pool.starmap(itch_data_analysis_data_extraction
-                     .itch_trade_signs_second_data,
-                     iprod(tickers, dates))
-
-        # Plot
-        pool.starmap(itch_data_plot_data_extraction
-                     .itch_midpoint_second_plot,
-                     iprod(tickers, [dates]))
+        market_data_parallel_shared \
+            .market_parallel_starmap(itch_data_analysis_data_extraction
+                                     .itch_midpoint_second_data,
+                                     iprod(tickers, dates),
+                                     itch_data_tools_data_extraction
+                                     .itch_job_input_paths, costs_path,
+                                     prefetch_depth=1)
+        market_data_parallel_shared \
+            .market_parallel_starmap(itch_data_analysis_data_extraction
+                                     .itch_trade_signs_second_data,
+                                     iprod(tickers, dates),
+                                     itch_data_tools_data_extraction
+                                     .itch_job_input_paths, costs_path,
+                                     prefetch_depth=1)
+
+        # Events in milliseconds for the sub-second responses
+        market_data_parallel_shared \
+            .market_parallel_starmap(itch_data_analysis_data_extraction
+                                     .itch_events_millisecond_data,
+                                     iprod(tickers, dates),
+                                     itch_data_tools_data_extraction
+                                     .itch_job_input_paths, costs_path,
+                                     prefetch_depth=1)
+
+        market_data_parallel_shared \
+            .market_parallel_starmap(itch_data_analysis_data_extraction
+                                     .itch_pyramid_data,
+                                     iprod(tickers, dates),
+                                     itch_data_tools_data_extraction
+                                     .itch_job_input_paths, costs_path)
+
+    # Snapshots, metrics and depth of the order book. The lifecycle index is
+    # built by the extract stage
+    if ('book' in stages):
+        market_data_parallel_shared \
+            .market_parallel_starmap(itch_data_analysis_data_extraction
+                                     .itch_order_book_data,
+                                     iprod(tickers, dates),
+                                     itch_data_tools_data_extraction
+                                     .itch_job_input_paths, costs_path,
+                                     prefetch_depth=1)
+
+    # Plot
+    if ('plot' in stages):
+        market_data_parallel_shared \
+            .market_parallel_starmap(itch_data_plot_data_extraction
+                                     .itch_midpoint_second_plot,
+                                     iprod(tickers, [dates]),
+                                     itch_data_tools_data_extraction
+                                     .itch_job_input_paths, costs_path)
 
     return None
 
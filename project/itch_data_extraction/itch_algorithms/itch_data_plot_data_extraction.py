@@ -5,8 +5,12 @@ itch_data_analysis_data_extraction module.
 
 This script requires the following modules:
     * matplotlib
-    * pickle
+    * os
+    * sys
     * itch_data_tools_data_extract
+    * market_data_codec_shared
+    * market_data_plot_shared
+    * market_data_storage_shared
 
 The module contains the following functions:
     * itch_midpoint_second_plot - plots the midpoint price in second scale for
@@ -19,10 +23,22 @@ The module contains the following functions:
 # ----------------------------------------------------------------------------
 # Modules
 
+import matplotlib
+import os
+import sys
+
+# The figures are only saved, so they are rendered without a window (also in
+# the workers of the pools)
+matplotlib.use(os.environ.get('MPLBACKEND', 'Agg'))
 from matplotlib import pyplot as plt
-import pickle
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'market_shared', 'market_algorithms'))
 
 import itch_data_tools_data_extraction
+import market_data_codec_shared
+import market_data_plot_shared
+import market_data_storage_shared
 
 # ----------------------------------------------------------------------------
 
@@ -59,12 +75,18 @@ def itch_midpoint_second_plot(ticker, dates):
             day = date_sep[2]
 
             # Load data
-            time, midpoint = pickle.load(open(
-                            f'../../itch_data/data_extraction_{year}/itch_'
-                            + f'midpoint_second_data/itch_midpoint_second_data'
-                            + f'_{year}{month}{day}_{ticker}.pickle', 'rb'))
-
-            plt.plot(time, midpoint, linewidth=5, label=f'{date}')
+            time, midpoint = market_data_codec_shared \
+                .market_decode_prices(
+                    market_data_storage_shared.market_storage_load(
+                        f'../../itch_data/data_extraction_{year}/itch_midpoint'
+                        + f'_second_data/itch_midpoint_second_data'
+                        + f'_{year}{month}{day}_{ticker}.pickle'))
+
+            # The day has a value every second, more than the pixels of the
+            # figure
+            plt.plot(*market_data_plot_shared
+                     .market_plot_decimate(time, midpoint), linewidth=5,
+                     label=f'{date}')
             plt.legend(loc='best', fontsize=25)
             plt.xlabel(r'Time $[s]$', fontsize=35)
             plt.ylabel(r'$m(t)$', fontsize=35)
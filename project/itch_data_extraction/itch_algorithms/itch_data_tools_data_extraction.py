@@ -5,16 +5,36 @@ whole implementation. These tools improve the way the tasks are standardized
 in the modules that use them.
 
 This script requires the following modules:
+    * gzip
+    * io
     * matplotlib
+    * numpy
     * os
     * pickle
+    * sys
+    * market_data_parallel_shared
+    * market_data_storage_shared
 
 The module contains the following functions:
     * itch_save_data - saves computed data.
     * itch_save_plot - saves figures.
     * itch_function_header_print_data - prints info about the function running.
     * itch_function_header_print_plot - prints info about the plot.
+    * itch_order_lifecycle_messages - returns the messages of the limit
+     orders of a day in order.
+    * itch_job_input_paths - returns the input files of a job.
+    * itch_original_data_open - opens the original ITCH data of a day.
+    * itch_seek_index_build - builds the seek copy of a day.
+    * itch_seek_index_open - opens the seek copy of a day at a given time.
     * itch_start_folders - creates folders to save data and plots.
+    * itch_metric_order_flow_imbalance - computes the order flow imbalance
+     of the periods of a batch.
+    * itch_metric_cancels - counts the cancels and deletes of the periods of
+     a batch.
+    * itch_metric_depth_best - returns the depth at the best quotes of the
+     periods of a batch.
+    * itch_metric_midpoint_variance - computes the realized variance of the
+     midpoint price of the periods of a batch.
     * main - the main function of the script.
 
 .. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
@@ -23,9 +43,18 @@ The module contains the following functions:
 # -----------------------------------------------------------------------------
 # Modules
 
-from matplotlib import pyplot as plt
+import gzip
+import io
+import numpy as np
 import os
 import pickle
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'market_shared', 'market_algorithms'))
+
+import market_data_parallel_shared
+import market_data_storage_shared
 
 # -----------------------------------------------------------------------------
 
@@ -49,32 +78,23 @@ def itch_save_data(function_name, data, ticker_i, ticker_j, year, month, day):
      a value.
     """
 
-    # Saving data
-
-    if (not os.path.isdir(
-            f'../../itch_data/data_extraction_{year}/{function_name}/')):
-
-        try:
-            os.mkdir(
-                f'../../itch_data/data_extraction_{year}/{function_name}/')
-            print('Folder to save data created')
-
-        except FileExistsError:
-            print('Folder exists. The folder was not created')
+    # Saving data. The storage creates the folders of the function
 
     # Cross-response data
     if (ticker_i != ticker_j):
 
-        pickle.dump(data, open(f'../../itch_data/data_extraction_{year}'
-                    + f'/{function_name}/{function_name}_{year}{month}{day}'
-                    + f'_{ticker_i}i_{ticker_j}j.pickle', 'wb'))
+        path = f'../../itch_data/data_extraction_{year}/' \
+            + f'{function_name}/{function_name}_{year}{month}{day}' \
+            + f'_{ticker_i}i_{ticker_j}j.pickle'
 
     # Self-response data
     else:
 
-        pickle.dump(data, open(f'../../itch_data/data_extraction'
-                    + f'_{year}/{function_name}/{function_name}_{year}{month}'
-                    + f'{day}_{ticker_i}.pickle', 'wb'))
+        path = f'../../itch_data/data_extraction_{year}/' \
+            + f'{function_name}/{function_name}_{year}{month}{day}' \
+            + f'_{ticker_i}.pickle'
+
+    market_data_storage_shared.market_storage_save(path, data)
 
     print('Data Saved')
     print()
@@ -102,32 +122,31 @@ def itch_save_plot(function_name, figure, ticker_i, ticker_j, year, month):
      a value.
     """
 
-    # Saving plot data
-
-    if (not os.path.isdir(
-            f'../../plots/itch_data_extraction_{year}/{function_name}/')):
-
-        try:
-            os.mkdir(f'../../plots/itch_data_extraction_{year}/'
-                     + f'{function_name}/')
-            print('Folder to save data created')
+    # The format of the plots can be changed with the MARKET_PLOT_FORMAT
+    # environment variable (i.e. 'pdf' or 'svg')
+    plot_format = os.environ.get('MARKET_PLOT_FORMAT', 'png')
 
-        except FileExistsError:
-            print('Folder exists. The folder was not created')
+    # Saving plot data. The storage creates the folders of the function
 
     # Cross-response data
     if (ticker_i != ticker_j):
 
-        figure.savefig(f'../../plots/itch_data_extraction_{year}/'
-                       + f'{function_name}/{function_name}_{year}{month}'
-                       + f'_{ticker_i}i_{ticker_j}j.png')
+        path = f'../../plots/itch_data_extraction_{year}/' \
+            + f'{function_name}/{function_name}_{year}{month}' \
+            + f'_{ticker_i}i_{ticker_j}j.{plot_format}'
 
     # Self-response
     else:
 
-        figure.savefig(f'../../plots/itch_data_extraction_{year}/'
-                       + f'{function_name}/{function_name}_{year}{month}'
-                       + f'_{ticker_i}i.png')
+        path = f'../../plots/itch_data_extraction_{year}/' \
+            + f'{function_name}/{function_name}_{year}{month}' \
+            + f'_{ticker_i}i.{plot_format}'
+
+    market_data_storage_shared.market_storage_save_plot(path, figure)
+    # The workers of the pools render the figures of many tickers. Pyplot is
+    # imported here, so the workers of the analysis do not import it
+    from matplotlib import pyplot as plt
+    plt.close(figure)
 
     print('Plot saved')
     print()
@@ -203,6 +222,351 @@ def itch_function_header_print_plot(function_name, ticker_i, ticker_j, year,
 # -----------------------------------------------------------------------------
 
 
+def itch_order_lifecycle_messages(lifecycle):
+    """Returns the messages of the limit orders of a day in order.
+
+    The messages of the orders that were added before the start of the data
+    are not returned, because their price and type are unknown.
+
+    :param lifecycle: dictionary with the structured numpy arrays of the
+     orders and events of the day (itch_order_lifecycle_data function).
+    :return: tuple -- The function returns a tuple with numpy arrays of the
+     times, order ids, types, prices and order types of the messages, the
+     position of the add message of the order of every message and the shares
+     added or removed by every message.
+    """
+
+    orders = lifecycle['orders']
+    events = lifecycle['events'][lifecycle['events']['order'] >= 0]
+
+    msg_sort = np.argsort(np.concatenate((orders['message'],
+                                          events['message'])),
+                          kind='stable')
+    msg_order = np.concatenate((np.arange(len(orders)),
+                                events['order']))[msg_sort]
+
+    times = np.concatenate((orders['time'],
+                            events['time']))[msg_sort].astype(np.int64)
+    types = np.concatenate((orders['side'],
+                            events['type']))[msg_sort].astype(np.int64)
+    ids = orders['id'][msg_order].astype(np.int64)
+    prices_ref = orders['price'][msg_order]
+    # The add messages have no reference order
+    types_ref = (types > 2) * orders['side'][msg_order].astype(np.int64)
+
+    shares = np.concatenate((orders['shares'],
+                             events['shares']))[msg_sort].astype(np.int64)
+
+    add_pos = np.zeros(len(orders), dtype=np.int64)
+    add_pos[msg_order[types < 3]] = np.nonzero(types < 3)[0]
+
+    return (times, ids, types, prices_ref, types_ref, add_pos[msg_order],
+            shares)
+
+# -----------------------------------------------------------------------------
+
+
+def itch_job_input_paths(function_name, ticker, date):
+    """Returns the paths of the input files of a (ticker, date) job.
+
+    The size of the input files is used to estimate the cost of the job.
+
+    :param function_name: name of the function that runs the job.
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02'). The plot jobs use a list of dates and do not have
+     input files to estimate the cost.
+    :return: list -- The function returns a list with the paths of the files.
+    """
+
+    if (not isinstance(date, str)):
+        return []
+
+    date_sep = date.split('-')
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
+
+    if (function_name in ('itch_order_lifecycle_data',
+                          'itch_seek_index_build')):
+        return [f'../../itch_data/original_data_{year}/{year}{month}{day}'
+                + f'_{ticker}.csv.gz']
+
+    elif (function_name in ('itch_midpoint_second_data',
+                            'itch_order_book_data',
+                            'itch_trade_signs_second_data',
+                            'itch_events_millisecond_data')):
+        return [f'../../itch_data/data_extraction_{year}/itch_order'
+                + f'_lifecycle_data/itch_order_lifecycle_data'
+                + f'_{year}{month}{day}_{ticker}.pickle']
+
+    elif (function_name == 'itch_pyramid_data'):
+        return [f'../../itch_data/data_extraction_{year}/itch_events'
+                + f'_millisecond_data/itch_events_millisecond_data'
+                + f'_{year}{month}{day}_{ticker}.pickle']
+
+    return []
+
+# -----------------------------------------------------------------------------
+
+
+def itch_original_data_open(ticker, date, time_start=None):
+    """Opens the original ITCH data of a day.
+
+    When the worker running the job prefetched the data, the decompressed
+    data is read from memory. In other case the file is decompressed while
+    it is read. If a start time is given and the day has a seek copy
+    (itch_seek_index_build function), the decompression starts at the
+    checkpoint of the copy before the start time.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :param time_start: int with the time in milliseconds of the first message
+     needed (default None, the full day). The file object can have some
+     messages before the start time.
+    :return: file object -- The function returns a binary file object with the
+     decompressed data.
+    """
+
+    date_sep = date.split('-')
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
+
+    path = f'../../itch_data/original_data_{year}/{year}{month}{day}' \
+        + f'_{ticker}.csv.gz'
+    seek_path = f'../../itch_data/seek_index_{year}/{year}{month}{day}' \
+        + f'_{ticker}.csv.gz'
+
+    if (time_start is not None and os.path.isfile(f'{seek_path}.idx')):
+        return itch_seek_index_open(seek_path, time_start)
+
+    data = market_data_parallel_shared.market_prefetched(path)
+
+    if (data is None):
+        return gzip.open(path)
+
+    return io.BytesIO(data)
+
+# -----------------------------------------------------------------------------
+
+
+def itch_seek_index_build(ticker, date, block_lines=200000):
+    """Builds the seek copy of the original ITCH data of a day.
+
+    A gzip file can only be decompressed from its first byte. A copy of the
+    day is compressed as a sequence of gzip members of a fixed number of
+    lines, which is a valid gzip file with the same decompressed content.
+    Every member is a checkpoint where the decompression can start. The
+    compressed offset and the time of the first message of every member are
+    saved in a sidecar file ('.idx'). The copy and the index are saved in the
+    seek_index folder of the year, so the original file is only read.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :param block_lines: int with the number of lines of every member
+     (default 200000).
+    :return: None -- The function saves the data in a file and does not return
+     a value.
+    """
+
+    date_sep = date.split('-')
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
+
+    function_name = itch_seek_index_build.__name__
+    itch_function_header_print_data(function_name, ticker, ticker, year,
+                                    month, day)
+
+    folder = f'../../itch_data/seek_index_{year}'
+    seek_path = f'{folder}/{year}{month}{day}_{ticker}.csv.gz'
+
+    if (os.path.isfile(f'{seek_path}.idx')):
+        print('Index already built')
+        print()
+        return None
+
+    try:
+        times = []
+        offsets = []
+
+        with itch_original_data_open(ticker, date) as data:
+
+            os.makedirs(folder, exist_ok=True)
+
+            with open(f'{seek_path}.tmp', 'wb') as seek_file:
+
+                header = data.readline()
+                seek_file.write(gzip.compress(header, compresslevel=6))
+
+                while (True):
+
+                    lines = [line for _, line
+                             in zip(range(block_lines), data)]
+
+                    if (not lines):
+                        break
+
+                    times.append(int(lines[0].split(b',', 1)[0]))
+                    offsets.append(seek_file.tell())
+                    seek_file.write(gzip.compress(b''.join(lines),
+                                                  compresslevel=6))
+
+        # The index is written after the copy, so a copy without index is
+        # never used
+        os.replace(f'{seek_path}.tmp', seek_path)
+        with open(f'{seek_path}.idx.tmp', 'wb') as index_file:
+            pickle.dump({'header': header,
+                         'times': np.array(times, dtype=np.int64),
+                         'offsets': np.array(offsets, dtype=np.int64)},
+                        index_file)
+        os.replace(f'{seek_path}.idx.tmp', f'{seek_path}.idx')
+
+        print('Index saved')
+        print()
+
+        return None
+
+    except FileNotFoundError as e:
+        print('No data')
+        print(e)
+        print()
+        return None
+
+# -----------------------------------------------------------------------------
+
+
+def itch_seek_index_open(seek_path, time_start):
+    """Opens the seek copy of a day at the checkpoint before a time.
+
+    :param seek_path: string with the path of the seek copy.
+    :param time_start: int with the time in milliseconds of the first message
+     needed.
+    :return: file object -- The function returns a binary file object with the
+     header and the decompressed data from the checkpoint.
+    """
+
+    with open(f'{seek_path}.idx', 'rb') as index_file:
+        index = pickle.load(index_file)
+
+    # The messages with the start time can be at the end of the member before
+    # the first member starting at that time
+    member = max(0, np.searchsorted(index['times'], time_start) - 1)
+
+    with open(seek_path, 'rb') as data:
+        if (len(index['offsets'])):
+            data.seek(index['offsets'][member])
+        else:
+            data.seek(0, os.SEEK_END)
+        content = gzip.GzipFile(fileobj=data).read()
+
+    return io.BytesIO(index['header'] + content)
+
+# -----------------------------------------------------------------------------
+
+
+def itch_metric_order_flow_imbalance(batch):
+    """Computes the order flow imbalance of the periods of a batch.
+
+    Every message at the best quotes adds +1 when it pushes the midpoint price
+    up (a buy order at or above the best bid, or a sell order leaving the best
+    ask) and -1 when it pushes it down (a sell order at or below the best ask,
+    or a buy order leaving the best bid). The imbalance counts the orders, not
+    their shares.
+
+    :param batch: dictionary with the messages and periods of the batch
+     (itch_order_book_replay function).
+    :return: numpy array -- The function returns the imbalance of every
+     period.
+    """
+
+    prices = batch['prices'] / 10000
+    types = batch['types']
+    sides = batch['sides']
+
+    buy_add = (types == 1) * (prices >= batch['bid_before'] - 1e-6)
+    sell_add = (types == 2) * (prices <= batch['ask_before'] + 1e-6)
+    # Executions, cancels and deletes of the orders at the best quotes
+    leave = types > 2
+    buy_leave = leave * (sides == 1) \
+        * (np.abs(prices - batch['bid_before']) < 1e-6)
+    sell_leave = leave * (sides == 2) \
+        * (np.abs(prices - batch['ask_before']) < 1e-6)
+
+    flow = 1. * buy_add - sell_add - buy_leave + sell_leave
+
+    return np.bincount(batch['period'], weights=flow,
+                       minlength=len(batch['period_time']))
+
+# -----------------------------------------------------------------------------
+
+
+def itch_metric_cancels(batch):
+    """Counts the cancels and deletes of the periods of a batch.
+
+    :param batch: dictionary with the messages and periods of the batch
+     (itch_order_book_replay function).
+    :return: numpy array -- The function returns the number of 'C' and 'D'
+     messages of every period.
+    """
+
+    cancels = (batch['types'] == 4) + (batch['types'] == 6) > 0
+
+    return np.bincount(batch['period'], weights=cancels,
+                       minlength=len(batch['period_time'])).astype(np.int32)
+
+# -----------------------------------------------------------------------------
+
+
+def itch_metric_depth_best(batch):
+    """Returns the depth at the best quotes at the end of the periods of a
+    batch.
+
+    :param batch: dictionary with the messages and periods of the batch
+     (itch_order_book_replay function).
+    :return: numpy array -- The function returns an array with the orders at
+     the best bid and at the best ask at the end of every period.
+    """
+
+    return np.column_stack((batch['depth_bid'], batch['depth_ask']))
+
+# -----------------------------------------------------------------------------
+
+
+def itch_metric_midpoint_variance(batch):
+    """Computes the realized variance of the midpoint price of the periods of
+    a batch.
+
+    The variance is the sum of the squared log returns of the midpoint price
+    of the messages of every period, from the midpoint price before every
+    message. The messages before there are quotes in both sides of the book
+    are not used.
+
+    :param batch: dictionary with the messages and periods of the batch
+     (itch_order_book_replay function).
+    :return: numpy array -- The function returns the realized variance of
+     every period.
+    """
+
+    valid = (batch['ask'] < 10000000.) * (batch['bid'] > 0) \
+        * (batch['ask_before'] < 10000000.) * (batch['bid_before'] > 0) > 0
+
+    log_return = np.log((batch['ask'][valid] + batch['bid'][valid])
+                        / (batch['ask_before'][valid]
+                           + batch['bid_before'][valid]))
+
+    return np.bincount(batch['period'][valid], weights=log_return ** 2,
+                       minlength=len(batch['period_time']))
+
+# -----------------------------------------------------------------------------
+
+
 def main():
     """The main function of the script.
 
@@ -6,17 +6,38 @@ computed for a week.
 
 This script requires the following modules:
     * itertools.product
-    * multiprocessing
     * numpy
-    * pandas
-    * pickle
+    * os
+    * sys
     * itch_data_tools_responses_second
+    * market_data_codec_shared
+    * market_data_parallel_shared
+    * market_data_response_shared
+    * market_data_storage_shared
 
 The module contains the following functions:
     * itch_self_response_day_responses_second_data - computes the self response
      of a day.
     * ithc_self_response_year_responses_second_data - computes the self
      response of a year.
+    * itch_self_response_day_responses_millisecond_data - computes the self
+     response of a day in a sub-second resolution.
+    * itch_self_response_week_responses_millisecond_data - computes the self
+     response of a week in a sub-second resolution.
+    * itch_self_response_day_responses_trade_data - computes the self
+     response of a day in trade time.
+    * itch_self_response_week_responses_trade_data - computes the self
+     response of a week in trade time.
+    * itch_self_response_day_responses_pyramid_data - computes the self
+     response of a day in a resolution of the pyramid.
+    * itch_self_response_week_responses_pyramid_data - computes the self
+     response of a week in a resolution of the pyramid.
+    * itch_self_response_batch_responses_second_data - computes the self
+     response of a week for a batch of tickers.
+    * itch_self_response_conditional_responses_second_data - computes the
+     self response of a week conditioned on a regime.
+    * itch_self_response_week_errors_responses_second_data - computes the
+     errors of the self response of a week.
     * main - the main function of the script.
 
 .. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
@@ -26,12 +47,18 @@ The module contains the following functions:
 # Modules
 
 from itertools import product as iprod
-import multiprocessing as mp
 import numpy as np
-import pandas as pd
-import pickle
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'market_shared', 'market_algorithms'))
 
 import itch_data_tools_responses_second
+import market_data_codec_shared
+import market_data_parallel_shared
+import market_data_response_shared
+import market_data_storage_shared
 
 __tau__ = 1000
 
@@ -59,14 +86,16 @@ def itch_self_response_day_responses_second_data(ticker, date):
 
     try:
         # Load data
-        _, midpoint = pickle.load(open(
+        _, midpoint = market_data_codec_shared.market_decode_prices(
+            market_data_storage_shared.market_storage_load(
                 f'../../itch_data/data_extraction_{year}/itch_midpoint_second'
                 + f'_data/itch_midpoint_second_data_{year}{month}{day}'
-                + f'_{ticker}.pickle', 'rb'))
-        _, trade_sign = pickle.load(open(
+                + f'_{ticker}.pickle'))
+        _, trade_sign = market_data_codec_shared.market_decode_signs(
+            market_data_storage_shared.market_storage_load(
                 f'../../itch_data/data_extraction_{year}/itch_trade_signs'
                 + f'_second_data/itch_trade_signs_second_data'
-                + f'_{year}{month}{day}_{ticker}.pickle', 'rb'))
+                + f'_{year}{month}{day}_{ticker}.pickle'))
 
         assert len(midpoint) == len(trade_sign)
 
@@ -132,14 +161,24 @@ def itch_self_response_week_responses_second_data(ticker, dates):
 
     # Parallel computation of the self-responses. Every result is appended to
     # a list
-    with mp.Pool(processes=mp.cpu_count()) as pool:
-        self_values.append(pool.starmap(
-            itch_self_response_day_responses_second_data, args_prod))
+    self_values.append(market_data_parallel_shared.market_parallel_starmap(
+        itch_self_response_day_responses_second_data, args_prod,
+        itch_data_tools_responses_second.itch_job_input_paths,
+        '../../itch_data/job_costs.pickle'))
 
     # To obtain the total self-response, I sum over all the self-response
     # values and all the amount of trades (averaging values)
     self_v_final = np.sum(self_values[0], axis=0)
 
+    # The self-response sums and amount of trades of every day are saved to
+    # compute the errors
+    self_v_days = np.array(self_values[0])
+    itch_data_tools_responses_second \
+        .itch_save_data(f'{function_name}_days',
+                        {'dates': dates, 'self_response': self_v_days[:, 0],
+                         'num': self_v_days[:, 1]},
+                        ticker, ticker, year, '', '')
+
     self_response_val = self_v_final[0] / self_v_final[1]
     self_response_avg = self_v_final[1]
 
@@ -153,6 +192,710 @@ def itch_self_response_week_responses_second_data(ticker, dates):
 # ----------------------------------------------------------------------------
 
 
+def itch_self_response_day_responses_millisecond_data(ticker, date,
+                                                      resolution):
+    """Computes the self-response of a day in a sub-second resolution.
+
+    The time of the market ([34800, 57000] seconds) is divided in intervals of
+    the resolution. The trade sign of an interval is the sign of the sum of
+    its trades, and the midpoint price before an interval is the last
+    midpoint price change before it starts. Only the intervals with trades
+    after the first midpoint price change are used, so the time and memory
+    depend on the number of trades and not on the number of intervals. The
+    time lags (:math:`\tau`) are multiples of the resolution. With a
+    resolution of 1000 ms the values are the same as the ones of
+    itch_self_response_day_responses_second_data.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :param resolution: int with the length in milliseconds of the intervals
+     (i.e. 10).
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    date_sep = date.split('-')
+
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
+
+    try:
+        # Load data
+        events = market_data_storage_shared.market_storage_load(
+            f'../../itch_data/data_extraction_{year}/itch_events_millisecond'
+            + f'_data/itch_events_millisecond_data_{year}{month}{day}'
+            + f'_{ticker}.pickle')
+
+        time_start = 34800 * 1000
+        intervals = (57000 - 34800) * 1000 // resolution
+
+        # Trade signs of the intervals. The signs of the interval idx are the
+        # trades in [start + (idx + 1) * res, start + (idx + 2) * res), as in
+        # the second data the signs start one second after the midpoint price
+        trade_int = (events['trade_time'].astype(np.int64) - time_start) \
+            // resolution - 1
+        in_market = (trade_int >= 0) * (trade_int < intervals) > 0
+        sign_int, sign_pos = np.unique(trade_int[in_market],
+                                       return_inverse=True)
+        trade_sign = np.sign(np.bincount(
+            sign_pos, weights=events['trade_sign'][in_market]))
+        sign_int = sign_int[trade_sign != 0]
+        trade_sign = trade_sign[trade_sign != 0]
+
+        # The midpoint price before the interval idx is the last change with
+        # an interval index lower or equal than idx. The intervals before the
+        # first change do not have a midpoint price and are not used
+        mid_int = (events['midpoint_time'].astype(np.int64) - time_start) \
+            // resolution
+        midpoint = events['midpoint']
+
+        # Days without midpoint price changes (i.e. halted days)
+        if (not len(mid_int)):
+            zeros = np.zeros(__tau__)
+            return (zeros, zeros)
+
+        with_mid = sign_int >= mid_int[0]
+        sign_int = sign_int[with_mid]
+        trade_sign = trade_sign[with_mid]
+
+        # Array of the average of each tau
+        self_response_tau = np.zeros(__tau__)
+        taus = np.arange(1, __tau__ + 1)
+
+        # Number of intervals with trades that have a midpoint price tau
+        # intervals later
+        num = np.searchsorted(sign_int, intervals - taus).astype(float)
+
+        # The lags of a group of trades are computed together. The size of the
+        # groups keeps the memory used small
+        rows = max(1, 2 ** 22 // __tau__)
+
+        for t_idx in range(0, len(sign_int), rows):
+
+            s_int = sign_int[t_idx:t_idx + rows]
+            s_val = trade_sign[t_idx:t_idx + rows]
+            mid_before = midpoint[np.searchsorted(mid_int, s_int,
+                                                  side='right') - 1]
+            mid_after = midpoint[np.searchsorted(mid_int,
+                                                 s_int[:, None] + taus,
+                                                 side='right') - 1]
+
+            # Midpoint price returns
+            log_return = (mid_after - mid_before[:, None]) \
+                / mid_before[:, None]
+            valid = s_int[:, None] + taus < intervals
+
+            self_response_tau += np.sum(valid * log_return * s_val[:, None],
+                                        axis=0)
+
+        return (self_response_tau, num)
+
+    except FileNotFoundError as e:
+        print('No data')
+        print(e)
+        print()
+        zeros = np.zeros(__tau__)
+        return (zeros, zeros)
+
+# ----------------------------------------------------------------------------
+
+
+def itch_self_response_week_responses_millisecond_data(ticker, dates,
+                                                       resolution):
+    """Computes the self-response of a week in a sub-second resolution.
+
+    Using the itch_self_response_day_responses_millisecond_data function
+    computes the self-response function for a week.
+
+    :param ticker: string of the abbreviation of stock to be analized
+     (i.e. 'AAPL').
+    :param dates: list of strings with the date of the data to be extracted
+     (i.e. ['2008-01-02', '2008-01-03]).
+    :param resolution: int with the length in milliseconds of the intervals
+     (i.e. 10).
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    year = dates[0].split('-')[0]
+
+    function_name = \
+        itch_self_response_week_responses_millisecond_data.__name__
+    itch_data_tools_responses_second \
+        .itch_function_header_print_data(function_name, ticker, ticker, year,
+                                         '', '')
+
+    args_prod = iprod([ticker], dates, [resolution])
+
+    # Parallel computation of the self-responses
+    self_values = market_data_parallel_shared.market_parallel_starmap(
+        itch_self_response_day_responses_millisecond_data, args_prod,
+        itch_data_tools_responses_second.itch_job_input_paths,
+        '../../itch_data/job_costs.pickle')
+
+    # To obtain the total self-response, I sum over all the self-response
+    # values and all the amount of trades (averaging values)
+    self_v_final = np.sum(self_values, axis=0)
+
+    self_response_val = self_v_final[0] / self_v_final[1]
+    self_response_avg = self_v_final[1]
+
+    # Saving data
+    itch_data_tools_responses_second \
+        .itch_save_data(f'{function_name}_{resolution}ms', self_response_val,
+                        ticker, ticker, year, '', '')
+
+    return (self_response_val, self_response_avg)
+
+# ----------------------------------------------------------------------------
+
+
+def itch_self_response_day_responses_trade_data(ticker, date):
+    """Computes the self-response of a day in trade time.
+
+    The time lags (:math:`\tau`) are counted in trades instead of seconds.
+    For every trade, the midpoint price before the trade and the midpoint
+    price before the trade :math:`\tau` trades later are found with a
+    search in the times of the midpoint price changes. Only the trades with
+    an identified sign are used.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    date_sep = date.split('-')
+
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
+
+    try:
+        # Load data
+        events = market_data_storage_shared.market_storage_load(
+            f'../../itch_data/data_extraction_{year}/itch_events_millisecond'
+            + f'_data/itch_events_millisecond_data_{year}{month}{day}'
+            + f'_{ticker}.pickle')
+
+        time_t = events['trade_time']
+        trade_sign = events['trade_sign']
+
+        # 34800 s = 9h40 - 57000 s = 15h50
+        condition = (time_t >= 34800 * 1000) * (time_t < 57000 * 1000) \
+            * (trade_sign != 0) > 0
+        time_t = time_t[condition]
+        trade_sign = trade_sign[condition]
+
+        # Midpoint price before every trade
+        mid_idx = np.searchsorted(events['midpoint_time'], time_t,
+                                  side='left') - 1
+        trade_sign = trade_sign[mid_idx >= 0]
+        midpoint = events['midpoint'][mid_idx[mid_idx >= 0]]
+
+        # Array of the average of each tau. 10^3 trades are used
+        self_response_tau = np.zeros(__tau__)
+        num = np.zeros(__tau__)
+
+        # Depending on the tau value
+        for tau_idx in range(__tau__):
+
+            trade_sign_tau = trade_sign[:-tau_idx - 1]
+            num[tau_idx] = len(trade_sign_tau)
+
+            # Midpoint price returns after tau_idx + 1 trades
+            log_return_trade = (midpoint[tau_idx + 1:]
+                                - midpoint[:-tau_idx - 1]) \
+                / midpoint[:-tau_idx - 1]
+
+            self_response_tau[tau_idx] = np.sum(log_return_trade
+                                                * trade_sign_tau)
+
+        return (self_response_tau, num)
+
+    except FileNotFoundError as e:
+        print('No data')
+        print(e)
+        print()
+        zeros = np.zeros(__tau__)
+        return (zeros, zeros)
+
+# ----------------------------------------------------------------------------
+
+
+def itch_self_response_week_responses_trade_data(ticker, dates):
+    """Computes the self-response of a week in trade time.
+
+    Using the itch_self_response_day_responses_trade_data function computes
+    the self-response function in trade time for a week.
+
+    :param ticker: string of the abbreviation of stock to be analized
+     (i.e. 'AAPL').
+    :param dates: list of strings with the date of the data to be extracted
+     (i.e. ['2008-01-02', '2008-01-03]).
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    year = dates[0].split('-')[0]
+
+    function_name = itch_self_response_week_responses_trade_data.__name__
+    itch_data_tools_responses_second \
+        .itch_function_header_print_data(function_name, ticker, ticker, year,
+                                         '', '')
+
+    args_prod = iprod([ticker], dates)
+
+    # Parallel computation of the self-responses
+    self_values = market_data_parallel_shared.market_parallel_starmap(
+        itch_self_response_day_responses_trade_data, args_prod,
+        itch_data_tools_responses_second.itch_job_input_paths,
+        '../../itch_data/job_costs.pickle')
+
+    # To obtain the total self-response, I sum over all the self-response
+    # values and all the amount of trades (averaging values)
+    self_v_final = np.sum(self_values, axis=0)
+
+    self_response_val = self_v_final[0] / self_v_final[1]
+    self_response_avg = self_v_final[1]
+
+    # Saving data
+    itch_data_tools_responses_second \
+        .itch_save_data(function_name, self_response_val, ticker, ticker,
+                        year, '', '')
+
+    return (self_response_val, self_response_avg)
+
+# ----------------------------------------------------------------------------
+
+
+def itch_self_response_day_responses_pyramid_data(ticker, date, resolution):
+    """Computes the self-response of a day in a resolution of the pyramid.
+
+    Using the midpoint price and trade signs saved by the itch_pyramid_data
+    function computes the self-response during different time lags
+    (:math:`\tau`) for a day. The time lags are multiples of the resolution.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :param resolution: int with the length in milliseconds of the intervals. It
+     must be one of the resolutions of the pyramid.
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    date_sep = date.split('-')
+
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
+
+    try:
+        # Load data
+        levels = market_data_storage_shared.market_storage_load(
+            f'../../itch_data/data_extraction_{year}/itch_pyramid_data'
+            + f'/itch_pyramid_data_{year}{month}{day}_{ticker}.pickle')
+
+        midpoint, sign_sums = levels[resolution]
+        trade_sign = np.sign(sign_sums)
+
+        # Array of the average of each tau
+        self_response_tau = np.zeros(__tau__)
+        num = np.zeros(__tau__)
+
+        # Depending on the tau value
+        for tau_idx in range(__tau__):
+
+            trade_sign_tau = trade_sign[:-tau_idx - 1]
+            trade_sign_no_0_len = len(trade_sign_tau[trade_sign_tau != 0])
+            num[tau_idx] = trade_sign_no_0_len
+
+            # Midpoint price returns
+            log_return = (midpoint[tau_idx + 1:] - midpoint[:-tau_idx - 1]) \
+                / midpoint[:-tau_idx - 1]
+
+            # Obtain the self response value
+            if (trade_sign_no_0_len != 0):
+                product = log_return * trade_sign_tau
+                self_response_tau[tau_idx] = np.sum(product)
+
+        return (self_response_tau, num)
+
+    except FileNotFoundError as e:
+        print('No data')
+        print(e)
+        print()
+        zeros = np.zeros(__tau__)
+        return (zeros, zeros)
+
+# ----------------------------------------------------------------------------
+
+
+def itch_self_response_week_responses_pyramid_data(ticker, dates, resolution):
+    """Computes the self-response of a week in a resolution of the pyramid.
+
+    Using the itch_self_response_day_responses_pyramid_data function computes
+    the self-response function for a week.
+
+    :param ticker: string of the abbreviation of stock to be analized
+     (i.e. 'AAPL').
+    :param dates: list of strings with the date of the data to be extracted
+     (i.e. ['2008-01-02', '2008-01-03]).
+    :param resolution: int with the length in milliseconds of the intervals.
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    year = dates[0].split('-')[0]
+
+    function_name = itch_self_response_week_responses_pyramid_data.__name__
+    itch_data_tools_responses_second \
+        .itch_function_header_print_data(function_name, ticker, ticker, year,
+                                         '', '')
+
+    args_prod = iprod([ticker], dates, [resolution])
+
+    # Parallel computation of the self-responses
+    self_values = market_data_parallel_shared.market_parallel_starmap(
+        itch_self_response_day_responses_pyramid_data, args_prod,
+        itch_data_tools_responses_second.itch_job_input_paths,
+        '../../itch_data/job_costs.pickle')
+
+    # To obtain the total self-response, I sum over all the self-response
+    # values and all the amount of trades (averaging values)
+    self_v_final = np.sum(self_values, axis=0)
+
+    self_response_val = self_v_final[0] / self_v_final[1]
+    self_response_avg = self_v_final[1]
+
+    # Saving data
+    itch_data_tools_responses_second \
+        .itch_save_data(f'{function_name}_{resolution}',
+                        self_response_val, ticker, ticker, year, '', '')
+
+    return (self_response_val, self_response_avg)
+
+# ----------------------------------------------------------------------------
+
+
+def itch_self_response_batch_responses_second_data(tickers, dates):
+    """Computes the self-response of a week for a batch of tickers.
+
+    The second data of every ticker and day is stacked in the rows of a
+    matrix, and the self-responses of all the rows are computed together with
+    the market_self_response_rows function. The days of every ticker are added
+    as in the itch_self_response_week_responses_second_data function, and the
+    results are saved in the same files.
+
+    :param tickers: list of the string abbreviation of the stocks to be
+     analized (i.e. ['AAPL', 'MSFT']).
+    :param dates: list of strings with the date of the data to be extracted
+     (i.e. ['2008-01-02', '2008-01-03]).
+    :return: dict -- The function returns a dictionary with a tuple of numpy
+     arrays for every ticker.
+    """
+
+    year = dates[0].split('-')[0]
+
+    function_name = itch_self_response_batch_responses_second_data.__name__
+    week_name = itch_self_response_week_responses_second_data.__name__
+
+    self_values = {}
+
+    # Groups of tickers to keep the memory used by the FFTs small
+    batch = max(1, 256 // len(dates))
+
+    for t_idx in range(0, len(tickers), batch):
+
+        tickers_batch = tickers[t_idx:t_idx + batch]
+
+        # The rows without data do not add to the self-response
+        midpoint = np.ones((len(tickers_batch) * len(dates), 22200))
+        trade_sign = np.zeros((len(tickers_batch) * len(dates), 22200),
+                              dtype=np.int8)
+
+        for row, (ticker, date) in enumerate(iprod(tickers_batch, dates)):
+
+            date_sep = date.split('-')
+            month = date_sep[1]
+            day = date_sep[2]
+
+            try:
+                # Load data
+                _, midpoint_d = market_data_codec_shared \
+                    .market_decode_prices(
+                        market_data_storage_shared.market_storage_load(
+                            f'../../itch_data/data_extraction_{year}/itch'
+                            + f'_midpoint_second_data/itch_midpoint_second'
+                            + f'_data_{year}{month}{day}_{ticker}.pickle'))
+                _, trade_sign_d = market_data_codec_shared \
+                    .market_decode_signs(
+                        market_data_storage_shared.market_storage_load(
+                            f'../../itch_data/data_extraction_{year}/itch'
+                            + f'_trade_signs_second_data/itch_trade_signs'
+                            + f'_second_data_{year}{month}{day}_{ticker}'
+                            + '.pickle'))
+                assert len(midpoint_d) == len(trade_sign_d)
+
+                midpoint[row] = midpoint_d
+                trade_sign[row] = trade_sign_d
+
+            except FileNotFoundError as e:
+                print('No data')
+                print(e)
+                print()
+
+        self_response, num = market_data_response_shared \
+            .market_self_response_rows(midpoint, trade_sign, __tau__)
+
+        self_response = self_response.reshape(len(tickers_batch),
+                                              len(dates), __tau__)
+        num = num.reshape(len(tickers_batch), len(dates), __tau__)
+
+        for ticker, self_d, num_d in zip(tickers_batch, self_response, num):
+
+            # The self-response sums and amount of trades of every day are
+            # saved to compute the errors
+            itch_data_tools_responses_second \
+                .itch_save_data(f'{week_name}_days',
+                                {'dates': dates, 'self_response': self_d,
+                                 'num': num_d},
+                                ticker, ticker, year, '', '')
+
+        # To obtain the total self-response, I sum over all the self-response
+        # values and all the amount of trades of the days (averaging values)
+        self_response = np.sum(self_response, axis=1)
+        num = np.sum(num, axis=1)
+
+        for ticker, self_v, num_v in zip(tickers_batch, self_response, num):
+
+            itch_data_tools_responses_second \
+                .itch_function_header_print_data(function_name, ticker,
+                                                 ticker, year, '', '')
+
+            self_response_val = self_v / num_v
+
+            # Saving data
+            itch_data_tools_responses_second \
+                .itch_save_data(week_name, self_response_val, ticker, ticker,
+                                year, '', '')
+
+            self_values[ticker] = (self_response_val, num_v)
+
+    return self_values
+
+# ----------------------------------------------------------------------------
+
+
+def itch_self_response_conditional_responses_second_data(ticker, dates,
+                                                         condition,
+                                                         buckets=4):
+    """Computes the self-response of a week conditioned on a regime.
+
+    Every second is assigned to a bucket by its time of the day, the spread
+    before the second or the volume traded in the second. The trade signs of
+    every bucket are put in the rows of a matrix, so the self-responses of
+    all the buckets are computed together with the
+    market_self_response_rows function, with the FFT of the midpoint price of
+    the day computed once. The limits of the spread and volume buckets are
+    the quantiles of the values of all the days.
+
+    :param ticker: string of the abbreviation of stock to be analized
+     (i.e. 'AAPL').
+    :param dates: list of strings with the date of the data to be extracted
+     (i.e. ['2008-01-02', '2008-01-03]).
+    :param condition: string with the variable used to make the buckets
+     ('time', 'spread' or 'volume').
+    :param buckets: int with the number of buckets (default 4).
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    assert condition in ('time', 'spread', 'volume')
+
+    year = dates[0].split('-')[0]
+
+    function_name = \
+        itch_self_response_conditional_responses_second_data.__name__
+    itch_data_tools_responses_second \
+        .itch_function_header_print_data(function_name, ticker, ticker, year,
+                                         '', '')
+
+    # Market time in milliseconds of the seconds of the trade signs
+    # ([34801, 57000])
+    time_s = 1000 * np.arange(34801, 57001)
+
+    days_data = []
+
+    for date in dates:
+
+        date_sep = date.split('-')
+        month = date_sep[1]
+        day = date_sep[2]
+
+        try:
+            # Load data
+            _, midpoint = market_data_codec_shared \
+                .market_decode_prices(
+                    market_data_storage_shared.market_storage_load(
+                        f'../../itch_data/data_extraction_{year}/itch_midpoint'
+                        + f'_second_data/itch_midpoint_second_data'
+                        + f'_{year}{month}{day}_{ticker}.pickle'))
+            _, trade_sign = market_data_codec_shared \
+                .market_decode_signs(
+                    market_data_storage_shared.market_storage_load(
+                        f'../../itch_data/data_extraction_{year}/itch_trade'
+                        + f'_signs_second_data/itch_trade_signs_second_data'
+                        + f'_{year}{month}{day}_{ticker}.pickle'))
+
+            if (condition == 'time'):
+                value = np.arange(len(trade_sign))
+
+            else:
+                events = market_data_storage_shared.market_storage_load(
+                    f'../../itch_data/data_extraction_{year}/itch_events'
+                    + f'_millisecond_data/itch_events_millisecond_data'
+                    + f'_{year}{month}{day}_{ticker}.pickle')
+
+            # Spread before the trades of every second. The seconds before
+            # the first midpoint price change use the first spread
+            if (condition == 'spread'):
+                value = events['spread'][np.maximum(np.searchsorted(
+                    events['midpoint_time'], time_s, side='left') - 1, 0)]
+
+            # Volume of the trades of every second
+            elif (condition == 'volume'):
+                trade_pos = (events['trade_time'].astype(np.int64)
+                             - time_s[0]) // 1000
+                in_market = (trade_pos >= 0) * (trade_pos < len(time_s)) > 0
+                value = np.bincount(
+                    trade_pos[in_market],
+                    weights=events['trade_volume'][in_market],
+                    minlength=len(time_s))
+
+            days_data.append((midpoint, trade_sign, value))
+
+        except FileNotFoundError as e:
+            print('No data')
+            print(e)
+            print()
+
+    if (not days_data):
+        print('No data')
+        print()
+        return None
+
+    # Limits of the buckets
+    if (condition == 'time'):
+        edges = len(time_s) * np.arange(1, buckets) // buckets
+
+    else:
+        # Only the seconds with trades add to the self-response
+        values = np.concatenate([value[trade_sign != 0] for _, trade_sign,
+                                 value in days_data])
+        edges = np.quantile(values, np.arange(1, buckets) / buckets)
+
+    self_response = np.zeros((buckets, __tau__))
+    num = np.zeros((buckets, __tau__))
+
+    for midpoint, trade_sign, value in days_data:
+
+        # Trade signs of every bucket in a row. The midpoint price is the
+        # same for all the buckets
+        bucket = np.searchsorted(edges, value, side='right')
+        signs_bucket = trade_sign * (bucket == np.arange(buckets)[:, None])
+
+        self_response_d, num_d = market_data_response_shared \
+            .market_self_response_rows(midpoint[None], signs_bucket, __tau__)
+
+        self_response += self_response_d
+        num += num_d
+
+    self_response_val = self_response / num
+
+    # Saving data
+    itch_data_tools_responses_second \
+        .itch_save_data(f'{function_name}_{condition}',
+                        {'edges': edges, 'self_response': self_response_val,
+                         'num': num},
+                        ticker, ticker, year, '', '')
+
+    return (self_response_val, num)
+
+# ----------------------------------------------------------------------------
+
+
+def itch_self_response_week_errors_responses_second_data(ticker, dates,
+                                                         replicates=1000):
+    """Computes the errors of the self-response of a week.
+
+    Using the self-response sums and amount of trades of every day saved by
+    the itch_self_response_week_responses_second_data function, computes the
+    errors with a day block bootstrap and a leave-one-day-out jackknife. The
+    days of every replicate are the weights of a row of a matrix, so all the
+    replicates are computed with matrix products.
+
+    :param ticker: string of the abbreviation of stock to be analized
+     (i.e. 'AAPL').
+    :param dates: list of strings with the date of the data to be extracted
+     (i.e. ['2008-01-02', '2008-01-03]).
+    :param replicates: int with the number of bootstrap replicates
+     (default 1000).
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    year = dates[0].split('-')[0]
+
+    function_name = \
+        itch_self_response_week_errors_responses_second_data.__name__
+    itch_data_tools_responses_second \
+        .itch_function_header_print_data(function_name, ticker, ticker, year,
+                                         '', '')
+
+    try:
+        # Load data
+        days_data = market_data_storage_shared.market_storage_load(
+            f'../../itch_data/responses_second_data_{year}/itch_self'
+            + f'_response_week_responses_second_data_days/itch_self_response'
+            + f'_week_responses_second_data_days_{year}_{ticker}.pickle')
+        self_days = days_data['self_response']
+        num_days = days_data['num']
+        days = len(self_days)
+
+        # Bootstrap. Every row has the times that every day is drawn. The
+        # seed is fixed to keep the same bands in every run
+        rng = np.random.default_rng(0)
+        weights = rng.multinomial(days, np.ones(days) / days,
+                                  size=replicates)
+        bootstrap = (weights @ self_days) / (weights @ num_days)
+        bootstrap_low, bootstrap_high = np.nanpercentile(bootstrap,
+                                                         [2.5, 97.5], axis=0)
+
+        # Jackknife. Every row leaves one day out
+        weights = 1 - np.eye(days)
+        jackknife = (weights @ self_days) / (weights @ num_days)
+        jackknife_std = np.sqrt((days - 1) / days * np.sum(
+            (jackknife - np.mean(jackknife, axis=0)) ** 2, axis=0))
+
+        # Saving data
+        itch_data_tools_responses_second \
+            .itch_save_data(function_name,
+                            {'bootstrap_low': bootstrap_low,
+                             'bootstrap_high': bootstrap_high,
+                             'jackknife_std': jackknife_std},
+                            ticker, ticker, year, '', '')
+
+        return (bootstrap_low, bootstrap_high, jackknife_std)
+
+    except FileNotFoundError as e:
+        print('No data')
+        print(e)
+        print()
+        return None
+
+# ----------------------------------------------------------------------------
+
+
 def main():
     """The main function of the script.
 
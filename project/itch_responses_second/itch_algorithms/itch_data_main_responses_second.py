@@ -4,10 +4,12 @@ The functions in the module analyze and plot the ITCH data for a week.
 
 This script requires the following modules:
     * itertools.product
-    * multiprocessing
+    * os
+    * sys
     * itch_data_analysis_responses_second
     * itch_data_plot_responses_second
     * itch_data_tools_responses_second
+    * market_data_parallel_shared
 
 The module contains the following functions:
     * taq_data_plot_generator - generates all the analysis and plots from the
@@ -21,36 +23,58 @@ The module contains the following functions:
 # Modules
 
 from itertools import product as iprod
-import multiprocessing as mp
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'market_shared', 'market_algorithms'))
 
 import itch_data_analysis_responses_second
 import itch_data_plot_responses_second
 import itch_data_tools_responses_second
+import market_data_parallel_shared
 
 # -----------------------------------------------------------------------------
 
 
-def itch_data_plot_generator(tickers, dates):
+def itch_data_plot_generator(tickers, dates,
+                             stages=('extract', 'response', 'plot')):
     """Generates all the analysis and plots from the ITCH data.
 
     :param tickers: list of the string abbreviation of the stocks to be
      analized (i.e. ['AAPL', 'MSFT']).
     :param dates: list of strings with the date of the data to be extracted
      (i.e. ['2008-01-02', '2008-01-03]).
+    :param stages: iterable of strings with the stages to run ('extract',
+     'response' and 'plot', default all of them).
     :return: None -- The function saves the data in a file and does not return
      a value.
     """
 
-    # Especific functions
-    for ticker in tickers:
-
-        # Self-response
+    # Self-response of all the tickers together
+    if ('response' in stages):
         itch_data_analysis_responses_second \
-            .itch_self_response_week_responses_second_data(ticker, dates)
+            .itch_self_response_batch_responses_second_data(tickers, dates)
 
-        # Plot
-        itch_data_plot_responses_second \
-            .itch_self_response_week_avg_responses_second_plot(ticker, dates)
+    # Especific functions
+    if ('response' in stages):
+        for ticker in tickers:
+
+            # Errors
+            itch_data_analysis_responses_second \
+                .itch_self_response_week_errors_responses_second_data(ticker,
+                                                                      dates)
+
+    # Plot. The figures of the tickers are rendered in the pool from the
+    # saved data
+    if ('plot' in stages):
+        market_data_parallel_shared \
+            .market_parallel_starmap(
+                itch_data_plot_responses_second
+                .itch_self_response_week_avg_responses_second_plot,
+                iprod(tickers, [dates]),
+                itch_data_tools_responses_second.itch_job_input_paths,
+                '../../itch_data/job_costs.pickle')
 
     return None
 
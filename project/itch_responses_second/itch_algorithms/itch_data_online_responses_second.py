@@ -0,0 +1,379 @@
+'''ITCH data online module.
+
+The functions in the module compute the self-response function of the ITCH
+data while the messages arrive, without extracting and saving the full day.
+The messages can be read from the original data files or from a local socket.
+The state of the order book, the midpoint price and trade signs of the last
+seconds and the sums of the self-response are kept in a dictionary.
+
+This script requires the following modules:
+    * gzip
+    * heapq
+    * numpy
+    * socket
+
+The module contains the following functions:
+    * itch_online_state_init - creates the state of the online computation.
+    * itch_online_second_close - closes a second and updates the sums.
+    * itch_online_message - updates the state with a message.
+    * itch_online_estimate - returns the current self-response.
+    * itch_online_stream - updates the state with a stream of messages.
+    * itch_online_replay_data - computes the self-response replaying a day.
+    * itch_online_socket_feed - sends a day of messages to a local socket.
+    * itch_online_socket_data - computes the self-response from a socket.
+    * main - the main function of the script.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import gzip
+import heapq
+import numpy as np
+import socket
+
+__tau__ = 1000
+
+# -----------------------------------------------------------------------------
+
+
+def itch_online_state_init(tau=__tau__):
+    """Creates the state of the online computation.
+
+    :param tau: int with the number of time lags in seconds (default 1000).
+    :return: dict -- The function returns a dictionary with the state.
+    """
+
+    state = {
+        # Order book. Orders by id with their price and type, number of
+        # orders of every price level and heaps with the price levels
+        'orders': {},
+        'ask_levels': {},
+        'bid_levels': {},
+        'ask_heap': [],
+        'bid_heap': [],
+        # Current second, sum of its trade signs and midpoint price
+        'second': None,
+        'sign_sum': 0,
+        'midpoint': None,
+        # Trade signs of the last seconds (the current second first) and
+        # midpoint prices of the seconds before them
+        'signs': np.zeros(tau),
+        'midpoints': np.ones(tau),
+        # Number of midpoint prices added to the last seconds. The values
+        # after them are placeholders
+        'midpoints_num': 0,
+        # Sums of the self-response and amount of trade signs of every tau
+        'self_response': np.zeros(tau),
+        'num': np.zeros(tau)
+    }
+
+    return state
+
+# -----------------------------------------------------------------------------
+
+
+def itch_online_second_close(state):
+    """Closes the current second and updates the sums of the self-response.
+
+    As in the second data, the trade sign of the second t is multiplied by the
+    return of the midpoint price between the end of the second t - 1 and the
+    end of the second t - 1 + tau. When the second t closes, the returns of
+    all the tau values that end in t are added, so the work for every second
+    is proportional to the number of time lags. Only the time lags with a
+    midpoint price at the start are added, so the seconds before the first
+    quotes of both sides are not used.
+
+    :param state: dictionary with the state of the online computation.
+    :return: None -- The function updates the state and does not return a
+     value.
+    """
+
+    second = state['second']
+    midpoint = state['midpoint']
+    signs = state['signs']
+    midpoints = state['midpoints']
+
+    if (midpoint is not None):
+
+        signs[1:] = signs[:-1]
+        signs[0] = np.sign(state['sign_sum'])
+
+        # Market time in seconds. The midpoint prices start in 34800 s and
+        # the trade signs in 34801 s
+        if (34800 < second < 57000):
+
+            valid = min(len(signs), second - 34800, state['midpoints_num'])
+            state['self_response'][:valid] += signs[:valid] \
+                * (midpoint - midpoints[:valid]) / midpoints[:valid]
+            state['num'][:valid] += signs[:valid] != 0
+
+        midpoints[1:] = midpoints[:-1]
+        midpoints[0] = midpoint
+        state['midpoints_num'] += 1
+
+    state['second'] = second + 1
+    state['sign_sum'] = 0
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def itch_online_message(state, line):
+    """Updates the state with a message of the ITCH data.
+
+    The message is a line of the original data (time, ticker, order, type,
+    shares, price, ...). The order book is updated as in the
+    itch_midpoint_millisecond_data function and the executions of visible
+    orders add their sign to the current second.
+
+    :param state: dictionary with the state of the online computation.
+    :param line: string with the message.
+    :return: None -- The function updates the state and does not return a
+     value.
+    """
+
+    fields = line.split(',')
+    second = int(fields[0]) // 1000
+    order = int(fields[2])
+    msg_type = fields[3]
+
+    if (state['second'] is None):
+        state['second'] = second
+
+    # Close the seconds before the message
+    while (state['second'] < second):
+        itch_online_second_close(state)
+
+    orders = state['orders']
+
+    # Incoming limit orders
+    if (msg_type == 'B' or msg_type == 'S'):
+
+        price = int(fields[5])
+        orders[order] = (price, msg_type)
+
+        if (msg_type == 'S'):
+            levels = state['ask_levels']
+            heap = state['ask_heap']
+            heap_price = price
+        else:
+            levels = state['bid_levels']
+            heap = state['bid_heap']
+            heap_price = -price
+
+        if (not levels.get(price, 0)):
+            heapq.heappush(heap, heap_price)
+        levels[price] = levels.get(price, 0) + 1
+
+    # Executions and deletions of the orders in the book
+    elif (order in orders and msg_type in ('E', 'F', 'D')):
+
+        price, side = orders[order]
+
+        # The trade sign is the opposite of the side of the limit order
+        if (msg_type != 'D'):
+            state['sign_sum'] += 1 if side == 'S' else -1
+
+        # Limit orders completely leaving
+        if (msg_type != 'E'):
+
+            del orders[order]
+
+            if (side == 'S'):
+                levels = state['ask_levels']
+            else:
+                levels = state['bid_levels']
+
+            levels[price] -= 1
+
+    else:
+        return None
+
+    # Best quotes. The levels without orders are removed from the top of the
+    # heaps
+    ask_heap = state['ask_heap']
+    bid_heap = state['bid_heap']
+
+    while (ask_heap and not state['ask_levels'][ask_heap[0]]):
+        heapq.heappop(ask_heap)
+    while (bid_heap and not state['bid_levels'][-bid_heap[0]]):
+        heapq.heappop(bid_heap)
+
+    if (ask_heap and bid_heap):
+        state['midpoint'] = (ask_heap[0] - bid_heap[0]) / 2 / 10000
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def itch_online_estimate(state):
+    """Returns the current self-response.
+
+    :param state: dictionary with the state of the online computation.
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    with np.errstate(invalid='ignore'):
+        self_response_val = state['self_response'] / state['num']
+
+    return (self_response_val, state['num'].copy())
+
+# -----------------------------------------------------------------------------
+
+
+def itch_online_stream(state, lines, report_seconds=600):
+    """Updates the state with a stream of messages.
+
+    Every report_seconds of market time the current self-response for 1, 10,
+    100 and 1000 s is printed. At the end of the stream the last second is
+    closed, so its trades are added.
+
+    :param state: dictionary with the state of the online computation.
+    :param lines: iterable of strings with the messages.
+    :param report_seconds: int with the seconds between the reports
+     (default 600).
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    report = None
+
+    for line in lines:
+
+        # Header of the original data
+        if (line.startswith('Time')):
+            continue
+
+        itch_online_message(state, line)
+
+        if (report is None):
+            report = state['second'] - state['second'] % report_seconds
+
+        if (state['second'] >= report + report_seconds):
+
+            report = state['second'] - state['second'] % report_seconds
+            self_response_val, num = itch_online_estimate(state)
+            lags = [tau for tau in (1, 10, 100, 1000)
+                    if tau <= len(num)]
+
+            print(f'{report // 3600:02d}:{report % 3600 // 60:02d} - '
+                  + ' - '.join(f'R({tau}) = {self_response_val[tau - 1]:.3e}'
+                               for tau in lags)
+                  + f' - Trades {int(num[0])}')
+
+    # Last second of the stream
+    if (state['second'] is not None):
+        itch_online_second_close(state)
+
+    return itch_online_estimate(state)
+
+# -----------------------------------------------------------------------------
+
+
+def itch_online_replay_data(ticker, date, report_seconds=600):
+    """Computes the self-response replaying a day of the ITCH data.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :param report_seconds: int with the seconds between the reports
+     (default 600).
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    date_sep = date.split('-')
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
+
+    try:
+        state = itch_online_state_init()
+
+        with gzip.open(f'../../itch_data/original_data_{year}/{year}{month}'
+                       + f'{day}_{ticker}.csv.gz', 'rt') as data:
+            return itch_online_stream(state, data, report_seconds)
+
+    except FileNotFoundError as e:
+        print('No data')
+        print(e)
+        print()
+        return None
+
+# -----------------------------------------------------------------------------
+
+
+def itch_online_socket_feed(ticker, date, port=50007):
+    """Sends a day of messages of the ITCH data to a local socket.
+
+    The function waits for a connection in the port of the localhost and
+    sends the original data of the day line by line. It is used in place of a
+    live feed.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :param port: int with the port of the socket (default 50007).
+    :return: None -- The function sends the data and does not return a value.
+    """
+
+    date_sep = date.split('-')
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
+
+    with socket.create_server(('localhost', port)) as server:
+
+        connection, _ = server.accept()
+
+        with connection, gzip.open(f'../../itch_data/original_data_{year}/'
+                                   + f'{year}{month}{day}_{ticker}.csv.gz') \
+                as data:
+            for block in iter(lambda: data.read(2 ** 16), b''):
+                connection.sendall(block)
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def itch_online_socket_data(port=50007, report_seconds=600):
+    """Computes the self-response from the messages of a local socket.
+
+    :param port: int with the port of the socket (default 50007).
+    :param report_seconds: int with the seconds between the reports
+     (default 600).
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    state = itch_online_state_init()
+
+    with socket.create_connection(('localhost', port)) as connection, \
+            connection.makefile('r') as lines:
+        return itch_online_stream(state, lines, report_seconds)
+
+# -----------------------------------------------------------------------------
+
+
+def main():
+    """The main function of the script.
+
+    The main function replays a day of the ITCH data.
+
+    :return: None.
+    """
+
+    itch_online_replay_data('AAPL', '2016-03-07')
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    main()
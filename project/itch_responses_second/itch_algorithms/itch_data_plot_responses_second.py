@@ -5,8 +5,10 @@ itch_data_analysis_responses_second module.
 
 This script requires the following modules:
     * matplotlib
-    * pickle
+    * os
+    * sys
     * itch_data_tools_responses_second
+    * market_data_storage_shared
 
 The module contains the following functions:
     * itch_self_response_week_avg_responses_second_plot - plots the self-
@@ -19,10 +21,20 @@ The module contains the following functions:
 # ----------------------------------------------------------------------------
 # Modules
 
+import matplotlib
+import os
+import sys
+
+# The figures are only saved, so they are rendered without a window (also in
+# the workers of the pools)
+matplotlib.use(os.environ.get('MPLBACKEND', 'Agg'))
 from matplotlib import pyplot as plt
-import pickle
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'market_shared', 'market_algorithms'))
 
 import itch_data_tools_responses_second
+import market_data_storage_shared
 
 # ----------------------------------------------------------------------------
 
@@ -51,15 +63,29 @@ def itch_self_response_week_avg_responses_second_plot(ticker, dates):
                                              year_, '', '')
 
         # Load data
-        self_ = pickle.load(open(
+        self_ = market_data_storage_shared.market_storage_load(
                         f'../../itch_data/responses_second_data_{year_}/'
                         + f'itch_self_response_week_responses_second_data/'
                         + f'itch_self_response_week_responses_second_data'
-                        + f'_{year_}_{ticker}.pickle',
-                        'rb'))
+                        + f'_{year_}_{ticker}.pickle')
 
         figure = plt.figure(figsize=(16, 9))
         plt.semilogx(self_, linewidth=5, label=f'{ticker}')
+
+        # Error band of the day block bootstrap
+        try:
+            errors = market_data_storage_shared.market_storage_load(
+                f'../../itch_data/responses_second_data_{year_}/itch_self'
+                + f'_response_week_errors_responses_second_data/itch_self'
+                + f'_response_week_errors_responses_second_data_{year_}'
+                + f'_{ticker}.pickle')
+            plt.fill_between(range(len(self_)), errors['bootstrap_low'],
+                             errors['bootstrap_high'], alpha=0.3,
+                             label='95% bootstrap')
+
+        except FileNotFoundError:
+            print('No errors data')
+
         plt.legend(loc='best', fontsize=25)
         plt.title(f'ITCH Self-response - {ticker} - {year_}.{month}'
                   + f'.{day_ini_}/{day_fin_}', fontsize=40)
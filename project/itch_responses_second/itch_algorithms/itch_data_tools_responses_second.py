@@ -7,13 +7,15 @@ in the modules that use them.
 This script requires the following modules:
     * matplotlib
     * os
-    * pickle
+    * sys
+    * market_data_storage_shared
 
 The module contains the following functions:
     * itch_save_data - saves computed data.
     * itch_save_plot - saves figures.
     * itch_function_header_print_data - prints info about the function running.
     * itch_function_header_print_plot - prints info about the plot.
+    * itch_job_input_paths - returns the input files of a job.
     * main - the main function of the script.
 
 .. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
@@ -22,9 +24,13 @@ The module contains the following functions:
 # -----------------------------------------------------------------------------
 # Modules
 
-from matplotlib import pyplot as plt
 import os
-import pickle
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'market_shared', 'market_algorithms'))
+
+import market_data_storage_shared
 
 # -----------------------------------------------------------------------------
 
@@ -48,33 +54,23 @@ def itch_save_data(function_name, data, ticker_i, ticker_j, year, month, day):
      a value.
     """
 
-    # Saving data
-
-    if (not os.path.isdir(
-            f'../../itch_data/responses_second_data_{year}/{function_name}/')):
-
-        try:
-            os.mkdir(
-                f'../../itch_data/responses_second_data_{year}/'
-                + f'{function_name}/')
-            print('Folder to save data created')
-
-        except FileExistsError:
-            print('Folder exists. The folder was not created')
+    # Saving data. The storage creates the folders of the function
 
     # Cross-response data
     if (ticker_i != ticker_j):
 
-        pickle.dump(data, open(f'../../itch_data/responses_second_data_{year}'
-                    + f'/{function_name}/{function_name}_{year}{month}{day}'
-                    + f'_{ticker_i}i_{ticker_j}j.pickle', 'wb'))
+        path = f'../../itch_data/responses_second_data_{year}/' \
+            + f'{function_name}/{function_name}_{year}{month}{day}' \
+            + f'_{ticker_i}i_{ticker_j}j.pickle'
 
     # Self-response data
     else:
 
-        pickle.dump(data, open(f'../../itch_data/responses_second_data_{year}'
-                    + f'/{function_name}/{function_name}_{year}{month}{day}'
-                    + f'_{ticker_i}.pickle', 'wb'))
+        path = f'../../itch_data/responses_second_data_{year}/' \
+            + f'{function_name}/{function_name}_{year}{month}{day}' \
+            + f'_{ticker_i}.pickle'
+
+    market_data_storage_shared.market_storage_save(path, data)
 
     print('Data Saved')
     print()
@@ -102,33 +98,31 @@ def itch_save_plot(function_name, figure, ticker_i, ticker_j, year, month):
      a value.
     """
 
-    # Saving plot data
-
-    if (not os.path.isdir(
-            f'../../plots/itch_responses_second_plot_{year}/'
-            + f'{function_name}/')):
+    # The format of the plots can be changed with the MARKET_PLOT_FORMAT
+    # environment variable (i.e. 'pdf' or 'svg')
+    plot_format = os.environ.get('MARKET_PLOT_FORMAT', 'png')
 
-        try:
-            os.mkdir(f'../../plots/itch_responses_second_plot_{year}/'
-                     + f'{function_name}/')
-            print('Folder to save data created')
-
-        except FileExistsError:
-            print('Folder exists. The folder was not created')
+    # Saving plot data. The storage creates the folders of the function
 
     # Cross-response data
     if (ticker_i != ticker_j):
 
-        figure.savefig(f'../../plots/itch_responses_second_plot_{year}/'
-                       + f'{function_name}/{function_name}_{year}{month}'
-                       + f'_{ticker_i}i_{ticker_j}j.png')
+        path = f'../../plots/itch_responses_second_plot_{year}/' \
+            + f'{function_name}/{function_name}_{year}{month}' \
+            + f'_{ticker_i}i_{ticker_j}j.{plot_format}'
 
     # Self-response
     else:
 
-        figure.savefig(f'../../plots/itch_responses_second_plot_{year}/'
-                       + f'{function_name}/{function_name}_{year}{month}'
-                       + f'_{ticker_i}i.png')
+        path = f'../../plots/itch_responses_second_plot_{year}/' \
+            + f'{function_name}/{function_name}_{year}{month}' \
+            + f'_{ticker_i}i.{plot_format}'
+
+    market_data_storage_shared.market_storage_save_plot(path, figure)
+    # The workers of the pools render the figures of many tickers. Pyplot is
+    # imported here, so the workers of the analysis do not import it
+    from matplotlib import pyplot as plt
+    plt.close(figure)
 
     print('Plot saved')
     print()
@@ -204,6 +198,54 @@ def itch_function_header_print_plot(function_name, ticker_i, ticker_j, year,
 # -----------------------------------------------------------------------------
 
 
+def itch_job_input_paths(function_name, ticker, date, *args):
+    """Returns the paths of the input files of a (ticker, date) job.
+
+    The size of the input files is used to estimate the cost of the job.
+
+    :param function_name: name of the function that runs the job.
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02'). The plot jobs use a list of dates and do not have
+     input files to estimate the cost.
+    :param args: other arguments of the job. They do not change the input
+     files.
+    :return: list -- The function returns a list with the paths of the files.
+    """
+
+    if (not isinstance(date, str)):
+        return []
+
+    date_sep = date.split('-')
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
+
+    if (function_name == 'itch_self_response_day_responses_second_data'):
+        return [f'../../itch_data/data_extraction_{year}/itch_midpoint_second'
+                + f'_data/itch_midpoint_second_data_{year}{month}{day}'
+                + f'_{ticker}.pickle',
+                f'../../itch_data/data_extraction_{year}/itch_trade_signs'
+                + f'_second_data/itch_trade_signs_second_data'
+                + f'_{year}{month}{day}_{ticker}.pickle']
+
+    if (function_name
+            in ('itch_self_response_day_responses_millisecond_data',
+                'itch_self_response_day_responses_trade_data')):
+        return [f'../../itch_data/data_extraction_{year}/itch_events'
+                + f'_millisecond_data/itch_events_millisecond_data'
+                + f'_{year}{month}{day}_{ticker}.pickle']
+
+    if (function_name == 'itch_self_response_day_responses_pyramid_data'):
+        return [f'../../itch_data/data_extraction_{year}/itch_pyramid_data'
+                + f'/itch_pyramid_data_{year}{month}{day}_{ticker}.pickle']
+
+    return []
+
+# -----------------------------------------------------------------------------
+
+
 def main():
     """The main function of the script.
 
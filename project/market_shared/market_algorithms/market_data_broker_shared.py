@@ -0,0 +1,518 @@
+'''Market data broker module.
+
+The functions in the module distribute the (function, ticker, date) jobs of
+the TAQ and ITCH implementations between the workers of several machines. The
+coordinator runs a broker with a queue of jobs and a queue of results in a TCP
+port, and the workers connect to it, run the day functions of the
+implementations and send back the results. The data is saved by the workers
+in the storage of the implementations, so the data folder must be shared
+between the machines (i.e. a network file system). The settings of the run
+read from the environment (i.e. MARKET_TRADE_SIGNS and MARKET_QUOTE_LAG) must
+be the same in all the machines.
+
+The stages are run in order: the jobs of a stage are published when all the
+jobs of the previous stage finished. The jobs without a result after a time
+are published again, so a worker that stops does not block the run.
+
+    (machine 1) python market_data_broker_shared.py coordinator --source itch
+     --tickers AAPL --dates 2016-03-07:2016-03-11 --bind 0.0.0.0 --port 50010
+    (machine n) python market_data_broker_shared.py worker --host machine1
+     --port 50010 --processes 16
+
+The connections of the broker exchange pickles, so a client with the key can
+run code in the coordinator and in the workers. The authentication key is the
+MARKET_BROKER_KEY environment variable, which must be defined with the same
+secret value in all the machines, and by default the broker only listens in
+the local interface (--bind to listen in other interfaces).
+
+This script requires the following modules:
+    * argparse
+    * importlib
+    * multiprocessing
+    * numpy
+    * os
+    * queue
+    * threading
+    * time
+    * itch_data_tools_responses_second
+    * market_data_main_shared
+    * market_data_parallel_shared
+    * taq_data_tools_responses_second
+
+The module contains the following classes:
+    * MarketBrokerManager - manager of the queues of the broker.
+
+The module contains the following functions:
+    * market_broker_function - returns a day function of the implementations.
+    * market_broker_serve - starts the broker.
+    * market_broker_connect - connects to a broker.
+    * market_broker_run_stage - runs the jobs of a stage in the workers.
+    * market_broker_save_days - saves the self-response of the days.
+    * market_broker_coordinator - runs the stages of a source in the workers.
+    * market_broker_worker_loop - runs the jobs of the broker in a worker.
+    * market_broker_worker - runs the workers of a machine.
+    * main - the main function of the script.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import argparse
+import importlib
+import multiprocessing as mp
+from multiprocessing.managers import BaseManager
+import numpy as np
+import os
+import queue
+import threading
+import time
+
+import market_data_main_shared
+import market_data_parallel_shared
+
+# The main module adds the folders of the implementations to the path
+import itch_data_tools_responses_second
+import taq_data_tools_responses_second
+
+# Modules with the day functions that the workers can run
+__modules__ = ['itch_data_tools_data_extraction',
+               'itch_data_analysis_data_extraction',
+               'itch_data_analysis_responses_second',
+               'taq_data_analysis_responses_second']
+
+# Day functions of every stage of the sources
+__stages__ = {
+    'itch': {
+        'extract': ['itch_order_lifecycle_data', 'itch_midpoint_second_data',
+                    'itch_trade_signs_second_data',
+                    'itch_events_millisecond_data', 'itch_pyramid_data'],
+        'response': ['itch_self_response_day_responses_second_data']
+    },
+    'taq': {
+        'extract': ['taq_midpoint_second_data', 'taq_trade_signs_second_data',
+                    'taq_pyramid_data'],
+        'response': ['taq_self_response_day_responses_second_data']
+    }
+}
+
+# -----------------------------------------------------------------------------
+
+
+class MarketBrokerManager(BaseManager):
+    """Manager of the queues of the broker.
+
+    The queues are registered in this class and not in BaseManager, so the
+    other managers of the process (i.e. the ones of the pools) do not get
+    them.
+    """
+
+    pass
+
+# -----------------------------------------------------------------------------
+
+
+def market_broker_function(function_name):
+    """Returns a day function of the implementations from its name.
+
+    :param function_name: string with the name of the function
+     (i.e. 'taq_midpoint_second_data').
+    :return: function -- The function returns the day function.
+    """
+
+    for module_name in __modules__:
+        module = importlib.import_module(module_name)
+        if (hasattr(module, function_name)):
+            return getattr(module, function_name)
+
+    raise ValueError(f'Unknown function {function_name}')
+
+# -----------------------------------------------------------------------------
+
+
+def market_broker_serve(port, authkey, bind='localhost'):
+    """Starts the broker in a thread of the coordinator.
+
+    :param port: int with the TCP port of the broker (0 for a free port).
+    :param authkey: bytes with the authentication key of the broker.
+    :param bind: string with the address of the interface the broker listens
+     in (default 'localhost').
+    :return: tuple -- The function returns a tuple with the queue of jobs,
+     the queue of results and the address of the broker.
+    """
+
+    job_queue = queue.Queue()
+    result_queue = queue.Queue()
+
+    MarketBrokerManager.register('jobs', callable=lambda: job_queue)
+    MarketBrokerManager.register('results', callable=lambda: result_queue)
+
+    server = MarketBrokerManager(address=(bind, port),
+                                 authkey=authkey).get_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return (job_queue, result_queue, server.address)
+
+# -----------------------------------------------------------------------------
+
+
+def market_broker_connect(host, port, authkey, retries=60):
+    """Connects to a broker.
+
+    The workers can start before the coordinator, so the connection is tried
+    again every second.
+
+    :param host: string with the address of the coordinator.
+    :param port: int with the TCP port of the broker.
+    :param authkey: bytes with the authentication key of the broker.
+    :param retries: int with the number of connection attempts (default 60).
+    :return: tuple -- The function returns a tuple with the proxies of the
+     queue of jobs and the queue of results.
+    """
+
+    MarketBrokerManager.register('jobs')
+    MarketBrokerManager.register('results')
+    manager = MarketBrokerManager(address=(host, port), authkey=authkey)
+
+    for attempt in range(retries):
+        try:
+            manager.connect()
+            break
+
+        except ConnectionRefusedError:
+            if (attempt == retries - 1):
+                raise
+            time.sleep(1)
+
+    return (manager.jobs(), manager.results())
+
+# -----------------------------------------------------------------------------
+
+
+def market_broker_run_stage(job_queue, result_queue, function_name, args,
+                            keep_results=False, job_timeout=3600):
+    """Runs the jobs of a stage in the workers of the broker.
+
+    :param job_queue: queue of the broker with the jobs.
+    :param result_queue: queue of the broker with the results.
+    :param function_name: string with the name of the day function.
+    :param args: iterable of tuples with the arguments of every job
+     (i.e. iprod(['AAPL'], ['2008-01-02', '2008-01-03'])).
+    :param keep_results: bool to send the results of the jobs to the
+     coordinator (default False). The functions that extract data return
+     large arrays that are already saved by the workers.
+    :param job_timeout: float with the seconds after which a job without
+     result is published again (default 3600).
+    :return: list -- The function returns a list with the results of the jobs
+     in the order of the arguments (None if keep_results is False).
+    """
+
+    args = [tuple(arg) for arg in args]
+    results = [None] * len(args)
+    published = {}
+
+    for job_idx, arg in enumerate(args):
+        job_queue.put((function_name, job_idx, arg, keep_results))
+        published[job_idx] = time.monotonic()
+
+    while (published):
+
+        try:
+            name, job_idx, result, job_time, error = \
+                result_queue.get(timeout=5)
+
+        except queue.Empty:
+            # Jobs of workers that stopped
+            for job_idx, publish_time in published.items():
+                if (time.monotonic() - publish_time > job_timeout):
+                    print(f'{function_name}{args[job_idx]} published again')
+                    job_queue.put((function_name, job_idx, args[job_idx],
+                                   keep_results))
+                    published[job_idx] = time.monotonic()
+            continue
+
+        # Results of jobs published twice or of previous stages
+        if (name != function_name or job_idx not in published):
+            continue
+
+        if (error is not None):
+            raise RuntimeError(f'{function_name}{args[job_idx]} failed in a'
+                               + f' worker: {error}')
+
+        del published[job_idx]
+        results[job_idx] = result
+
+    return results
+
+# -----------------------------------------------------------------------------
+
+
+def market_broker_save_days(source, ticker, dates, results):
+    """Saves the self-response of the days of a ticker.
+
+    The days are saved in the same files as in the week functions, grouped
+    by year (ITCH) or by year and month (TAQ).
+
+    :param source: string with the source of the data ('taq' or 'itch').
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param dates: list of strings with the dates (i.e. ['2008-01-02',
+     '2008-01-03]).
+    :param results: list with the tuples of the self-response and amount of
+     trades of every date.
+    :return: None -- The function saves the data in a file and does not return
+     a value.
+    """
+
+    for group in market_data_main_shared.market_main_groups(dates, source):
+
+        self_v_days = np.array([results[dates.index(date)]
+                                for date in group])
+        days_data = {'dates': group, 'self_response': self_v_days[:, 0],
+                     'num': self_v_days[:, 1]}
+        year, month = group[0].split('-')[:2]
+
+        if (source == 'taq'):
+            week_name = taq_data_tools_responses_second.taq_trade_signs_name(
+                'taq_self_response_week_responses_second_data')
+            taq_data_tools_responses_second \
+                .taq_save_data(f'{week_name}_days_{month}', days_data,
+                               ticker, ticker, year, '', '')
+        else:
+            itch_data_tools_responses_second \
+                .itch_save_data('itch_self_response_week_responses_second'
+                                + '_data_days', days_data, ticker, ticker,
+                                year, '', '')
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def market_broker_coordinator(source, tickers, dates, stages, port,
+                              authkey, job_timeout=3600, bind='localhost'):
+    """Runs the stages of a source in the workers of the broker.
+
+    With the response stage, the self-response of the days is saved and the
+    self-response of every ticker is the sum of the self-response of its
+    days, as in the week functions.
+
+    :param source: string with the source of the data ('taq' or 'itch').
+    :param tickers: list of the string abbreviation of the stocks to be
+     analized (i.e. ['AAPL', 'MSFT']).
+    :param dates: list of strings with the date of the data to be extracted
+     (i.e. ['2008-01-02', '2008-01-03]).
+    :param stages: iterable of strings with the stages to run ('extract' and
+     'response').
+    :param port: int with the TCP port of the broker.
+    :param authkey: bytes with the authentication key of the broker.
+    :param job_timeout: float with the seconds after which a job without
+     result is published again (default 3600).
+    :param bind: string with the address of the interface the broker listens
+     in (default 'localhost').
+    :return: dict -- The function returns a dictionary with the self-response
+     and the amount of trades of every ticker (empty without the response
+     stage).
+    """
+
+    job_queue, result_queue, _ = market_broker_serve(port, authkey, bind)
+    self_responses = {}
+
+    try:
+        for stage in ('extract', 'response'):
+
+            if (stage not in stages):
+                continue
+
+            for function_name in __stages__[source][stage]:
+
+                print(f'Stage {function_name}')
+                args = [(ticker, date) for ticker in tickers
+                        for date in dates]
+                results = market_broker_run_stage(
+                    job_queue, result_queue, function_name, args,
+                    keep_results=stage == 'response',
+                    job_timeout=job_timeout)
+
+                if (stage == 'response'):
+                    for ticker_idx, ticker in enumerate(tickers):
+                        ticker_results = results[ticker_idx * len(dates):
+                                                 (ticker_idx + 1)
+                                                 * len(dates)]
+                        market_broker_save_days(source, ticker, dates,
+                                                ticker_results)
+                        self_v = np.sum(ticker_results, axis=0)
+                        with np.errstate(invalid='ignore'):
+                            self_responses[ticker] = (self_v[0] / self_v[1],
+                                                      self_v[1])
+
+    finally:
+        # The workers put the signal back in the queue, so every worker
+        # receives it
+        job_queue.put(None)
+
+    return self_responses
+
+# -----------------------------------------------------------------------------
+
+
+def market_broker_worker_loop(host, port, authkey):
+    """Runs the jobs of the broker in a worker process.
+
+    :param host: string with the address of the coordinator.
+    :param port: int with the TCP port of the broker.
+    :param authkey: bytes with the authentication key of the broker.
+    :return: None.
+    """
+
+    market_data_parallel_shared.market_worker_init(1)
+    job_queue, result_queue = market_broker_connect(host, port, authkey)
+
+    while (True):
+
+        try:
+            job = job_queue.get(timeout=5)
+
+        except queue.Empty:
+            continue
+
+        except (EOFError, ConnectionError):
+            # The coordinator stopped
+            return None
+
+        if (job is None):
+            job_queue.put(None)
+            return None
+
+        function_name, job_idx, arg, keep_results = job
+        time_ini = time.perf_counter()
+
+        try:
+            result = market_broker_function(function_name)(*arg)
+            message = (function_name, job_idx,
+                       result if keep_results else None,
+                       time.perf_counter() - time_ini, None)
+
+        except Exception as e:
+            message = (function_name, job_idx, None, None, repr(e))
+
+        try:
+            result_queue.put(message)
+
+        except (EOFError, ConnectionError):
+            return None
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def market_broker_worker(host, port, authkey, processes=None):
+    """Runs the workers of a machine until the coordinator finishes.
+
+    :param host: string with the address of the coordinator.
+    :param port: int with the TCP port of the broker.
+    :param authkey: bytes with the authentication key of the broker.
+    :param processes: int with the number of workers (default the CPUs of the
+     container).
+    :return: None.
+    """
+
+    if (processes is None):
+        processes = market_data_parallel_shared.market_cpu_count()
+
+    workers = [mp.Process(target=market_broker_worker_loop,
+                          args=(host, port, authkey))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def main(argv=None):
+    """The main function of the script.
+
+    The main function runs the coordinator or the workers of a machine.
+
+    :param argv: list of strings with the arguments (default the arguments
+     of the command line).
+    :return: None.
+    """
+
+    parser = argparse.ArgumentParser(
+        description='Distributes the jobs of the TAQ and ITCH data between'
+                    + ' machines.')
+    parser.add_argument('role', choices=['coordinator', 'worker'])
+    parser.add_argument('--host', default='localhost',
+                        help='address of the coordinator (workers)')
+    parser.add_argument('--bind', default='localhost',
+                        help='address of the interface the broker listens'
+                             + ' in, 0.0.0.0 for all the interfaces'
+                             + ' (coordinator, default localhost)')
+    parser.add_argument('--port', type=int, default=50010)
+    parser.add_argument('--source', choices=['taq', 'itch'], default='taq')
+    parser.add_argument('--tickers', nargs='+', default=[])
+    parser.add_argument('--tickers-file')
+    parser.add_argument('--dates', nargs='+', default=[])
+    parser.add_argument('--calendar')
+    parser.add_argument('--stages', nargs='+',
+                        choices=['extract', 'response'],
+                        default=['extract', 'response'])
+    parser.add_argument('--processes', type=int,
+                        help='workers of the machine (workers)')
+    parser.add_argument('--job-timeout', type=float, default=3600)
+    parser.add_argument('--data-root',
+                        default=os.environ.get(
+                            'MARKET_RESPONSE_DATA_ROOT',
+                            os.path.join(os.path.dirname(
+                                os.path.abspath(__file__)), '..', '..')))
+    args = parser.parse_args(argv)
+
+    # The key is not in the source, as a client with the key can run code in
+    # the machines of the run
+    if (not os.environ.get('MARKET_BROKER_KEY')):
+        parser.error('The MARKET_BROKER_KEY environment variable must have'
+                     + ' the authentication key of the broker')
+
+    authkey = os.environ['MARKET_BROKER_KEY'].encode()
+
+    # The implementations use paths relative to their algorithms folder
+    work_folder = os.path.join(os.path.abspath(args.data_root),
+                               'market_shared', 'market_algorithms')
+    os.makedirs(work_folder, exist_ok=True)
+    os.chdir(work_folder)
+
+    if (args.role == 'worker'):
+        market_broker_worker(args.host, args.port, authkey, args.processes)
+        return None
+
+    tickers = market_data_main_shared \
+        .market_main_tickers(args.tickers, args.tickers_file)
+    dates = market_data_main_shared.market_main_dates(args.dates,
+                                                      args.calendar)
+    market_data_main_shared.market_main_folders(
+        args.source, sorted(set(date[:4] for date in dates)))
+
+    self_responses = market_broker_coordinator(
+        args.source, tickers, dates, args.stages, args.port, authkey,
+        args.job_timeout, args.bind)
+
+    for ticker, (self_response_val, num) in self_responses.items():
+        print(f'{ticker} - R(1) = {self_response_val[0]:.3e} - R(1000) ='
+              + f' {self_response_val[-1]:.3e} - Trades {int(num[0])}')
+
+    print('Ay vamos!!')
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+'''Market data codec module.
+
+The functions in the module encode the price and trade signs series of the
+TAQ and ITCH implementations in a compact form, and decode them back. Both
+implementations save the series of a regular time axis in the same format, so
+the data of one source can be read with the same functions as the other.
+
+This script requires the following modules:
+    * numpy
+
+The module contains the following functions:
+    * market_encode_prices - encodes a price series in a compact form.
+    * market_decode_prices - decodes a compact price series.
+    * market_encode_signs - encodes a trade signs series in a compact form.
+    * market_decode_signs - decodes a compact trade signs series.
+    * main - the main function of the script.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+
+
+def market_encode_prices(time, prices, tick):
+    """Encodes a price series with a regular time axis in a compact form.
+
+    The time axis is reduced to its first value, as it is the same for every
+    day. The prices are stored as integer multiples of the tick. If the prices
+    are not multiples of the tick, they are stored as float32 values.
+
+    :param time: numpy array with the regular time axis of the series.
+    :param prices: numpy array with the prices of the series.
+    :param tick: float with the price tick of the series (i.e. 0.005).
+    :return: dict -- The function returns a dictionary with the compact series.
+    """
+
+    ticks = np.round(prices / tick)
+
+    # Integer ticks only if the prices can be recovered from them
+    if (np.all(np.abs(ticks * tick - prices) <= 1e-6 * tick)
+            and np.all(np.abs(ticks) < 2 ** 31)):
+        values = ticks.astype(np.int32)
+    else:
+        values = prices.astype(np.float32)
+        tick = None
+
+    return {'time_start': int(time[0]), 'prices': values, 'tick': tick}
+
+# -----------------------------------------------------------------------------
+
+
+def market_decode_prices(data):
+    """Decodes a price series saved with the market_encode_prices function.
+
+    :param data: dictionary with the compact series.
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    if (data['tick'] is None):
+        prices = data['prices'].astype(np.float64)
+    else:
+        prices = data['prices'] * data['tick']
+
+    time = np.arange(data['time_start'], data['time_start'] + len(prices))
+
+    return (time, prices)
+
+# -----------------------------------------------------------------------------
+
+
+def market_encode_signs(time, signs, rle=True):
+    """Encodes a trade signs series with a regular time axis in a compact form.
+
+    The time axis is reduced to its first value and the signs are stored as
+    int8 values. As most of the seconds do not have trades, the signs can be
+    run-length encoded. The run-length encoding is only used when it is
+    smaller than the int8 array.
+
+    :param time: numpy array with the regular time axis of the series.
+    :param signs: numpy array with the trade signs of the series.
+    :param rle: bool to use the run-length encoding (default True).
+    :return: dict -- The function returns a dictionary with the compact series.
+    """
+
+    signs = np.asarray(signs, dtype=np.int8)
+    runs = None
+
+    if (rle and len(signs)):
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(signs)) + 1))
+        # One byte for the value and four bytes for the length of each run
+        if (5 * len(starts) < len(signs)):
+            runs = np.diff(np.append(starts, len(signs))).astype(np.int32)
+            signs = signs[starts]
+
+    return {'time_start': int(time[0]), 'signs': signs, 'runs': runs}
+
+# -----------------------------------------------------------------------------
+
+
+def market_decode_signs(data):
+    """Decodes a trade signs series saved with the market_encode_signs
+    function.
+
+    :param data: dictionary with the compact series.
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    if (data['runs'] is None):
+        signs = data['signs']
+    else:
+        signs = np.repeat(data['signs'], data['runs'])
+
+    time = np.arange(data['time_start'], data['time_start'] + len(signs))
+
+    return (time, signs)
+
+# -----------------------------------------------------------------------------
+
+
+def main():
+    """The main function of the script.
+
+    The main function is used to test the functions in the script.
+
+    :return: None.
+    """
+
+    pass
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,375 @@
+'''Market data comparison module.
+
+The functions in the module compare the results of the TAQ and ITCH
+implementations. Both implementations save the midpoint price of every second
+in the interval [34800, 56999] and the trade signs of every second in the
+interval [34801, 57000], in separate folders. The series of the same tickers
+and dates are loaded in aligned matrices (tickers x dates x seconds) for
+groups of tickers, and the agreement of the trade signs, the deviation of the
+midpoint prices and the difference of the self-responses of all the tickers
+and dates of a group are computed together with numpy operations over the
+matrices.
+
+This script requires the following modules:
+    * itertools.product
+    * numpy
+    * os
+    * sys
+    * market_data_codec_shared
+    * market_data_response_shared
+    * market_data_storage_shared
+    * taq_data_tools_responses_second
+
+The module contains the following functions:
+    * market_comparison_paths - returns the paths of the second data of a
+     source.
+    * market_comparison_load - loads the second data of a source.
+    * market_comparison_align - places a series in a time axis.
+    * market_comparison_rows - compares the TAQ and ITCH data of every
+     ticker and date of a group.
+    * market_comparison_data - compares the TAQ and ITCH data of a group of
+     tickers and dates.
+    * main - the main function of the script.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+from itertools import product as iprod
+import numpy as np
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'taq_responses_second',
+                             'taq_algorithms'))
+
+import market_data_codec_shared
+import market_data_response_shared
+import market_data_storage_shared
+import taq_data_tools_responses_second
+
+__tau__ = 1000
+# Rows of second data of both sources compared at the same time
+__chunk_rows__ = 256
+
+# Time axes of the midpoint prices and the trade signs of both sources
+__midpoint_time__ = np.arange(34800, 57000)
+__signs_time__ = np.arange(34801, 57001)
+
+# -----------------------------------------------------------------------------
+
+
+def market_comparison_paths(source, ticker, date):
+    """Returns the paths of the second data of a ticker in a day.
+
+    :param source: string with the source of the data ('taq' or 'itch').
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data (i.e. '2008-01-02').
+    :return: tuple -- The function returns a tuple with the paths of the
+     midpoint prices and the trade signs.
+    """
+
+    year, month, day = date.split('-')
+
+    if (source == 'taq'):
+        folder = f'../../taq_data/responses_second_data_{year}'
+        signs_name = taq_data_tools_responses_second \
+            .taq_trade_signs_name('taq_trade_signs_second_data')
+
+        return (f'{folder}/taq_midpoint_second_data/taq_midpoint_second_data'
+                + f'_midpoint_{year}{month}{day}_{ticker}.pickle',
+                f'{folder}/{signs_name}/{signs_name}'
+                + f'_{year}{month}{day}_{ticker}.pickle')
+
+    folder = f'../../itch_data/data_extraction_{year}'
+
+    return (f'{folder}/itch_midpoint_second_data/itch_midpoint_second_data'
+            + f'_{year}{month}{day}_{ticker}.pickle',
+            f'{folder}/itch_trade_signs_second_data/itch_trade_signs_second'
+            + f'_data_{year}{month}{day}_{ticker}.pickle')
+
+# -----------------------------------------------------------------------------
+
+
+def market_comparison_load(source, ticker, date):
+    """Loads the midpoint prices and trade signs of a ticker in a day.
+
+    The TAQ and ITCH implementations save the series with the functions of
+    the market_data_codec_shared module, so both are decoded the same way.
+    The TAQ trade signs are saved with the trade prices of every second.
+
+    :param source: string with the source of the data ('taq' or 'itch').
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data (i.e. '2008-01-02').
+    :return: tuple -- The function returns a tuple with numpy arrays of the
+     time and the midpoint prices, and of the time and the trade signs.
+    """
+
+    midpoint_path, signs_path = market_comparison_paths(source, ticker, date)
+
+    midpoint_data = market_data_storage_shared \
+        .market_storage_load(midpoint_path)
+    signs_data = market_data_storage_shared.market_storage_load(signs_path)
+
+    if (source == 'taq'):
+        _, signs_data = signs_data
+
+    mid_time, midpoint = market_data_codec_shared.market_decode_prices(
+        midpoint_data)
+    signs_time, signs = market_data_codec_shared.market_decode_signs(
+        signs_data)
+
+    return (mid_time, midpoint, signs_time, signs)
+
+# -----------------------------------------------------------------------------
+
+
+def market_comparison_align(time, values, grid, fill):
+    """Places a series with a regular time axis in another time axis.
+
+    :param time: numpy array with the regular time axis of the series.
+    :param values: numpy array with the values of the series.
+    :param grid: numpy array with the regular time axis of the result.
+    :param fill: value of the times of the axis that are not in the series.
+    :return: numpy array -- The function returns the values in the time
+     axis.
+    """
+
+    aligned = np.full(len(grid), fill, dtype=np.asarray(values).dtype)
+
+    if (len(time)):
+        index = grid - time[0]
+        inside = (index >= 0) * (index < len(values)) > 0
+        aligned[inside] = values[index[inside]]
+
+    return aligned
+
+# -----------------------------------------------------------------------------
+
+
+def market_comparison_rows(tickers, dates):
+    """Compares the TAQ and ITCH data of every ticker and date of a group.
+
+    The midpoint prices and trade signs of every ticker and date of both
+    sources are loaded in the rows of matrices with the same time axes, and
+    the statistics of every row are computed together with numpy operations
+    over the matrices.
+
+    :param tickers: list of the string abbreviation of the stocks to be
+     analized (i.e. ['AAPL', 'MSFT']).
+    :param dates: list of strings with the date of the data to be compared
+     (i.e. ['2008-01-02', '2008-01-03]).
+    :return: dict -- The function returns a dictionary with the numpy arrays
+     of the statistics of the rows (tickers x dates), and of the
+     self-response and the amount of trades of both sources (2 x rows x
+     time lags).
+    """
+
+    rows = len(tickers) * len(dates)
+
+    # Source in the first axis (0 = ITCH, 1 = TAQ). The rows without data
+    # have a constant midpoint price and no trades
+    midpoint = np.ones((2, rows, len(__midpoint_time__)))
+    signs = np.zeros((2, rows, len(__signs_time__)), dtype=np.int8)
+    available = np.zeros((2, rows), dtype=bool)
+
+    for row, (ticker, date) in enumerate(iprod(tickers, dates)):
+        for s_idx, source in enumerate(['itch', 'taq']):
+
+            try:
+                mid_time, midpoint_d, signs_time, signs_d = \
+                    market_comparison_load(source, ticker, date)
+
+                midpoint[s_idx, row] = market_comparison_align(
+                    mid_time, midpoint_d, __midpoint_time__, np.nan)
+                signs[s_idx, row] = market_comparison_align(
+                    signs_time, signs_d, __signs_time__, 0)
+                available[s_idx, row] = True
+
+            except FileNotFoundError as e:
+                print('No data')
+                print(e)
+                print()
+
+    # Trade signs
+    trades = signs != 0
+    sign_both = np.sum(trades[0] * trades[1], axis=1)
+    sign_agree = np.sum(trades[0] * (signs[0] == signs[1]), axis=1)
+    sign_itch_only = np.sum(trades[0] > trades[1], axis=1)
+    sign_taq_only = np.sum(trades[1] > trades[0], axis=1)
+    del trades
+
+    # Midpoint prices. The seconds before the first quote of a source are
+    # not compared
+    deviation = np.abs(midpoint[0] - midpoint[1])
+    midpoint_bias = np.nanmean(midpoint[0] - midpoint[1], axis=1)
+    midpoint_deviation = np.nanmean(deviation, axis=1)
+    midpoint_max_deviation = np.nanmax(deviation, axis=1)
+    del deviation
+
+    returns = np.diff(np.log(midpoint), axis=2)
+    returns -= np.nanmean(returns, axis=2, keepdims=True)
+    returns_cov = np.nanmean(returns[0] * returns[1], axis=1)
+    returns_std = np.sqrt(np.nanmean(returns ** 2, axis=2))
+    del returns
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return_correlation = returns_cov / returns_std[0] / returns_std[1]
+        sign_agreement = sign_agree / sign_both
+
+    # Self-responses of both sources in groups of rows to keep the memory
+    # used by the FFTs small. The seconds out of the time axis of a source
+    # are replaced by its first midpoint price
+    midpoint = midpoint.reshape(2 * rows, -1)
+    first_price = np.take_along_axis(
+        midpoint, np.argmax(~np.isnan(midpoint), axis=1)[:, None], axis=1)
+    midpoint = np.where(np.isnan(midpoint), first_price, midpoint)
+    signs = signs.reshape(2 * rows, -1)
+    self_response = np.zeros((2 * rows, __tau__))
+    num = np.zeros((2 * rows, __tau__))
+
+    for r_idx in range(0, 2 * rows, __chunk_rows__):
+        r_end = r_idx + __chunk_rows__
+        self_response[r_idx:r_end], num[r_idx:r_end] = \
+            market_data_response_shared.market_self_response_rows(
+                midpoint[r_idx:r_end], signs[r_idx:r_end], __tau__)
+
+    return {
+        'available': available,
+        'sign_both': sign_both,
+        'sign_agree': sign_agree,
+        'sign_itch_only': sign_itch_only,
+        'sign_taq_only': sign_taq_only,
+        'sign_agreement': sign_agreement,
+        'midpoint_bias': midpoint_bias,
+        'midpoint_deviation': midpoint_deviation,
+        'midpoint_max_deviation': midpoint_max_deviation,
+        'return_correlation': return_correlation,
+        'self_response': self_response.reshape(2, rows, __tau__),
+        'num': num.reshape(2, rows, __tau__)}
+
+# -----------------------------------------------------------------------------
+
+
+def market_comparison_data(tickers, dates):
+    """Compares the TAQ and ITCH data of a group of tickers and dates.
+
+    The tickers are compared in groups with the market_comparison_rows
+    function, so only the matrices of the second data of a group of tickers
+    (about __chunk_rows__ rows) are in memory at the same time. For every
+    ticker and date the function computes:
+
+    - the number of seconds with trades in both sources, in only one of them
+      and with the same trade sign, and the agreement rate of the signs.
+    - the mean, mean absolute and maximum absolute difference between the
+      ITCH and TAQ midpoint prices, and the correlation of their returns.
+    - the self-response of both sources (computed together with the
+      market_self_response_rows function) and its difference.
+
+    The self-responses of the dates of every ticker are also added as in the
+    week self-response functions. The rows without the data of both sources
+    have NaN values. The TAQ trade signs are the ones of the classifier of
+    the run, which is in the name of the saved file.
+
+    :param tickers: list of the string abbreviation of the stocks to be
+     analized (i.e. ['AAPL', 'MSFT']).
+    :param dates: list of strings with the date of the data to be compared
+     (i.e. ['2008-01-02', '2008-01-03]).
+    :return: dict -- The function returns a dictionary with the numpy arrays
+     (tickers x dates) of the comparison.
+    """
+
+    function_name = market_comparison_data.__name__
+    print(f'Computing the data of {function_name} of {len(tickers)} tickers'
+          + f' from {dates[0]} to {dates[-1]}')
+    print()
+
+    tickers_group = max(1, __chunk_rows__ // len(dates))
+    groups = [market_comparison_rows(tickers[t_idx:t_idx + tickers_group],
+                                     dates)
+              for t_idx in range(0, len(tickers), tickers_group)]
+    rows = {key: np.concatenate([group[key] for group in groups],
+                                axis=-1 if groups[0][key].ndim < 3 else 1)
+            for key in groups[0]}
+
+    available = rows['available']
+    both = available[0] * available[1]
+    self_response = rows['self_response'].reshape(2, len(tickers),
+                                                  len(dates), __tau__)
+    num = rows['num'].reshape(2, len(tickers), len(dates), __tau__)
+
+    # The rows without the data of both sources are not added to the
+    # self-response of the tickers
+    both_days = both.reshape(len(tickers), len(dates), 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        response_day = self_response / num
+        response_week = np.sum(self_response * both_days, axis=2) \
+            / np.sum(num * both_days, axis=2)
+
+    shape = (len(tickers), len(dates))
+    nan_rows = np.where(both, 1., np.nan)
+
+    comparison = {
+        'tickers': list(tickers),
+        'dates': list(dates),
+        'available_itch': available[0].reshape(shape),
+        'available_taq': available[1].reshape(shape),
+        'sign_both': rows['sign_both'].reshape(shape),
+        'sign_agree': rows['sign_agree'].reshape(shape),
+        'sign_itch_only': rows['sign_itch_only'].reshape(shape),
+        'sign_taq_only': rows['sign_taq_only'].reshape(shape),
+        'sign_agreement': (rows['sign_agreement'] * nan_rows).reshape(shape),
+        'midpoint_bias': (rows['midpoint_bias'] * nan_rows).reshape(shape),
+        'midpoint_deviation': (rows['midpoint_deviation']
+                               * nan_rows).reshape(shape),
+        'midpoint_max_deviation': (rows['midpoint_max_deviation']
+                                   * nan_rows).reshape(shape),
+        'return_correlation': (rows['return_correlation']
+                               * nan_rows).reshape(shape),
+        'response_itch': response_day[0],
+        'response_taq': response_day[1],
+        'response_difference': (response_day[0] - response_day[1])
+        * nan_rows.reshape(shape + (1,)),
+        'response_itch_week': response_week[0],
+        'response_taq_week': response_week[1],
+        'response_difference_week': response_week[0] - response_week[1]}
+
+    # Saving data
+    year = dates[0].split('-')[0]
+    first = dates[0].replace('-', '')
+    last = dates[-1].replace('-', '')
+    data_name = taq_data_tools_responses_second \
+        .taq_trade_signs_name(function_name)
+    market_data_storage_shared.market_storage_save(
+        f'../../market_data/comparison_data_{year}/{data_name}/'
+        + f'{data_name}_{first}_{last}.pickle', comparison)
+
+    print('Data Saved')
+    print()
+
+    return comparison
+
+# -----------------------------------------------------------------------------
+
+
+def main():
+    """The main function of the script.
+
+    The main function is used to test the functions in the script.
+
+    :return: None.
+    """
+
+    pass
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+'''Market data journal module.
+
+The functions in the module keep the journal of a run of the TAQ and ITCH
+implementations. Every job of the market_parallel_starmap function writes a
+line with its status ('done' or 'failed'), attempt, time, error and the paths
+of the data it saved, and the results of the jobs that finished are kept next
+to the journal. When a run stops (i.e. a worker killed by the system or an
+interrupted run), running it again with the same run name only runs the jobs
+that did not finish.
+
+The journal is used when the MARKET_RUN_ID environment variable has the name
+of the run. It is saved in the journal/<run name> folder next to the timings
+of the jobs (i.e. '../../taq_data/journal/2008_week/').
+
+This script requires the following modules:
+    * hashlib
+    * json
+    * os
+    * pickle
+    * sys
+    * time
+
+The module contains the following functions:
+    * market_journal_folder - returns the folder of the journal of the run.
+    * market_journal_key - returns the key of a job.
+    * market_journal_load - loads the last entry of every job.
+    * market_journal_write - writes an entry of a job.
+    * market_journal_result_path - returns the path of the result of a job.
+    * market_journal_result_save - saves the result of a job.
+    * market_journal_result_load - loads the result of a job.
+    * main - the main function of the script.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+
+# -----------------------------------------------------------------------------
+
+
+def market_journal_folder(costs_path):
+    """Returns the folder of the journal of the run.
+
+    :param costs_path: string with the path of the pickle file with the
+     timings (i.e. '../../taq_data/job_costs.pickle').
+    :return: string -- The function returns the path of the folder (None if
+     the MARKET_RUN_ID environment variable is not defined).
+    """
+
+    run_id = os.environ.get('MARKET_RUN_ID')
+
+    if (not run_id):
+        return None
+
+    folder = os.path.join(os.path.dirname(costs_path), 'journal', run_id)
+    os.makedirs(os.path.join(folder, 'results'), exist_ok=True)
+
+    return folder
+
+# -----------------------------------------------------------------------------
+
+
+def market_journal_key(function_name, arg):
+    """Returns the key of a job.
+
+    :param function_name: name of the function that runs the job.
+    :param arg: tuple with the arguments of the job.
+    :return: list -- The function returns a list of strings with the name of
+     the function and the arguments.
+    """
+
+    return [function_name] + [str(val) for val in arg]
+
+# -----------------------------------------------------------------------------
+
+
+def market_journal_load(folder):
+    """Loads the last entry of every job of the journal.
+
+    The last line of the journal can be incomplete if the run stopped while
+    it was written, so the lines that can not be read are ignored.
+
+    :param folder: string with the folder of the journal.
+    :return: dict -- The function returns a dictionary with the keys of the
+     jobs (as tuples) and their last entry.
+    """
+
+    entries = {}
+
+    try:
+        with open(os.path.join(folder, 'journal.jsonl')) as lines:
+            for line in lines:
+                try:
+                    entry = json.loads(line)
+                    entries[tuple(entry['job'])] = entry
+
+                except ValueError:
+                    continue
+
+    except FileNotFoundError:
+        pass
+
+    return entries
+
+# -----------------------------------------------------------------------------
+
+
+def market_journal_write(folder, key, status, attempt, job_time=None,
+                         error=None, outputs=()):
+    """Writes an entry of a job in the journal.
+
+    The line is written to the disk before the function returns, so the
+    journal has every job that finished when the run stops.
+
+    :param folder: string with the folder of the journal.
+    :param key: list of strings with the key of the job.
+    :param status: string with the status of the job ('done' or 'failed').
+    :param attempt: int with the number of the attempt of the job.
+    :param job_time: float with the time of the job in seconds (default
+     None).
+    :param error: string with the error of the job (default None).
+    :param outputs: iterable of strings with the paths of the data saved by
+     the job (default empty).
+    :return: None -- The function writes the entry and does not return a
+     value.
+    """
+
+    entry = {'job': key, 'status': status, 'attempt': attempt,
+             'time': job_time, 'error': error, 'outputs': list(outputs),
+             'written': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+    with open(os.path.join(folder, 'journal.jsonl'), 'a') as journal:
+        journal.write(json.dumps(entry) + '\n')
+        journal.flush()
+        os.fsync(journal.fileno())
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def market_journal_result_path(folder, key):
+    """Returns the path of the result of a job.
+
+    :param folder: string with the folder of the journal.
+    :param key: list of strings with the key of the job.
+    :return: string -- The function returns the path of the file.
+    """
+
+    name = hashlib.sha1(json.dumps(key).encode()).hexdigest()
+
+    return os.path.join(folder, 'results', f'{name}.pickle')
+
+# -----------------------------------------------------------------------------
+
+
+def market_journal_result_save(folder, key, result):
+    """Saves the result of a job.
+
+    The file is replaced atomically, so a result is complete when its entry
+    is in the journal.
+
+    :param folder: string with the folder of the journal.
+    :param key: list of strings with the key of the job.
+    :param result: result of the job.
+    :return: None -- The function saves the result in a file and does not
+     return a value.
+    """
+
+    path = market_journal_result_path(folder, key)
+    pickle.dump(result, open(f'{path}.{os.getpid()}', 'wb'))
+    os.replace(f'{path}.{os.getpid()}', path)
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def market_journal_result_load(folder, key):
+    """Loads the result of a job that finished in a previous run.
+
+    :param folder: string with the folder of the journal.
+    :param key: list of strings with the key of the job.
+    :return: The function returns the result of the job.
+    """
+
+    return pickle.load(open(market_journal_result_path(folder, key), 'rb'))
+
+# -----------------------------------------------------------------------------
+
+
+def main():
+    """The main function of the script.
+
+    The main function prints the failed jobs of the journal in the folder
+    of the argument.
+
+    :return: None.
+    """
+
+    folder = sys.argv[1]
+
+    for key, entry in market_journal_load(folder).items():
+        if (entry['status'] != 'done'):
+            print(f'{key} - attempt {entry["attempt"]} -'
+                  + f' {entry["error"].splitlines()[-1]}')
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    main()
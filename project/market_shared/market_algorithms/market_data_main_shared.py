@@ -0,0 +1,349 @@
+'''Market data main module.
+
+The functions in the module run the TAQ and ITCH implementations from the
+command line. The tickers, dates, data folder, storage backend, number of
+workers, stages, format of the plots and name of the run are arguments, so a
+run does not need to change the main modules of the implementations:
+
+    python market_data_main_shared.py --source taq itch --tickers AAPL MSFT
+     --dates 2008-01-07:2008-01-11 2008-03-03:2008-03-07 --workers 8
+     --stages extract response --data-root /scratch/market --run-id week
+
+With the compare stage, the TAQ and ITCH results of the tickers and dates are
+compared after the stages of the sources (market_data_comparison_shared
+module).
+
+The data folder has the same structure as the project folder (taq_data,
+itch_data and plots). The implementations use paths relative to their
+algorithms folder, so the run works in the market_shared/market_algorithms
+folder of the data folder. By default the data folder is the one of the
+MARKET_RESPONSE_DATA_ROOT environment variable or the project folder.
+
+This script requires the following modules:
+    * argparse
+    * collections
+    * numpy
+    * os
+    * sys
+    * itch_data_main_data_extraction
+    * itch_data_main_responses_second
+    * market_data_comparison_shared
+    * taq_data_main_responses_second
+
+The module contains the following functions:
+    * market_main_parser - returns the parser of the arguments.
+    * market_main_tickers - returns the tickers of the run.
+    * market_main_dates - returns the dates of the run.
+    * market_main_groups - groups the dates in the weeks of the analysis.
+    * market_main_folders - creates the folders of the data and plots.
+    * market_main_pipeline - runs the stages of a source.
+    * main - the main function of the script.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import argparse
+from collections import OrderedDict
+import numpy as np
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'itch_data_extraction',
+                             'itch_algorithms'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'itch_responses_second',
+                             'itch_algorithms'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'taq_responses_second',
+                             'taq_algorithms'))
+
+import itch_data_main_data_extraction
+import itch_data_main_responses_second
+import market_data_comparison_shared
+import taq_data_main_responses_second
+
+# -----------------------------------------------------------------------------
+
+
+def market_main_parser():
+    """Returns the parser of the arguments of the command line.
+
+    :return: argparse.ArgumentParser -- The function returns the parser.
+    """
+
+    parser = argparse.ArgumentParser(
+        description='Extracts, analyzes and plots the self-response of the'
+                    + ' TAQ and ITCH data.')
+    parser.add_argument('--source', nargs='+', choices=['taq', 'itch'],
+                        default=['taq', 'itch'],
+                        help='data to analyze (default both)')
+    parser.add_argument('--tickers', nargs='+', default=[],
+                        help='abbreviations of the stocks (i.e. AAPL MSFT)')
+    parser.add_argument('--tickers-file',
+                        help='file with a ticker in every line')
+    parser.add_argument('--dates', nargs='+', default=[],
+                        help='dates or ranges of business days (i.e.'
+                             + ' 2008-01-07 or 2008-01-07:2008-01-11)')
+    parser.add_argument('--calendar',
+                        help='file with a trading date in every line. With'
+                             + ' --dates only the dates in the calendar are'
+                             + ' used')
+    parser.add_argument('--stages', nargs='+',
+                        choices=['extract', 'response', 'plot', 'compare',
+                                 'seek', 'book'],
+                        default=['extract', 'response', 'plot'],
+                        help='stages to run (default extract, response and'
+                             + ' plot). seek builds the seek copies of the'
+                             + ' original ITCH files and book saves the'
+                             + ' snapshots, metrics and depth of the ITCH'
+                             + ' order book')
+    parser.add_argument('--workers', type=int,
+                        help='processes of the pools (default the CPUs)')
+    parser.add_argument('--start-method',
+                        choices=['fork', 'spawn', 'forkserver'],
+                        default=os.environ.get('MARKET_START_METHOD'),
+                        help='start method of the workers. forkserver'
+                             + ' imports the analysis modules once for all'
+                             + ' the pools (default the platform method)')
+    parser.add_argument('--format', default='png',
+                        help='format of the plots (default png)')
+    parser.add_argument('--trade-signs', choices=['tick', 'quote'],
+                        default=os.environ.get('MARKET_TRADE_SIGNS', 'tick'),
+                        help='classifier of the TAQ trades: tick rule or'
+                             + ' quote rule with tick rule for the trades at'
+                             + ' the midpoint price (default tick)')
+    parser.add_argument('--quote-lag', type=int,
+                        default=int(os.environ.get('MARKET_QUOTE_LAG', 0)),
+                        help='seconds the TAQ quotes are delayed respect to'
+                             + ' the trades in the quote rule (default 0)')
+    parser.add_argument('--storage', choices=['local', 'mmap', 'memory'],
+                        default=os.environ.get('MARKET_STORAGE', 'local'),
+                        help='backend of the data (default local)')
+    parser.add_argument('--run-id',
+                        default=os.environ.get('MARKET_RUN_ID'),
+                        help='name of the run. The jobs of the run are'
+                             + ' written in a journal and the jobs that'
+                             + ' finished are not computed again when the'
+                             + ' run is repeated')
+    parser.add_argument('--data-root',
+                        default=os.environ.get(
+                            'MARKET_RESPONSE_DATA_ROOT',
+                            os.path.join(os.path.dirname(
+                                os.path.abspath(__file__)), '..', '..')),
+                        help='folder with the taq_data, itch_data and plots'
+                             + ' folders (default the project folder)')
+
+    return parser
+
+# -----------------------------------------------------------------------------
+
+
+def market_main_tickers(tickers, tickers_file=None):
+    """Returns the tickers of the run.
+
+    :param tickers: list of strings with the abbreviation of the stocks
+     (i.e. ['AAPL', 'MSFT']).
+    :param tickers_file: string with the path of a file with a ticker in
+     every line. The lines starting with # are ignored (default None).
+    :return: list -- The function returns a list with the tickers without
+     repetitions.
+    """
+
+    tickers = list(tickers)
+
+    if (tickers_file is not None):
+        with open(tickers_file) as lines:
+            tickers += [line.strip() for line in lines
+                        if line.strip() and not line.startswith('#')]
+
+    return list(OrderedDict.fromkeys(tickers))
+
+# -----------------------------------------------------------------------------
+
+
+def market_main_dates(dates, calendar=None):
+    """Returns the dates of the run.
+
+    :param dates: list of strings with dates or ranges of business days
+     (i.e. ['2008-01-07', '2008-03-03:2008-03-07']).
+    :param calendar: string with the path of a file with a trading date in
+     every line (default None). Without dates all the dates of the calendar
+     are used, otherwise only the dates in the calendar.
+    :return: list -- The function returns a sorted list with the dates.
+    """
+
+    run_dates = set()
+
+    for date in dates:
+        start, _, end = date.partition(':')
+        days = np.arange(np.datetime64(start),
+                         np.datetime64(end or start) + 1)
+        run_dates.update(str(day) for day in days[np.is_busday(days)])
+
+    if (calendar is not None):
+        with open(calendar) as lines:
+            calendar_dates = set(line.strip() for line in lines
+                                 if line.strip()
+                                 and not line.startswith('#'))
+
+        run_dates = calendar_dates if not dates \
+            else run_dates & calendar_dates
+
+    return sorted(run_dates)
+
+# -----------------------------------------------------------------------------
+
+
+def market_main_groups(dates, source):
+    """Groups the dates in the periods analyzed together.
+
+    The results of the TAQ data are saved by year and month and the results
+    of the ITCH data by year, so the dates of a group do not overwrite the
+    results of another group.
+
+    :param dates: sorted list of strings with the dates
+     (i.e. ['2008-01-02', '2008-01-03]).
+    :param source: string with the source of the data ('taq' or 'itch').
+    :return: list -- The function returns a list with the lists of dates.
+    """
+
+    key_len = 7 if source == 'taq' else 4
+    groups = OrderedDict()
+
+    for date in dates:
+        groups.setdefault(date[:key_len], []).append(date)
+
+    return list(groups.values())
+
+# -----------------------------------------------------------------------------
+
+
+def market_main_folders(source, years):
+    """Creates the folders of the data and plots of a source.
+
+    The functions of the implementations create the folder of every function
+    inside the folder of the year, so the folders of the years must exist.
+
+    :param source: string with the source of the data ('taq' or 'itch').
+    :param years: iterable of strings with the years (i.e. ['2008']).
+    :return: None -- The function creates the folders and does not return a
+     value.
+    """
+
+    for year in years:
+
+        if (source == 'taq'):
+            folders = [f'../../taq_data/responses_second_data_{year}',
+                       f'../../plots/taq_responses_second_plot_{year}']
+        else:
+            folders = [f'../../itch_data/data_extraction_{year}',
+                       f'../../itch_data/responses_second_data_{year}',
+                       f'../../plots/itch_data_extraction_{year}',
+                       f'../../plots/itch_responses_second_plot_{year}']
+
+        for folder in folders:
+            os.makedirs(folder, exist_ok=True)
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def market_main_pipeline(source, tickers, dates, stages):
+    """Runs the stages of a source for a group of dates.
+
+    :param source: string with the source of the data ('taq' or 'itch').
+    :param tickers: list of the string abbreviation of the stocks to be
+     analized (i.e. ['AAPL', 'MSFT']).
+    :param dates: list of strings with the date of the data to be extracted
+     (i.e. ['2008-01-02', '2008-01-03]).
+    :param stages: iterable of strings with the stages to run ('extract',
+     'response', 'plot', 'seek' and 'book').
+    :return: None -- The function saves the data in files and does not
+     return a value.
+    """
+
+    if (source == 'taq'):
+        taq_data_main_responses_second \
+            .taq_data_plot_generator(tickers, dates, stages)
+
+    else:
+        # The extraction and the responses of the ITCH data are in different
+        # implementations
+        itch_data_main_data_extraction \
+            .itch_data_plot_generator(tickers, dates, stages)
+        itch_data_main_responses_second \
+            .itch_data_plot_generator(tickers, dates, stages)
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def main(argv=None):
+    """The main function of the script.
+
+    The main function reads the arguments of the command line and runs the
+    stages of every source and group of dates.
+
+    :param argv: list of strings with the arguments (default the arguments
+     of the command line).
+    :return: None.
+    """
+
+    parser = market_main_parser()
+    args = parser.parse_args(argv)
+
+    tickers = market_main_tickers(args.tickers, args.tickers_file)
+    dates = market_main_dates(args.dates, args.calendar)
+
+    if (not tickers or not dates):
+        parser.error('No tickers or dates to analyze')
+    if (args.workers is not None and args.workers < 1):
+        parser.error('--workers must be at least 1')
+
+    # The workers, the format of the plots, the storage and the classifier of
+    # the trades are read by the functions of the implementations, also in
+    # the processes of the pools
+    if (args.workers is not None):
+        os.environ['MARKET_PROCESSES'] = str(args.workers)
+    if (args.start_method is not None):
+        os.environ['MARKET_START_METHOD'] = args.start_method
+    os.environ['MARKET_PLOT_FORMAT'] = args.format
+    os.environ['MARKET_STORAGE'] = args.storage
+    os.environ['MARKET_TRADE_SIGNS'] = args.trade_signs
+    os.environ['MARKET_QUOTE_LAG'] = str(args.quote_lag)
+    if (args.run_id is not None):
+        os.environ['MARKET_RUN_ID'] = args.run_id
+
+    work_folder = os.path.join(os.path.abspath(args.data_root),
+                               'market_shared', 'market_algorithms')
+    os.makedirs(work_folder, exist_ok=True)
+    os.chdir(work_folder)
+
+    for source in args.source:
+
+        market_main_folders(source, sorted(set(date[:4] for date in dates)))
+
+        for group in market_main_groups(dates, source):
+            market_main_pipeline(source, tickers, group, args.stages)
+
+    # Comparison of the results of both sources of every year
+    if ('compare' in args.stages):
+        for group in market_main_groups(dates, 'itch'):
+            market_data_comparison_shared \
+                .market_comparison_data(tickers, group)
+
+    print('Ay vamos!!')
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    main()
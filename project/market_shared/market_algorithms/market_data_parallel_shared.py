@@ -0,0 +1,852 @@
+'''Market data parallel module.
+
+The functions in the module distribute the (ticker, date) jobs of the TAQ and
+ITCH implementations between the processes of a pool. The cost of every job
+is estimated from the size of its input files or from the time it took in
+previous runs, the jobs are scheduled from the largest to the smallest and
+packed in chunks of similar cost. The pool is sized with the CPU quota and
+the free memory of the container, and the workers can read and decompress
+the inputs of their next jobs while the current job runs.
+
+This script requires the following modules:
+    * gzip
+    * multiprocessing
+    * multiprocessing.connection.wait
+    * numpy
+    * os
+    * pickle
+    * queue
+    * sys
+    * threading
+    * time
+    * traceback
+    * market_data_journal_shared
+
+The module contains the following functions:
+    * market_cpu_count - returns the CPUs of the container.
+    * market_memory_available - returns the free memory of the container.
+    * market_worker_context - returns the context that starts the workers.
+    * market_worker_init - sets the environment of the workers.
+    * market_job_timings_load - loads the timings of previous runs.
+    * market_job_timings_save - saves the timings of a run.
+    * market_job_costs - estimates the cost of every job.
+    * market_job_schedule - orders the jobs and packs them in chunks.
+    * market_prefetch_read - reads an input file in memory.
+    * market_prefetched - returns the prefetched content of an input file.
+    * market_prefetch_jobs - reads the inputs of the next jobs of a worker.
+    * market_worker_loop - runs the jobs of a worker.
+    * market_worker_start - starts a worker of the pool.
+    * market_parallel_starmap - runs the jobs in a pool of workers.
+    * main - the main function of the script.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import gzip
+import multiprocessing as mp
+from multiprocessing.connection import wait as connection_wait
+import numpy as np
+import os
+import pickle
+import queue
+import sys
+import threading
+import time
+import traceback
+
+import market_data_journal_shared
+
+# Content of the input files of the current job of a worker
+__prefetch__ = {}
+# Paths of the data saved by the current job of a worker
+__outputs__ = []
+
+# -----------------------------------------------------------------------------
+
+
+def market_cpu_count():
+    """Returns the number of CPUs that the process can use.
+
+    Takes the minimum between the CPUs of the machine, the CPU affinity of the
+    process and the CPU quota of the container (cgroup v2 or v1).
+
+    :return: int -- The function returns the number of CPUs.
+    """
+
+    cpus = mp.cpu_count()
+
+    if (hasattr(os, 'sched_getaffinity')):
+        cpus = min(cpus, len(os.sched_getaffinity(0)))
+
+    quota = None
+
+    try:
+        # cgroup v2
+        quota_str, period_str = open('/sys/fs/cgroup/cpu.max').read().split()
+        if (quota_str != 'max'):
+            quota = int(quota_str) / int(period_str)
+
+    except (FileNotFoundError, ValueError):
+
+        try:
+            # cgroup v1
+            quota_us = int(open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us').read())
+            period_us = int(
+                open('/sys/fs/cgroup/cpu/cpu.cfs_period_us').read())
+            if (quota_us > 0):
+                quota = quota_us / period_us
+
+        except (FileNotFoundError, ValueError):
+            pass
+
+    if (quota is not None):
+        cpus = min(cpus, int(quota))
+
+    return max(1, cpus)
+
+# -----------------------------------------------------------------------------
+
+
+def market_memory_available():
+    """Returns the memory in bytes that the process can still use.
+
+    Takes the minimum between the available memory of the machine and the
+    free memory of the container (cgroup v2 or v1).
+
+    :return: int -- The function returns the memory in bytes (None if it is
+     unknown).
+    """
+
+    memory = []
+
+    try:
+        for line in open('/proc/meminfo'):
+            if (line.startswith('MemAvailable:')):
+                memory.append(int(line.split()[1]) * 1024)
+
+    except FileNotFoundError:
+        pass
+
+    for limit_path, usage_path in [
+            ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory.current'),
+            ('/sys/fs/cgroup/memory/memory.limit_in_bytes',
+             '/sys/fs/cgroup/memory/memory.usage_in_bytes')]:
+
+        try:
+            memory.append(int(open(limit_path).read())
+                          - int(open(usage_path).read()))
+            break
+
+        # The limit is 'max' when the container does not have a limit
+        except (FileNotFoundError, ValueError):
+            pass
+
+    return min(memory) if memory else None
+
+# -----------------------------------------------------------------------------
+
+
+def market_worker_context(function):
+    """Returns the context that starts the workers of the pools.
+
+    The start method is read from the MARKET_START_METHOD environment
+    variable ('fork', 'spawn' or 'forkserver', default the method of the
+    platform). With the forkserver method, numpy and the analysis modules are
+    imported once in the server when the first pool starts, and every worker
+    is a copy of the server, so the workers do not import them again.
+
+    :param function: function that runs the jobs of the pool.
+    :return: multiprocessing context -- The function returns the context.
+    """
+
+    context = mp.get_context(os.environ.get('MARKET_START_METHOD'))
+
+    if (context.get_start_method() == 'forkserver'):
+
+        preload = ['numpy', 'market_data_storage_shared'] \
+            + sorted(name for name in sys.modules
+                     if name.startswith(('taq_data_analysis',
+                                         'itch_data_analysis')))
+        # The modules of the scripts run directly are not preloaded
+        if (function.__module__ != '__main__'):
+            preload.append(function.__module__)
+
+        context.set_forkserver_preload(preload)
+
+    return context
+
+# -----------------------------------------------------------------------------
+
+
+def market_worker_init(threads, environment=None):
+    """Sets the environment and limits the threads of the native math
+    libraries in a worker.
+
+    The workers of the forkserver have the environment of the server, so the
+    environment of the main process is set again. The environment variables
+    of the threads are read by the libraries loaded after the worker starts.
+    If the threadpoolctl module is installed, the libraries already loaded
+    (i.e. the BLAS used by numpy) are limited too.
+
+    :param threads: int with the number of threads of every worker.
+    :param environment: dictionary with the environment variables of the
+     main process (default None, the environment is not changed).
+    :return: None.
+    """
+
+    if (environment is not None):
+        os.environ.update(environment)
+
+    for variable in ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                     'MKL_NUM_THREADS', 'BLIS_NUM_THREADS',
+                     'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS']:
+        os.environ[variable] = str(threads)
+
+    try:
+        import threadpoolctl
+        threadpoolctl.threadpool_limits(threads)
+
+    except ImportError:
+        pass
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def market_job_timings_load(costs_path):
+    """Loads the timings of the jobs of previous runs.
+
+    :param costs_path: string with the path of the pickle file with the
+     timings (i.e. '../../taq_data/job_costs.pickle').
+    :return: dict -- The function returns a dictionary with the job keys and
+     a tuple with the time in seconds and the input size in bytes.
+    """
+
+    try:
+        return pickle.load(open(costs_path, 'rb'))
+
+    except (FileNotFoundError, EOFError):
+        return {}
+
+# -----------------------------------------------------------------------------
+
+
+def market_job_timings_save(costs_path, timings):
+    """Saves the timings of the jobs of a run.
+
+    The timings are merged with the ones of previous runs. The file is
+    replaced atomically, so a run reading it at the same time does not find a
+    partial file.
+
+    :param costs_path: string with the path of the pickle file with the
+     timings (i.e. '../../taq_data/job_costs.pickle').
+    :param timings: dictionary with the job keys and a tuple with the time in
+     seconds and the input size in bytes.
+    :return: None -- The function saves the data in a file and does not return
+     a value.
+    """
+
+    all_timings = market_job_timings_load(costs_path)
+    all_timings.update(timings)
+
+    try:
+        pickle.dump(all_timings, open(f'{costs_path}.{os.getpid()}', 'wb'))
+        os.replace(f'{costs_path}.{os.getpid()}', costs_path)
+
+    except FileNotFoundError:
+        print('No folder to save the job timings')
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def market_job_costs(function_name, args, input_paths, costs_path,
+                     job_name=None):
+    """Estimates the cost of every job.
+
+    The jobs already timed in previous runs use the recorded time. The cost
+    of the rest of the jobs is the size of their input files times the
+    seconds per byte of the timed jobs of the same function. Without
+    timings, the cost is the size of the input files.
+
+    :param function_name: name of the function that runs the jobs.
+    :param args: list of tuples with the arguments of every job
+     (i.e. [('AAPL', '2008-01-02'), ('AAPL', '2008-01-03')]).
+    :param input_paths: function that returns the list of input files of a
+     job from the function name and the arguments of the job.
+    :param costs_path: string with the path of the pickle file with the
+     timings (i.e. '../../taq_data/job_costs.pickle').
+    :param job_name: string with the name of the jobs in the timings
+     (default the name of the function).
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    if (job_name is None):
+        job_name = function_name
+
+    sizes = np.array([sum(os.path.getsize(path) for path
+                          in input_paths(function_name, *arg)
+                          if os.path.isfile(path)) for arg in args],
+                     dtype=float)
+
+    timings = market_job_timings_load(costs_path)
+    recorded = np.array([timings.get((job_name,)
+                                     + tuple(str(val) for val in arg),
+                                     (np.nan, 0.))[0] for arg in args])
+    known = ~np.isnan(recorded)
+
+    # Seconds per byte of all the timed jobs of the function
+    function_timings = np.array([val for key, val in timings.items()
+                                 if key[0] == job_name]).reshape(-1, 2)
+
+    if (function_timings[:, 1].sum()):
+        costs = sizes * function_timings[:, 0].sum() \
+            / function_timings[:, 1].sum()
+        costs[known] = recorded[known]
+    else:
+        costs = sizes
+
+    return (costs, sizes)
+
+# -----------------------------------------------------------------------------
+
+
+def market_job_schedule(costs, processes):
+    """Orders the jobs from the largest to the smallest and packs them in
+     chunks.
+
+    The chunks are filled with jobs in decreasing order of cost until they
+    reach a quarter of the average load of a worker. The large jobs are sent
+    alone at the beginning of the run and the small jobs are sent together at
+    the end, so no worker is left with a large job when the rest finished.
+
+    :param costs: numpy array with the estimated cost of every job.
+    :param processes: int with the number of processes of the pool.
+    :return: list -- The function returns a list of numpy arrays with the
+     indices of the jobs of every chunk.
+    """
+
+    # Without an estimation all the jobs have the same cost
+    if (not np.sum(costs)):
+        costs = np.ones(len(costs))
+
+    order = np.argsort(-costs, kind='stable')
+    chunk_cost = np.sum(costs) / (4 * processes)
+
+    chunks = []
+    chunk = []
+    chunk_sum = 0.
+
+    for job_idx in order:
+
+        if (chunk and chunk_sum + costs[job_idx] > chunk_cost):
+            chunks.append(np.array(chunk))
+            chunk = []
+            chunk_sum = 0.
+
+        chunk.append(job_idx)
+        chunk_sum += costs[job_idx]
+
+    if (chunk):
+        chunks.append(np.array(chunk))
+
+    return chunks
+
+# -----------------------------------------------------------------------------
+
+
+def market_prefetch_read(path):
+    """Reads an input file in memory.
+
+    The gzip files are decompressed. The reading and the decompression
+    release the GIL, so they run at the same time as the computation of the
+    main thread.
+
+    :param path: string with the path of the file.
+    :return: bytes -- The function returns the content of the file (None if
+     the file does not exist).
+    """
+
+    try:
+        data = open(path, 'rb').read()
+
+    except FileNotFoundError:
+        return None
+
+    if (path.endswith('.gz')):
+        data = gzip.decompress(data)
+
+    return data
+
+# -----------------------------------------------------------------------------
+
+
+def market_prefetched(path):
+    """Returns the prefetched content of an input file.
+
+    The content is removed from the prefetch buffer, so the memory is released
+    when the loader is done with it.
+
+    :param path: string with the path of the file.
+    :return: bytes -- The function returns the content of the file (None if
+     the file was not prefetched).
+    """
+
+    return __prefetch__.pop(path, None)
+
+# -----------------------------------------------------------------------------
+
+
+def market_prefetch_jobs(function_name, job_queue, input_paths, local_queue):
+    """Takes jobs from the queue of the worker and reads their input files.
+
+    Runs in a thread of a worker. The local queue is bounded, so the thread
+    only reads the inputs of the next jobs of the worker.
+
+    :param function_name: name of the function that runs the jobs.
+    :param job_queue: queue of the worker with the chunks of jobs.
+    :param input_paths: function that returns the list of input files of a
+     job from the function name and the arguments of the job.
+    :param local_queue: bounded queue of the worker with the jobs and the
+     content of their input files.
+    :return: None.
+    """
+
+    while True:
+
+        chunk = job_queue.get()
+
+        if (chunk is None):
+            local_queue.put(None)
+            return None
+
+        for job_idx, arg in chunk:
+            local_queue.put((job_idx, arg,
+                             {path: market_prefetch_read(path) for path
+                              in input_paths(function_name, *arg)}))
+
+# -----------------------------------------------------------------------------
+
+
+def market_worker_loop(function, job_queue, result_connection, input_paths,
+                       prefetch_depth, threads, environment=None,
+                       worker_idx=0, running=None):
+    """Runs the jobs of the queue of a worker.
+
+    When the prefetch is used, a thread reads and decompresses the inputs of
+    the next jobs while the current job runs. The failures that do not
+    change in a new attempt (AssertionError and FileNotFoundError) are
+    reported to not be retried.
+
+    :param function: function that runs every job.
+    :param job_queue: queue of the worker with the chunks of jobs.
+    :param result_connection: connection of the worker to send the results
+     of the jobs to the main process.
+    :param input_paths: function that returns the list of input files of a
+     job from the function name and the arguments of the job.
+    :param prefetch_depth: int with the number of jobs read in advance (0 to
+     not use the prefetch).
+    :param threads: int with the number of threads of the native math
+     libraries.
+    :param environment: dictionary with the environment variables of the
+     main process (default None).
+    :param worker_idx: int with the position of the worker in the pool
+     (default 0).
+    :param running: shared array with the job running in every worker
+     (default None).
+    :return: None.
+    """
+
+    market_worker_init(threads, environment)
+
+    if (prefetch_depth):
+        local_queue = queue.Queue(maxsize=prefetch_depth)
+        threading.Thread(target=market_prefetch_jobs,
+                         args=(function.__name__, job_queue, input_paths,
+                               local_queue),
+                         daemon=True).start()
+
+        jobs = iter(local_queue.get, None)
+
+    else:
+        jobs = ((job_idx, arg, {}) for chunk in iter(job_queue.get, None)
+                for job_idx, arg in chunk)
+
+    for job_idx, arg, data in jobs:
+
+        __prefetch__.update(data)
+        __outputs__.clear()
+        if (running is not None):
+            running[worker_idx] = job_idx
+        time_ini = time.perf_counter()
+
+        try:
+            result = function(*arg)
+            result_connection.send((job_idx, result,
+                                    time.perf_counter() - time_ini, None,
+                                    list(__outputs__), False))
+
+        except (AssertionError, FileNotFoundError):
+            result_connection.send((job_idx, None, None,
+                                    traceback.format_exc(),
+                                    list(__outputs__), False))
+
+        except Exception:
+            result_connection.send((job_idx, None, None,
+                                    traceback.format_exc(),
+                                    list(__outputs__), True))
+
+        __prefetch__.clear()
+
+    result_connection.close()
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def market_worker_start(context, worker_args):
+    """Starts a worker of the pool with its own queue and connection.
+
+    Every worker has its own queue of jobs and its own connection for the
+    results, so a worker killed while it reads or writes them does not block
+    the rest of the pool.
+
+    :param context: multiprocessing context of the pool.
+    :param worker_args: tuple with the arguments of market_worker_loop
+     without the queue and the connection.
+    :return: tuple -- The function returns a tuple with the process, the
+     queue of jobs and the connection of the results of the worker.
+    """
+
+    function, *rest = worker_args
+    job_queue = context.Queue()
+    result_reader, result_writer = context.Pipe(duplex=False)
+
+    worker = context.Process(target=market_worker_loop,
+                             args=(function, job_queue, result_writer,
+                                   *rest))
+    worker.start()
+    result_writer.close()
+
+    return (worker, job_queue, result_reader)
+
+# -----------------------------------------------------------------------------
+
+
+def market_parallel_starmap(function, args, input_paths, costs_path,
+                            processes=None, memory_factor=10,
+                            prefetch_depth=0, retries=2, job_name=None):
+    """Runs the jobs in a pool of workers scheduling the largest jobs first.
+
+    Works as the starmap method of the multiprocessing pools. The pool is
+    sized with the CPUs of the container, every worker uses one thread of
+    the native math libraries and a chunk of jobs is only sent to the pool
+    when its estimated memory fits in the free memory. With the prefetch, the
+    workers read the inputs of their next jobs while the current job runs.
+    The time of every job is saved to improve the estimation of the cost in
+    the next runs.
+
+    A job that fails is sent again to the pool and the rest of the jobs
+    continue, except the jobs with an AssertionError or a FileNotFoundError,
+    which fail again in a new attempt. When a worker is killed (i.e. by the
+    system when the memory is exhausted), the job it was running fails, the
+    other jobs sent to it are sent again and a new worker takes its place.
+    When the MARKET_RUN_ID environment variable has the name of a run, every
+    job is written in the journal of the run with the
+    market_data_journal_shared module, and the jobs that finished in a
+    previous execution of the run are not computed again.
+
+    :param function: function that runs every job.
+    :param args: iterable of tuples with the arguments of every job
+     (i.e. iprod(['AAPL'], ['2008-01-02', '2008-01-03'])).
+    :param input_paths: function that returns the list of input files of a
+     job from the function name and the arguments of the job.
+    :param costs_path: string with the path of the pickle file with the
+     timings (i.e. '../../taq_data/job_costs.pickle').
+    :param processes: int with the number of processes of the pool (default
+     the MARKET_PROCESSES environment variable or the number of CPUs of the
+     container). An explicit number is not limited to the CPUs.
+    :param memory_factor: float with the ratio between the memory used by a
+     job and the size of its input files (default 10).
+    :param prefetch_depth: int with the number of jobs that every worker
+     reads in advance (default 0, no prefetch).
+    :param retries: int with the number of times a failed job is sent again
+     to the pool (default 2).
+    :param job_name: string with the name of the jobs in the journal and the
+     timings (default the name of the function). The functions whose data
+     depends on the settings of the run, and not only on their arguments,
+     use a name with the settings.
+    :return: list -- The function returns a list with the results of the jobs
+     in the order of the arguments. RuntimeError is raised after the rest of
+     the jobs finished if a job failed in all the attempts.
+    """
+
+    args = list(args)
+    function_name = function.__name__
+    if (job_name is None):
+        job_name = function_name
+
+    # The memory backend of the storage is not shared between processes, so
+    # the jobs run in the main process
+    if (os.environ.get('MARKET_STORAGE') == 'memory'):
+        return [function(*arg) for arg in args]
+
+    results = [None] * len(args)
+    keys = [market_data_journal_shared.market_journal_key(job_name, arg)
+            for arg in args]
+
+    # Jobs that finished in a previous execution of the run
+    journal = market_data_journal_shared.market_journal_folder(costs_path)
+    pending = list(range(len(args)))
+
+    if (journal is not None):
+        entries = market_data_journal_shared.market_journal_load(journal)
+        pending = []
+
+        for job_idx, key in enumerate(keys):
+            try:
+                if (entries[tuple(key)]['status'] != 'done'):
+                    raise KeyError(key)
+                results[job_idx] = market_data_journal_shared \
+                    .market_journal_result_load(journal, key)
+
+            except (KeyError, OSError, EOFError, pickle.UnpicklingError):
+                pending.append(job_idx)
+
+        if (len(pending) < len(args)):
+            print(f'{function_name}: {len(args) - len(pending)} jobs'
+                  + ' finished in a previous execution of the run')
+
+    if (not pending):
+        return results
+
+    # The MARKET_PROCESSES environment variable sets the pools of a run. Only
+    # the default is limited to the CPUs of the container
+    cpus = market_cpu_count()
+    if (processes is None):
+        processes = int(os.environ.get('MARKET_PROCESSES', cpus))
+    if (processes < 1):
+        raise ValueError(f'The pool of {function_name} needs at least one'
+                         + f' process ({processes} requested)')
+    if (processes > cpus):
+        print(f'{function_name}: {processes} processes requested in'
+              + f' {cpus} CPUs')
+    processes = min(processes, len(pending))
+
+    costs, sizes = market_job_costs(function_name,
+                                    [args[job_idx] for job_idx in pending],
+                                    input_paths, costs_path, job_name)
+    chunks = [np.array(pending)[chunk]
+              for chunk in market_job_schedule(costs, processes)]
+    sizes = dict(zip(pending, sizes))
+
+    # The jobs of a chunk run one after the other, so the memory of a chunk
+    # is the memory of its largest job plus the inputs read in advance. A
+    # fraction of the free memory is kept for the main process and the
+    # workers
+    chunks_memory = [(memory_factor + prefetch_depth)
+                     * max(sizes[job_idx] for job_idx in chunk)
+                     for chunk in chunks]
+    memory_budget = market_memory_available()
+    if (memory_budget is not None):
+        memory_budget *= 0.8
+    memory_used = 0.
+
+    # Every worker has its own queue of chunks and connection of results.
+    # The job running in every worker is kept in a shared array, to know the
+    # job lost when a worker is killed
+    context = market_worker_context(function)
+    running = context.Array('l', [-1] * processes, lock=False)
+    worker_args = [(function, input_paths, prefetch_depth,
+                    max(1, cpus // processes), dict(os.environ), worker_idx,
+                    running)
+                   for worker_idx in range(processes)]
+    workers, job_queues, readers = map(list, zip(
+        *[market_worker_start(context, worker_args[worker_idx])
+          for worker_idx in range(processes)]))
+
+    timings = {}
+    job_chunk = {job_idx: chunk_idx for chunk_idx, chunk in enumerate(chunks)
+                 for job_idx in chunk}
+    chunk_left = [len(chunk) for chunk in chunks]
+    chunk_worker = [None] * len(chunks)
+    worker_chunks = [0] * processes
+    attempts = {job_idx: 1 for job_idx in pending}
+    failed = {}
+    next_chunk = 0
+    jobs_left = len(pending)
+
+    try:
+        while (jobs_left):
+
+            # Send the chunks that fit in memory to the workers with less
+            # chunks. A worker has at most two chunks, so the next chunk is
+            # ready when the current one finishes. A chunk is always sent
+            # when the pool is empty
+            while (next_chunk < len(chunks) and min(worker_chunks) < 2
+                   and (memory_budget is None or not memory_used
+                        or memory_used + chunks_memory[next_chunk]
+                        <= memory_budget)):
+                worker_idx = int(np.argmin(worker_chunks))
+                job_queues[worker_idx].put([(job_idx, args[job_idx])
+                                            for job_idx
+                                            in chunks[next_chunk]])
+                chunk_worker[next_chunk] = worker_idx
+                worker_chunks[worker_idx] += 1
+                memory_used += chunks_memory[next_chunk]
+                next_chunk += 1
+
+            sentinels = [worker.sentinel for worker in workers]
+            ready = connection_wait(readers + sentinels)
+            reports = []
+
+            for reader in readers:
+                try:
+                    while (reader.poll()):
+                        reports.append(reader.recv())
+
+                except (EOFError, OSError):
+                    pass
+
+            # A worker killed by the system (i.e. out of memory) does not
+            # send the results of its jobs. The job it was running fails,
+            # the other jobs of its chunks are sent again and a new worker
+            # takes its place
+            for worker_idx, worker in enumerate(workers):
+
+                if (worker.sentinel not in ready or worker.is_alive()):
+                    continue
+
+                print(f'{function_name}: a worker stopped with the exit code'
+                      + f' {worker.exitcode}')
+
+                reported = set(report[0] for report in reports)
+                lost = [job_idx for job_idx, chunk_idx in job_chunk.items()
+                        if chunk_worker[chunk_idx] == worker_idx
+                        and job_idx not in reported]
+
+                for job_idx in sorted(lost):
+
+                    if (job_idx == running[worker_idx]):
+                        reports.append(
+                            (job_idx, None, None,
+                             'The worker running the job stopped with the'
+                             + f' exit code {worker.exitcode}', [], True))
+                        continue
+
+                    # The job is sent again alone at the end of the queue
+                    chunk_idx = job_chunk.pop(job_idx)
+                    chunk_left[chunk_idx] -= 1
+                    if (not chunk_left[chunk_idx]):
+                        worker_chunks[chunk_worker[chunk_idx]] -= 1
+                        memory_used -= chunks_memory[chunk_idx]
+                    job_chunk[job_idx] = len(chunks)
+                    chunks.append(np.array([job_idx]))
+                    chunks_memory.append((memory_factor + prefetch_depth)
+                                         * sizes[job_idx])
+                    chunk_left.append(1)
+                    chunk_worker.append(None)
+
+                readers[worker_idx].close()
+                job_queues[worker_idx].cancel_join_thread()
+                job_queues[worker_idx].close()
+                running[worker_idx] = -1
+                workers[worker_idx], job_queues[worker_idx], \
+                    readers[worker_idx] = market_worker_start(
+                        context, worker_args[worker_idx])
+
+            for job_idx, result, job_time, error, outputs, retry in reports:
+
+                chunk_idx = job_chunk.pop(job_idx)
+                chunk_left[chunk_idx] -= 1
+                if (not chunk_left[chunk_idx]):
+                    worker_chunks[chunk_worker[chunk_idx]] -= 1
+                    memory_used -= chunks_memory[chunk_idx]
+
+                if (error is not None):
+
+                    print(f'{function_name}{args[job_idx]} failed in the'
+                          + f' attempt {attempts[job_idx]}:'
+                          + f' {error.splitlines()[-1]}')
+                    if (journal is not None):
+                        market_data_journal_shared \
+                            .market_journal_write(journal, keys[job_idx],
+                                                  'failed',
+                                                  attempts[job_idx],
+                                                  error=error)
+
+                    # The job is sent again alone at the end of the queue
+                    if (retry and attempts[job_idx] <= retries):
+                        attempts[job_idx] += 1
+                        job_chunk[job_idx] = len(chunks)
+                        chunks.append(np.array([job_idx]))
+                        chunks_memory.append((memory_factor + prefetch_depth)
+                                             * sizes[job_idx])
+                        chunk_left.append(1)
+                        chunk_worker.append(None)
+                        continue
+
+                    failed[job_idx] = error
+                    jobs_left -= 1
+                    continue
+
+                results[job_idx] = result
+                timings[tuple(keys[job_idx])] = (job_time,
+                                                 float(sizes[job_idx]))
+                jobs_left -= 1
+
+                if (journal is not None):
+                    market_data_journal_shared \
+                        .market_journal_result_save(journal, keys[job_idx],
+                                                    result)
+                    market_data_journal_shared \
+                        .market_journal_write(journal, keys[job_idx], 'done',
+                                              attempts[job_idx], job_time,
+                                              outputs=outputs)
+
+        for job_queue in job_queues:
+            job_queue.put(None)
+        for worker in workers:
+            worker.join()
+
+    finally:
+        for worker in workers:
+            if (worker.is_alive()):
+                worker.terminate()
+
+        market_job_timings_save(costs_path, timings)
+
+    if (failed):
+        errors = [f'{args[job_idx]}: {error}'
+                  for job_idx, error in failed.items()]
+        raise RuntimeError(f'{len(failed)} jobs of {function_name} failed:\n'
+                           + '\n'.join(errors))
+
+    return results
+
+# -----------------------------------------------------------------------------
+
+
+def main():
+    """The main function of the script.
+
+    The main function is used to test the functions in the script.
+
+    :return: None.
+    """
+
+    pass
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    main()
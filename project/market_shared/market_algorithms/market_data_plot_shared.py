@@ -0,0 +1,90 @@
+'''Market data plot module.
+
+The functions in the module prepare the data of the plots of the TAQ and
+ITCH implementations. The series of a day have one value every second
+(22200 values), many more than the pixels of the width of a figure, so the
+series are reduced to the minimum and maximum of every pixel before they are
+plotted. The reduced series draws the same line, and the figures of many
+tickers are rendered faster in the workers of the market_parallel_starmap
+function.
+
+This script requires the following modules:
+    * numpy
+
+The module contains the following functions:
+    * market_plot_decimate - reduces a series to the resolution of a figure.
+    * main - the main function of the script.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+
+
+def market_plot_decimate(time, values, width=1600):
+    """Reduces a series to the resolution of a figure.
+
+    The series is divided in blocks of consecutive values, one for every
+    pixel of the width of the figure, and only the minimum and maximum of
+    every block are kept in their original order. The first and last values
+    are always kept. The NaN values are not used as minimum or maximum, and
+    a block with only NaN values keeps a NaN value, so the gaps of the series
+    are also drawn.
+
+    :param time: array with the time of the values.
+    :param values: array with the values of the series.
+    :param width: int with the number of pixels of the width of the figure
+     (default 1600, a 16 inches figure with 100 dpi).
+    :return: tuple -- The function returns a tuple with the arrays of the
+     time and the values of the reduced series.
+    """
+
+    time = np.asarray(time)
+    values = np.asarray(values, dtype=float)
+
+    if (len(values) <= 2 * width):
+        return time, values
+
+    block = -(-len(values) // width)
+    blocks = -(-len(values) // block)
+    padding = blocks * block - len(values)
+
+    # The NaN values are replaced to not be the minimum or maximum of the
+    # blocks
+    low = np.concatenate((np.where(np.isnan(values), np.inf, values),
+                          np.full(padding, np.inf))).reshape(blocks, block)
+    high = np.concatenate((np.where(np.isnan(values), -np.inf, values),
+                           np.full(padding, -np.inf))).reshape(blocks, block)
+
+    start = np.arange(blocks) * block
+    index = np.unique(np.concatenate((start + np.argmin(low, axis=1),
+                                      start + np.argmax(high, axis=1),
+                                      [0, len(values) - 1])))
+
+    return time[index], values[index]
+
+# -----------------------------------------------------------------------------
+
+
+def main():
+    """The main function of the script.
+
+    The main function is used to test the functions in the script.
+
+    :return: None.
+    """
+
+    pass
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+'''Market data pyramid module.
+
+The functions in the module resample the midpoint prices and trade signs of
+the TAQ and ITCH implementations in several resolutions. The TAQ data uses
+seconds and the ITCH data milliseconds, so the functions work in the time
+units of the data.
+
+This script requires the following modules:
+    * numpy
+
+The module contains the following functions:
+    * market_pyramid_levels - resamples the data in several resolutions.
+    * main - the main function of the script.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+
+
+def market_pyramid_levels(mid_time, midpoint, trade_time, trade_sign,
+                          time_start, time_end, resolutions):
+    """Resamples the midpoint price and the trade signs in several resolutions.
+
+    The finest resolution is computed from the events and every coarser
+    resolution is computed from the previous one, without reading the events
+    again. As in the second data, the midpoint price of the interval idx is
+    the last midpoint price before the end of the interval (the first
+    midpoint price for the intervals before it), and the trade signs of the
+    interval idx are the trades of the next interval. Every resolution must
+    be a multiple of the previous one.
+
+    :param mid_time: numpy array with the times of the midpoint prices.
+    :param midpoint: numpy array with the midpoint prices.
+    :param trade_time: numpy array with the times of the trades.
+    :param trade_sign: numpy array with the signs of the trades.
+    :param time_start: int with the start of the market time.
+    :param time_end: int with the end of the market time.
+    :param resolutions: list of ints with the length of the intervals, in the
+     time units of the data.
+    :return: dict -- The function returns a dictionary with a tuple with the
+     midpoint prices and the sums of the trade signs of every resolution.
+    """
+
+    resolutions = sorted(resolutions)
+    res_max = resolutions[-1]
+
+    assert not (time_end - time_start) % res_max
+    for res_idx in range(1, len(resolutions)):
+        assert not resolutions[res_idx] % resolutions[res_idx - 1]
+
+    res = resolutions[0]
+
+    # Midpoint price at the end of every interval. The intervals that end
+    # before the first midpoint price use the first midpoint price, as in
+    # the second data, and not the last one of the day
+    ends = time_start + res * np.arange(1, (time_end - time_start) // res + 1)
+    mid_idx = np.searchsorted(mid_time, ends, side='left') - 1
+    midpoint_r = midpoint[np.maximum(mid_idx, 0)]
+
+    # Sum of the trade signs of every interval. One more interval of the
+    # coarser resolution is kept at the end for the shift of the signs
+    length = (time_end - time_start + res_max) // res
+    trade_pos = (np.asarray(trade_time).astype(np.int64) - time_start) // res
+    condition = (trade_pos >= 0) * (trade_pos < length) > 0
+    sign_sums = np.bincount(trade_pos[condition],
+                            weights=trade_sign[condition], minlength=length)
+
+    levels = {}
+
+    for res_idx, res in enumerate(resolutions):
+
+        # Coarser resolution from the previous one
+        if (res_idx):
+            step = res // resolutions[res_idx - 1]
+            midpoint_r = midpoint_r[step - 1::step]
+            sign_sums = sign_sums.reshape(-1, step).sum(axis=1)
+
+        levels[res] = (midpoint_r,
+                       sign_sums[1:len(midpoint_r) + 1].astype(np.int32))
+
+    return levels
+
+# -----------------------------------------------------------------------------
+
+
+def main():
+    """The main function of the script.
+
+    The main function is used to test the functions in the script.
+
+    :return: None.
+    """
+
+    pass
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    main()
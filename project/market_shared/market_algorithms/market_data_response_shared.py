@@ -0,0 +1,91 @@
+'''Market data response module.
+
+The functions in the module compute the self-response of the TAQ and ITCH
+implementations. Both implementations compute the self-response of a group of
+series with the same FFT kernel, so the results of one source can be compared
+with the results of the other.
+
+This script requires the following modules:
+    * numpy
+
+The module contains the following functions:
+    * market_self_response_rows - computes the self-response of every row of
+     a matrix.
+    * main - the main function of the script.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+
+
+def market_self_response_rows(midpoint, trade_sign, tau):
+    """Computes the self-response of every row of a matrix.
+
+    Every row has the midpoint price and trade signs of a time series (i.e.
+    a ticker in a day). The sum over the time of the trade sign times the
+    midpoint price of every time lag is a cross-correlation, computed for all
+    the rows and time lags with FFTs. The rest of the terms are computed with
+    cumulative sums. When the midpoint price has one row, it is used for all
+    the rows of the trade signs and its FFT is computed once.
+
+    :param midpoint: numpy array (rows x time or 1 x time) with the midpoint
+     prices.
+    :param trade_sign: numpy array (rows x time) with the trade signs.
+    :param tau: int with the number of time lags.
+    :return: tuple -- The function returns a tuple with numpy arrays (rows x
+     tau) with the sum of the self-response and the number of trade signs.
+    """
+
+    length = midpoint.shape[1]
+    lags = np.arange(1, tau + 1)
+
+    # The returns are relative, so the midpoint price of every row is
+    # centered in its mean to keep the precision of the FFT
+    mid_mean = np.mean(midpoint, axis=1, keepdims=True)
+    weights = trade_sign / midpoint
+
+    # Zero padding to avoid the circular correlation
+    size = 2 ** int(np.ceil(np.log2(length + tau)))
+    corr = np.fft.irfft(np.conj(np.fft.rfft(weights, size))
+                        * np.fft.rfft(midpoint - mid_mean, size),
+                        size)[:, lags]
+
+    # Sums of the first values of the rows
+    weights_cum = np.zeros((len(trade_sign), length + 1))
+    weights_cum[:, 1:] = np.cumsum(weights, axis=1)
+    signs_cum = np.zeros((len(trade_sign), length + 1))
+    signs_cum[:, 1:] = np.cumsum(trade_sign, axis=1)
+    num_cum = np.zeros((len(trade_sign), length + 1))
+    num_cum[:, 1:] = np.cumsum(trade_sign != 0, axis=1)
+
+    self_response = corr + mid_mean * weights_cum[:, length - lags] \
+        - signs_cum[:, length - lags]
+
+    return (self_response, num_cum[:, length - lags])
+
+# -----------------------------------------------------------------------------
+
+
+def main():
+    """The main function of the script.
+
+    The main function is used to test the functions in the script.
+
+    :return: None.
+    """
+
+    pass
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,473 @@
+'''Market data service module.
+
+The functions in the module run a local HTTP service that answers queries of
+the self-response function of the TAQ and ITCH implementations. The sums of
+the self-response and the amount of trades of every (source, data, ticker,
+date) are kept in memory, so a query of several tickers, dates and time lags
+only adds the values of the days. The days that are not in memory are
+computed in the background in a pool of workers and saved in a file, so the
+service starts warm the next time. The TAQ days are computed with the
+classifier of the trades of the MARKET_TRADE_SIGNS and MARKET_QUOTE_LAG
+environment variables, and the days of other classifiers are not used.
+
+The service uses the relative paths of the implementations, so it is run
+from the market_algorithms folder:
+
+    python market_data_service_shared.py
+
+and queried with the parameters of the market_service_response function:
+
+    localhost:8765/response?source=taq&tickers=AAPL,MSFT&start=2008-01-02
+     &end=2008-01-04&tau_min=1&tau_max=100
+
+This script requires the following modules:
+    * asyncio
+    * concurrent.futures
+    * glob
+    * json
+    * numpy
+    * os
+    * pickle
+    * sys
+    * urllib.parse
+    * itch_data_analysis_responses_second
+    * market_data_parallel_shared
+    * taq_data_analysis_responses_second
+    * taq_data_tools_responses_second
+
+The module contains the following functions:
+    * market_service_data_name - returns the name of the data of a source.
+    * market_service_cache_path - returns the path of the cache of a source.
+    * market_service_index_load - loads the computed self-responses of the
+     days.
+    * market_service_index_save - saves the computed self-responses of the
+     days.
+    * market_service_dates - returns the business days of a range.
+    * market_service_day_done - stores the self-response of a computed day.
+    * market_service_response - answers a query of the self-response.
+    * market_service_handle - handles a connection of the service.
+    * market_service_run - runs the service.
+    * main - the main function of the script.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import json
+import numpy as np
+import os
+import pickle
+import sys
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'itch_responses_second',
+                             'itch_algorithms'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'taq_responses_second',
+                             'taq_algorithms'))
+
+import itch_data_analysis_responses_second
+import market_data_parallel_shared
+import taq_data_analysis_responses_second
+import taq_data_tools_responses_second
+
+# Functions computing the self-response of a day for every source
+__day_functions__ = {
+    'itch': itch_data_analysis_responses_second
+    .itch_self_response_day_responses_second_data,
+    'taq': taq_data_analysis_responses_second
+    .taq_self_response_day_responses_second_data
+}
+
+# -----------------------------------------------------------------------------
+
+
+def market_service_data_name(source, function_name):
+    """Returns the name of the data of a source.
+
+    The TAQ data has the classifier of the trades in the name
+    (taq_trade_signs_name function), so the days computed with the tick rule
+    and the quote rule are not mixed.
+
+    :param source: string with the source of the data ('taq' or 'itch').
+    :param function_name: name of the data without the classifier.
+    :return: string -- The function returns the name of the data.
+    """
+
+    if (source == 'taq'):
+        return taq_data_tools_responses_second \
+            .taq_trade_signs_name(function_name)
+
+    return function_name
+
+# -----------------------------------------------------------------------------
+
+
+def market_service_cache_path(source):
+    """Returns the path of the file with the computed days of a source.
+
+    :param source: string with the source of the data ('taq' or 'itch').
+    :return: string -- The function returns the path of the file.
+    """
+
+    cache_name = market_service_data_name(source, 'service_days_cache')
+
+    return f'../../{source}_data/{cache_name}.pickle'
+
+# -----------------------------------------------------------------------------
+
+
+def market_service_index_load():
+    """Loads the self-response sums of the days computed before.
+
+    The sums of every day are read from the files saved by the week and batch
+    functions of the implementations and from the cache of the service. Only
+    the TAQ days of the classifier of the trades of the service are read.
+
+    :return: dict -- The function returns a dictionary with the (source,
+     data, ticker, date) keys and a tuple with the self-response sums and the
+     amount of trades.
+    """
+
+    index = {}
+
+    for source in __day_functions__:
+
+        data_name = market_service_data_name(
+            source, f'{source}_self_response_week_responses_second_data')
+        pattern = f'../../{source}_data/responses_second_data_*/{data_name}' \
+            + ('_days/*.pickle' if source == 'itch' else '_days_*/*.pickle')
+
+        for path in glob.glob(pattern):
+
+            # The ticker is the last part of the name of the file
+            ticker = path[:-len('.pickle')].split('_')[-1]
+
+            try:
+                days_data = pickle.load(open(path, 'rb'))
+
+            except (OSError, EOFError, pickle.UnpicklingError):
+                continue
+
+            for date, sums, num in zip(days_data['dates'],
+                                       days_data['self_response'],
+                                       days_data['num']):
+                index[(source, data_name, ticker, date)] = \
+                    (np.asarray(sums), np.asarray(num))
+
+        try:
+            cache = pickle.load(open(market_service_cache_path(source), 'rb'))
+            # The caches without the name of the data in the keys are not used
+            index.update({key: value for key, value in cache.items()
+                          if len(key) == 4 and key[1] == data_name})
+
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass
+
+    return index
+
+# -----------------------------------------------------------------------------
+
+
+def market_service_index_save(index, source):
+    """Saves the self-response sums of the days of a source.
+
+    The days without trades are not saved, so they are computed again when
+    their data is extracted. The file is replaced atomically.
+
+    :param index: dictionary with the (source, data, ticker, date) keys and a
+     tuple with the self-response sums and the amount of trades.
+    :param source: string with the source of the data ('taq' or 'itch').
+    :return: None -- The function saves the data in a file and does not return
+     a value.
+    """
+
+    cache_path = market_service_cache_path(source)
+    source_index = {key: value for key, value in index.items()
+                    if key[0] == source and value[1][0]}
+
+    try:
+        pickle.dump(source_index, open(f'{cache_path}.{os.getpid()}', 'wb'),
+                    protocol=4)
+        os.replace(f'{cache_path}.{os.getpid()}', cache_path)
+
+    except FileNotFoundError:
+        print('No folder to save the service cache')
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def market_service_dates(start, end):
+    """Returns the business days between two dates.
+
+    :param start: string with the first date (i.e. '2008-01-02').
+    :param end: string with the last date (i.e. '2008-01-04').
+    :return: list -- The function returns a list of strings with the dates.
+    """
+
+    days = np.arange(np.datetime64(start), np.datetime64(end) + 1)
+
+    return [str(day) for day in days[np.is_busday(days)]]
+
+# -----------------------------------------------------------------------------
+
+
+def market_service_day_done(state, key, future):
+    """Stores the self-response of a day computed in the pool of workers.
+
+    When there are no more days of the source being computed, the days are
+    saved in the cache.
+
+    :param state: dictionary with the index, the days being computed and the
+     pool of workers of the service.
+    :param key: tuple with the source, data, ticker and date of the day.
+    :param future: future with the result of the day.
+    :return: None -- The function updates the state and does not return a
+     value.
+    """
+
+    del state['pending'][key]
+
+    if (future.cancelled()):
+        return None
+
+    if (future.exception() is not None):
+        print(f'{key} failed: {future.exception()!r}')
+        return None
+
+    sums, num = future.result()
+    state['index'][key] = (np.asarray(sums), np.asarray(num))
+
+    if (not any(pending[0] == key[0] for pending in state['pending'])):
+        market_service_index_save(state['index'], key[0])
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+async def market_service_response(state, query):
+    """Answers a query of the self-response.
+
+    The query has the source ('taq' or 'itch', default 'taq'), the tickers
+    separated by commas, the first and last dates, the first and last time
+    lags (default 1 and 1000) and the wait flag. The days that are not in
+    memory are sent to the pool of workers. With wait=1 the answer waits for
+    them, otherwise the answer uses the days in memory and lists the missing
+    ones.
+
+    :param state: dictionary with the index, the days being computed and the
+     pool of workers of the service.
+    :param query: dictionary with the parameters of the query.
+    :return: dict -- The function returns a dictionary with the self-response
+     of every ticker.
+    """
+
+    source = query.get('source', 'taq').lower()
+    if (source not in __day_functions__):
+        raise ValueError(f'Unknown source {source}')
+
+    tickers = [ticker for ticker in query['tickers'].split(',') if ticker]
+    dates = market_service_dates(query['start'],
+                                 query.get('end', query['start']))
+    tau_min = int(query.get('tau_min', 1))
+    tau_max = int(query.get('tau_max', 1000))
+    if (not 1 <= tau_min <= tau_max):
+        raise ValueError('The time lags must satisfy 1 <= tau_min <= tau_max')
+
+    index = state['index']
+    pending = state['pending']
+    loop = asyncio.get_running_loop()
+
+    data_name = market_service_data_name(
+        source, f'{source}_self_response_week_responses_second_data')
+
+    # Missing days to the pool of workers
+    for ticker in tickers:
+        for date in dates:
+            key = (source, data_name, ticker, date)
+            if (key not in index and key not in pending):
+                pending[key] = loop.run_in_executor(
+                    state['pool'], __day_functions__[source], ticker, date)
+                pending[key].add_done_callback(
+                    lambda future, key=key:
+                    market_service_day_done(state, key, future))
+
+    if (query.get('wait', '0') == '1'):
+        waiting = [pending[(source, data_name, ticker, date)]
+                   for ticker in tickers for date in dates
+                   if (source, data_name, ticker, date) in pending]
+        await asyncio.gather(*waiting, return_exceptions=True)
+        # Let the callbacks store the results
+        await asyncio.sleep(0)
+
+    result = {}
+
+    for ticker in tickers:
+
+        days = [date for date in dates
+                if (source, data_name, ticker, date) in index]
+        sums = np.zeros(tau_max - tau_min + 1)
+        num = np.zeros(tau_max - tau_min + 1)
+
+        for date in days:
+            day_sums, day_num = index[(source, data_name, ticker, date)]
+            sums[:len(day_sums[tau_min - 1:tau_max])] += \
+                day_sums[tau_min - 1:tau_max]
+            num[:len(day_num[tau_min - 1:tau_max])] += \
+                day_num[tau_min - 1:tau_max]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self_response_val = sums / num
+
+        result[ticker] = {
+            'tau': list(range(tau_min, tau_max + 1)),
+            'self_response': [None if np.isnan(val) else float(val)
+                              for val in self_response_val],
+            'num': num.tolist(),
+            'days': [date for date in days
+                     if index[(source, data_name, ticker, date)][1][0]],
+            'no_data': [date for date in days
+                        if not index[(source, data_name, ticker, date)][1][0]],
+            'missing': [date for date in dates if date not in days]
+        }
+
+    return result
+
+# -----------------------------------------------------------------------------
+
+
+async def market_service_handle(state, reader, writer):
+    """Handles a connection of the service.
+
+    Only GET requests are answered. The /response path answers a query of the
+    self-response and the /status path returns the amount of days in memory
+    and being computed.
+
+    :param state: dictionary with the index, the days being computed and the
+     pool of workers of the service.
+    :param reader: stream reader of the connection.
+    :param writer: stream writer of the connection.
+    :return: None -- The function answers the request and does not return a
+     value.
+    """
+
+    try:
+        request = (await reader.readline()).decode('latin-1').split()
+
+        # Headers of the request
+        while ((await reader.readline()) not in (b'\r\n', b'\n', b'')):
+            pass
+
+        if (len(request) < 2 or request[0] != 'GET'):
+            status, body = '405 Method Not Allowed', {'error': 'Only GET'}
+
+        else:
+            url = urlsplit(request[1])
+            query = dict(parse_qsl(url.query))
+
+            if (url.path == '/response'):
+                try:
+                    status = '200 OK'
+                    body = await market_service_response(state, query)
+                except KeyError as e:
+                    status, body = '400 Bad Request', \
+                        {'error': f'Missing parameter {e}'}
+                except ValueError as e:
+                    status, body = '400 Bad Request', {'error': str(e)}
+
+            elif (url.path == '/status'):
+                status = '200 OK'
+                body = {'days': len(state['index']),
+                        'pending': len(state['pending'])}
+
+            else:
+                status, body = '404 Not Found', {'error': 'Unknown path'}
+
+        content = json.dumps(body).encode()
+        writer.write((f'HTTP/1.1 {status}\r\n'
+                      + 'Content-Type: application/json\r\n'
+                      + f'Content-Length: {len(content)}\r\n'
+                      + 'Connection: close\r\n\r\n').encode() + content)
+        await writer.drain()
+
+    except ConnectionError:
+        pass
+
+    finally:
+        writer.close()
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+async def market_service_run(host='localhost', port=8765, processes=None):
+    """Runs the service until it is interrupted.
+
+    :param host: string with the address of the service (default
+     'localhost').
+    :param port: int with the port of the service (default 8765).
+    :param processes: int with the number of workers computing the missing
+     days (default the CPUs of the container).
+    :return: None -- The function runs the service and does not return a
+     value.
+    """
+
+    if (processes is None):
+        processes = market_data_parallel_shared.market_cpu_count()
+
+    state = {
+        'index': market_service_index_load(),
+        'pending': {},
+        'pool': ProcessPoolExecutor(processes)
+    }
+
+    print(f'Service in http://{host}:{port} with {len(state["index"])} days'
+          + f' in memory and {processes} workers')
+
+    try:
+        server = await asyncio.start_server(
+            lambda reader, writer:
+            market_service_handle(state, reader, writer), host, port)
+
+        async with server:
+            await server.serve_forever()
+
+    finally:
+        state['pool'].shutdown(cancel_futures=True)
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def main():
+    """The main function of the script.
+
+    The main function runs the service.
+
+    :return: None.
+    """
+
+    try:
+        asyncio.run(market_service_run())
+
+    except KeyboardInterrupt:
+        pass
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    main()
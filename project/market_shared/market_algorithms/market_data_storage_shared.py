@@ -0,0 +1,262 @@
+'''Market data storage module.
+
+The functions in the module save and load the data and plots of the TAQ and
+ITCH implementations. The implementations use the same paths in every
+backend, and the backend is selected with the MARKET_STORAGE environment
+variable:
+
+    * local - pickle files in the path (default).
+    * mmap - a folder with the numpy arrays of the data in .npy files and
+     the rest of the data in a pickle file. The arrays are loaded as memory
+     maps, so only the parts used are read from the disk.
+    * memory - the data is kept in a dictionary of the process. It is used
+     for tests and single-process runs, where the intermediate data does not
+     need to be written to the disk.
+
+This script requires the following modules:
+    * errno
+    * io
+    * numpy
+    * os
+    * pickle
+    * market_data_parallel_shared
+
+The module contains the following functions:
+    * market_storage_backend - returns the backend of the storage.
+    * market_storage_split - separates the arrays of the data.
+    * market_storage_join - puts back the arrays of the data.
+    * market_storage_save - saves data.
+    * market_storage_load - loads data.
+    * market_storage_exists - checks if data exists.
+    * market_storage_save_plot - saves a figure.
+    * main - the main function of the script.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import errno
+import io
+import numpy as np
+import os
+import pickle
+
+import market_data_parallel_shared
+
+# Data and plots of the memory backend
+__memory__ = {}
+
+# -----------------------------------------------------------------------------
+
+
+def market_storage_backend():
+    """Returns the backend of the storage.
+
+    :return: string -- The function returns 'local', 'mmap' or 'memory'.
+    """
+
+    backend = os.environ.get('MARKET_STORAGE', 'local')
+
+    if (backend not in ('local', 'mmap', 'memory')):
+        raise ValueError(f'Unknown storage backend {backend}')
+
+    return backend
+
+# -----------------------------------------------------------------------------
+
+
+def market_storage_split(data, arrays):
+    """Separates the numpy arrays of the data.
+
+    The arrays inside tuples, lists and dictionaries are replaced by their
+    position in the list of arrays. The arrays of objects stay in the data.
+
+    :param data: data to be saved. The data can be of different types.
+    :param arrays: list where the arrays are appended.
+    :return: The function returns the data without the arrays.
+    """
+
+    if (isinstance(data, np.ndarray) and data.dtype != object):
+        arrays.append(data)
+        return ('__array__', len(arrays) - 1)
+
+    if (isinstance(data, (tuple, list))):
+        return type(data)(market_storage_split(val, arrays) for val in data)
+
+    if (isinstance(data, dict)):
+        return {key: market_storage_split(val, arrays)
+                for key, val in data.items()}
+
+    return data
+
+# -----------------------------------------------------------------------------
+
+
+def market_storage_join(data, folder):
+    """Puts back the numpy arrays of the data.
+
+    :param data: data without the arrays.
+    :param folder: string with the folder of the .npy files.
+    :return: The function returns the data with the arrays as memory maps.
+    """
+
+    if (isinstance(data, tuple) and len(data) == 2
+            and data[0] == '__array__'):
+        return np.load(os.path.join(folder, f'{data[1]}.npy'), mmap_mode='r')
+
+    if (isinstance(data, (tuple, list))):
+        return type(data)(market_storage_join(val, folder) for val in data)
+
+    if (isinstance(data, dict)):
+        return {key: market_storage_join(val, folder)
+                for key, val in data.items()}
+
+    return data
+
+# -----------------------------------------------------------------------------
+
+
+def market_storage_save(path, data):
+    """Saves data in the storage.
+
+    :param path: string with the path of the data
+     (i.e. '../../taq_data/.../taq_midpoint_second_data_20080102_AAPL.pickle').
+    :param data: data to be saved. The data can be of different types.
+    :return: None -- The function saves the data and does not return a value.
+    """
+
+    backend = market_storage_backend()
+    # Paths saved by the current job of a worker of the pool
+    market_data_parallel_shared.__outputs__.append(path)
+
+    if (backend == 'memory'):
+        __memory__[os.path.abspath(path)] = data
+        return None
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    if (backend == 'mmap'):
+
+        folder = f'{path}.npd'
+        os.makedirs(folder, exist_ok=True)
+
+        arrays = []
+        skeleton = market_storage_split(data, arrays)
+        for array_idx, array in enumerate(arrays):
+            np.save(os.path.join(folder, f'{array_idx}.npy'), array)
+        pickle.dump(skeleton, open(os.path.join(folder, 'data.pickle'), 'wb'))
+
+    else:
+        pickle.dump(data, open(path, 'wb'))
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def market_storage_load(path):
+    """Loads data from the storage.
+
+    With the mmap backend, the data saved in a pickle file is also loaded.
+    With the local backend, the content read in advance by the workers of the
+    market_parallel_starmap function is used when it exists.
+
+    :param path: string with the path of the data
+     (i.e. '../../taq_data/.../taq_midpoint_second_data_20080102_AAPL.pickle').
+    :return: The function returns the data (FileNotFoundError is raised if
+     the data does not exist).
+    """
+
+    backend = market_storage_backend()
+
+    if (backend == 'memory'):
+
+        try:
+            return __memory__[os.path.abspath(path)]
+
+        except KeyError:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT),
+                                    path) from None
+
+    if (backend == 'mmap' and os.path.isdir(f'{path}.npd')):
+
+        folder = f'{path}.npd'
+        skeleton = pickle.load(open(os.path.join(folder, 'data.pickle'), 'rb'))
+
+        return market_storage_join(skeleton, folder)
+
+    data = market_data_parallel_shared.market_prefetched(path)
+
+    if (data is not None):
+        return pickle.loads(data)
+
+    return pickle.load(open(path, 'rb'))
+
+# -----------------------------------------------------------------------------
+
+
+def market_storage_exists(path):
+    """Checks if data exists in the storage.
+
+    :param path: string with the path of the data.
+    :return: bool -- The function returns True if the data exists.
+    """
+
+    if (market_storage_backend() == 'memory'):
+        return os.path.abspath(path) in __memory__
+
+    return os.path.isfile(path) or os.path.isdir(f'{path}.npd')
+
+# -----------------------------------------------------------------------------
+
+
+def market_storage_save_plot(path, figure):
+    """Saves a figure in the storage.
+
+    With the memory backend the content of the image is kept, otherwise the
+    figure is saved in the path.
+
+    :param path: string with the path of the figure. The extension is the
+     format of the image (i.e. '../../plots/.../plot_2008_AAPLi.png').
+    :param figure: figure object that is going to be save.
+    :return: None -- The function saves the figure and does not return a
+     value.
+    """
+
+    market_data_parallel_shared.__outputs__.append(path)
+
+    if (market_storage_backend() == 'memory'):
+
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format=os.path.splitext(path)[1][1:])
+        __memory__[os.path.abspath(path)] = buffer.getvalue()
+
+        return None
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    figure.savefig(path)
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def main():
+    """The main function of the script.
+
+    The main function is used to test the functions in the script.
+
+    :return: None.
+    """
+
+    pass
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    main()
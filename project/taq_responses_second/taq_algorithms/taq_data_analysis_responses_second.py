@@ -6,21 +6,43 @@ computed for a week.
 
 This script requires the following modules:
     * itertools.product
-    * multiprocessing
     * numpy
-    * pandas
-    * pickle
+    * os
+    * sys
+    * market_data_codec_shared
+    * market_data_parallel_shared
+    * market_data_response_shared
+    * market_data_pyramid_shared
+    * market_data_storage_shared
     * taq_data_tools_responses_second
 
 The module contains the following functions:
     * taq_midpoint_trade_data - computes the midpoint price of every trade.
     * taq_midpoint_second_data - computes the midpoint price of every second.
     * taq_trade_signs_trade_data - computes the trade signs of every trade.
+    * taq_trade_signs_quote_data - computes the trade signs of every trade
+     with the quotes.
+    * taq_trade_signs_data - computes the trade signs of every trade with the
+     classifier of the run.
     * taq_trade_signs_second_data - computes the trade signs of every second.
+    * taq_pyramid_data - computes the midpoint price and trade signs in
+     several resolutions.
     * taq_self_response_day_responses_second_data - computes the self response
      of a day.
     * taq_self_response_year_responses_second_data - computes the self response
      of a year.
+    * taq_self_response_day_responses_trade_data - computes the self response
+     of a day in trade time.
+    * taq_self_response_week_responses_trade_data - computes the self response
+     of a week in trade time.
+    * taq_self_response_day_responses_pyramid_data - computes the self
+     response of a day in a resolution of the pyramid.
+    * taq_self_response_week_responses_pyramid_data - computes the self
+     response of a week in a resolution of the pyramid.
+    * taq_self_response_batch_responses_second_data - computes the self
+     response of a week for a batch of tickers.
+    * taq_self_response_week_errors_responses_second_data - computes the
+     errors of the self response of a week.
     * main - the main function of the script.
 
 .. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
@@ -30,12 +52,18 @@ The module contains the following functions:
 # Modules
 
 from itertools import product as iprod
-import multiprocessing as mp
 import numpy as np
 import os
-import pandas as pd
-import pickle
+import sys
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'market_shared', 'market_algorithms'))
+
+import market_data_codec_shared
+import market_data_parallel_shared
+import market_data_response_shared
+import market_data_pyramid_shared
+import market_data_storage_shared
 import taq_data_tools_responses_second
 
 __tau__ = 1000
@@ -57,18 +85,12 @@ def taq_midpoint_trade_data(ticker, date):
     :return: tuple -- The function returns a tuple with numpy arrays.
     """
 
-    date_sep = date.split('-')
-    year = date_sep[0]
-    month = date_sep[1]
-    day = date_sep[2]
-
     try:
         # Load data
         # TAQ data gives directly the quotes data in every second that there is
         # a change in the quotes
-        data_quotes_trade = pd.read_hdf(
-            f'../../taq_data/hdf5_dayly_data_{year}/taq_{ticker}_quotes_'
-            + f'{date}.h5', key='/quotes')
+        data_quotes_trade = taq_data_tools_responses_second \
+            .taq_hdf5_data_load(ticker, date, 'quotes')
 
         time_q = data_quotes_trade['Time'].to_numpy()
         bid_q = data_quotes_trade['Bid'].to_numpy()
@@ -153,26 +175,13 @@ def taq_midpoint_second_data(ticker, date):
 
         assert not np.sum(midpoint == 0)
 
-        # Saving data
-        if (not os.path.isdir(f'../../taq_data/responses_second_data_{year}'
-                              + f'_{function_name}/')):
-
-            try:
-                os.mkdir(f'../../taq_data/responses_second_data_{year}/'
-                         + f'{function_name}/')
-                print('Folder to save data created')
-
-            except FileExistsError:
-                print('Folder exists. The folder was not created')
-
-        pickle.dump(midpoint / 10000,
-                    open(f'../../taq_data/responses_second_data_{year}/'
-                         + f'{function_name}/{function_name}_midpoint_'
-                         + f'{year}{month}{day}_{ticker}.pickle', 'wb'))
-        pickle.dump(full_time,
-                    open(f'../../taq_data/responses_second_data_{year}/'
-                         + f'{function_name}/{function_name}_time.pickle',
-                         'wb'))
+        # Saving data. The midpoint price is saved in half cent ticks with
+        # an implicit time axis
+        market_data_storage_shared.market_storage_save(
+            f'../../taq_data/responses_second_data_{year}/{function_name}/'
+            + f'{function_name}_midpoint_{year}{month}{day}_{ticker}.pickle',
+            market_data_codec_shared
+            .market_encode_prices(full_time, midpoint / 10000, 0.005))
 
         print('Data saved')
         print()
@@ -204,16 +213,10 @@ def taq_trade_signs_trade_data(ticker, date):
     :return: tuple -- The function returns a tuple with numpy arrays.
     """
 
-    date_sep = date.split('-')
-    year = date_sep[0]
-    month = date_sep[1]
-    day = date_sep[2]
-
     try:
         # Load data
-        data_trades_trade = pd.read_hdf(
-            f'../../taq_data/hdf5_dayly_data_{year}/taq_{ticker}_trades_'
-            + f'{date}.h5', key='/trades')
+        data_trades_trade = taq_data_tools_responses_second \
+            .taq_hdf5_data_load(ticker, date, 'trades')
 
         time_t = data_trades_trade['Time'].to_numpy()
         ask_t = data_trades_trade['Ask'].to_numpy()
@@ -252,10 +255,87 @@ def taq_trade_signs_trade_data(ticker, date):
 # ----------------------------------------------------------------------------
 
 
+def taq_trade_signs_quote_data(ticker, date, lag=0):
+    """Computes the trade signs of every trade with the quotes.
+
+    Alternative to the taq_trade_signs_trade_data function. Every trade is
+    compared with the midpoint price of the quotes before the trade (quote
+    rule), and the trades at the midpoint price are classified with the
+    price changes between consecutive trades (tick rule). The function
+    returns the same arrays of the taq_trade_signs_trade_data function.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :param lag: int with the seconds the quotes are delayed respect to the
+     trades (default 0).
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    try:
+        # Load data
+        data_trades_trade = taq_data_tools_responses_second \
+            .taq_hdf5_data_load(ticker, date, 'trades')
+
+        time_t = data_trades_trade['Time'].to_numpy()
+        ask_t = data_trades_trade['Ask'].to_numpy()
+
+        # All the trades must have a price different to zero
+        assert not np.sum(ask_t == 0)
+
+        # Midpoint price of the quotes. The function returns None when there
+        # is no data, and the TypeError is handled by the callers
+        time_q, midpoint_q = taq_midpoint_trade_data(ticker, date)
+
+        identified_trades = taq_data_tools_responses_second \
+            .taq_quote_rule_signs(time_t, ask_t, time_q, midpoint_q, lag)
+
+        # All the identified trades must be different to zero
+        assert not np.sum(identified_trades == 0)
+
+        return (time_t, ask_t, identified_trades)
+
+    except FileNotFoundError as e:
+        print('No data')
+        print(e)
+        print()
+        return None
+
+# ----------------------------------------------------------------------------
+
+
+def taq_trade_signs_data(ticker, date):
+    """Computes the trade signs of every trade with the classifier of the run.
+
+    The classifier is the one of the MARKET_TRADE_SIGNS environment variable
+    ('tick' for the taq_trade_signs_trade_data function or 'quote' for the
+    taq_trade_signs_quote_data function), and the lag of the quotes the one
+    of the MARKET_QUOTE_LAG environment variable. The data computed with the
+    trade signs is saved with the name of the taq_trade_signs_name function.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    classifier, lag = taq_data_tools_responses_second \
+        .taq_trade_signs_method()
+
+    if (classifier == 'quote'):
+        return taq_trade_signs_quote_data(ticker, date, lag)
+
+    return taq_trade_signs_trade_data(ticker, date)
+
+# ----------------------------------------------------------------------------
+
+
 def taq_trade_signs_second_data(ticker, date):
     """Computes the trade signs of every second.
 
-    Using the taq_trade_signs_trade_data function computes the trade signs of
+    Using the taq_trade_signs_data function computes the trade signs of
     every second.
     The trade signs are computed using Eq. 2 of the
     `paper
@@ -288,12 +368,12 @@ def taq_trade_signs_second_data(ticker, date):
     try:
         # Calculate the values of the trade signs for all the events
         (time_t, ask_t,
-         identified_trades) = taq_trade_signs_trade_data(ticker, date)
+         identified_trades) = taq_trade_signs_data(ticker, date)
 
         # Reproducing the paper time values. In her results the time interval
         # for the trade signs is [34801, 57000]
         full_time = np.array(range(34801, 57001))
-        trade_signs = 0. * full_time
+        trade_signs = np.zeros(len(full_time), dtype=np.int8)
         price_signs = 0. * full_time
 
         # Implementation of Eq. 2. Trade sign in each second
@@ -307,11 +387,16 @@ def taq_trade_signs_second_data(ticker, date):
             if (np.sum(condition)):
                 price_signs[t_idx] = ask_t[condition][-1]
 
-        # Saving data
+        # Saving data. The trade prices are saved in the TAQ price units and
+        # the trade signs as int8 values, both with an implicit time axis
         taq_data_tools_responses_second \
-            .taq_save_data(function_name,
-                           (full_time, price_signs, trade_signs), ticker,
-                           ticker, year, month, day)
+            .taq_save_data(taq_data_tools_responses_second
+                           .taq_trade_signs_name(function_name),
+                           (market_data_codec_shared
+                            .market_encode_prices(full_time, price_signs, 1),
+                            market_data_codec_shared
+                            .market_encode_signs(full_time, trade_signs)),
+                           ticker, ticker, year, month, day)
 
         return (full_time, price_signs, trade_signs)
 
@@ -340,16 +425,21 @@ def taq_self_response_day_responses_second_data(ticker, date):
     month = date_sep[1]
     day = date_sep[2]
 
+    signs_name = taq_data_tools_responses_second \
+        .taq_trade_signs_name('taq_trade_signs_second_data')
+
     try:
         # Load data
-        midpoint = pickle.load(open(
+        _, midpoint = market_data_codec_shared.market_decode_prices(
+            market_data_storage_shared.market_storage_load(
                 f'../../taq_data/responses_second_data_{year}/taq_midpoint'
                 + f'_second_data/taq_midpoint_second_data_midpoint'
-                + f'_{year}{month}{day}_{ticker}.pickle', 'rb'))
-        _, _, trade_sign = pickle.load(open(
-                f'../../taq_data/responses_second_data_{year}/taq_trade_signs'
-                + f'_second_data/taq_trade_signs_second_data'
-                + f'_{year}{month}{day}_{ticker}.pickle', 'rb'))
+                + f'_{year}{month}{day}_{ticker}.pickle'))
+        _, signs_data = market_data_storage_shared.market_storage_load(
+                f'../../taq_data/responses_second_data_{year}/{signs_name}/'
+                + f'{signs_name}_{year}{month}{day}_{ticker}.pickle')
+        _, trade_sign = market_data_codec_shared \
+            .market_decode_signs(signs_data)
 
         assert len(midpoint) == len(trade_sign)
 
@@ -409,26 +499,149 @@ def taq_self_response_week_responses_second_data(ticker, dates):
     taq_data_tools_responses_second \
         .taq_function_header_print_data(function_name, ticker, ticker, year,
                                         '', '')
+    data_name = taq_data_tools_responses_second \
+        .taq_trade_signs_name(function_name)
 
     self_values = []
     args_prod = iprod([ticker], dates)
 
     # Parallel computation of the self-responses. Every result is appended to
     # a list
-    with mp.Pool(processes=mp.cpu_count()) as pool:
-        self_values.append(pool.starmap(
-            taq_self_response_day_responses_second_data, args_prod))
+    self_values.append(market_data_parallel_shared.market_parallel_starmap(
+        taq_self_response_day_responses_second_data, args_prod,
+        taq_data_tools_responses_second.taq_job_input_paths,
+        '../../taq_data/job_costs.pickle',
+        job_name=taq_data_tools_responses_second.taq_trade_signs_name(
+            taq_self_response_day_responses_second_data.__name__)))
 
     # To obtain the total self-response, I sum over all the self-response
     # values and all the amount of trades (averaging values)
     self_v_final = np.sum(self_values[0], axis=0)
 
+    # The self-response sums and amount of trades of every day are saved to
+    # compute the errors
+    self_v_days = np.array(self_values[0])
+    taq_data_tools_responses_second \
+        .taq_save_data(f"{data_name}_days_{dates[0].split('-')[1]}",
+                       {'dates': dates, 'self_response': self_v_days[:, 0],
+                        'num': self_v_days[:, 1]},
+                       ticker, ticker, year, '', '')
+
+    self_response_val = self_v_final[0] / self_v_final[1]
+    self_response_avg = self_v_final[1]
+
+    # Saving data
+    taq_data_tools_responses_second \
+        .taq_save_data(f"{data_name}_{dates[0].split('-')[1]}",
+                       self_response_val, ticker, ticker, year, '', '')
+
+    return (self_response_val, self_response_avg)
+
+# ----------------------------------------------------------------------------
+
+
+def taq_self_response_day_responses_trade_data(ticker, date):
+    """Computes the self-response of a day in trade time.
+
+    The time lags (:math:`\tau`) are counted in trades instead of seconds.
+    For every trade, the midpoint price before the trade and the midpoint
+    price before the trade :math:`\tau` trades later are found with a
+    search in the times of the quotes, so the time and memory depend on the
+    number of trades and not on the number of seconds.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    try:
+        # Load data
+        time_q, midpoint_q = taq_midpoint_trade_data(ticker, date)
+        time_t, _, trade_sign = taq_trade_signs_data(ticker, date)
+
+        # 34800 s = 9h40 - 57000 s = 15h50
+        market_time = (time_t >= 34800) * (time_t < 57000) > 0
+        time_t = time_t[market_time]
+        trade_sign = trade_sign[market_time]
+
+        # Midpoint price before every trade. TAQ times are in seconds, so the
+        # quotes of the second of the trade are not used
+        mid_idx = np.searchsorted(time_q, time_t, side='left') - 1
+        trade_sign = trade_sign[mid_idx >= 0]
+        midpoint = midpoint_q[mid_idx[mid_idx >= 0]]
+
+        # Array of the average of each tau. 10^3 trades are used
+        self_response_tau = np.zeros(__tau__)
+        num = np.zeros(__tau__)
+
+        # Depending on the tau value
+        for tau_idx in range(__tau__):
+
+            trade_sign_tau = trade_sign[:-tau_idx - 1]
+            num[tau_idx] = len(trade_sign_tau)
+
+            # Midpoint price returns after tau_idx + 1 trades
+            log_return_trade = (midpoint[tau_idx + 1:]
+                                - midpoint[:-tau_idx - 1]) \
+                / midpoint[:-tau_idx - 1]
+
+            self_response_tau[tau_idx] = np.sum(log_return_trade
+                                                * trade_sign_tau)
+
+        return (self_response_tau, num)
+
+    # The trade functions return None when there is no data
+    except TypeError:
+        zeros = np.zeros(__tau__)
+        return (zeros, zeros)
+
+# ----------------------------------------------------------------------------
+
+
+def taq_self_response_week_responses_trade_data(ticker, dates):
+    """Computes the self-response of a week in trade time.
+
+    Using the taq_self_response_day_responses_trade_data function computes the
+    self-response function in trade time for a week.
+
+    :param ticker: string of the abbreviation of stock to be analized
+     (i.e. 'AAPL').
+    :param dates: list of strings with the date of the data to be extracted
+     (i.e. ['2008-01-02', '2008-01-03]).
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    year = dates[0].split('-')[0]
+
+    function_name = taq_self_response_week_responses_trade_data.__name__
+    taq_data_tools_responses_second \
+        .taq_function_header_print_data(function_name, ticker, ticker, year,
+                                        '', '')
+    data_name = taq_data_tools_responses_second \
+        .taq_trade_signs_name(function_name)
+
+    args_prod = iprod([ticker], dates)
+
+    # Parallel computation of the self-responses
+    self_values = market_data_parallel_shared.market_parallel_starmap(
+        taq_self_response_day_responses_trade_data, args_prod,
+        taq_data_tools_responses_second.taq_job_input_paths,
+        '../../taq_data/job_costs.pickle',
+        job_name=taq_data_tools_responses_second.taq_trade_signs_name(
+            taq_self_response_day_responses_trade_data.__name__))
+
+    # To obtain the total self-response, I sum over all the self-response
+    # values and all the amount of trades (averaging values)
+    self_v_final = np.sum(self_values, axis=0)
+
     self_response_val = self_v_final[0] / self_v_final[1]
     self_response_avg = self_v_final[1]
 
     # Saving data
     taq_data_tools_responses_second \
-        .taq_save_data(f"{function_name}_{dates[0].split('-')[1]}",
+        .taq_save_data(f"{data_name}_{dates[0].split('-')[1]}",
                        self_response_val, ticker, ticker, year, '', '')
 
     return (self_response_val, self_response_avg)
@@ -436,6 +649,363 @@ def taq_self_response_week_responses_second_data(ticker, dates):
 # ----------------------------------------------------------------------------
 
 
+def taq_pyramid_data(ticker, date, resolutions=(1, 5, 60)):
+    """Resamples the midpoint price and trade signs in several resolutions.
+
+    Using the taq_midpoint_trade_data and taq_trade_signs_data functions,
+    computes in one pass the midpoint price and the sum of the trade signs of
+    a day for every resolution. The TAQ times are in seconds, so the finest
+    resolution is one second, which has the same values of the second data.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :param resolutions: list of ints with the length in seconds of the
+     intervals (default (1, 5, 60)). Every resolution must be a multiple of
+     the previous one.
+    :return: dict -- The function returns a dictionary with a tuple of numpy
+     arrays for every resolution.
+    """
+
+    date_sep = date.split('-')
+
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
+
+    function_name = taq_pyramid_data.__name__
+    taq_data_tools_responses_second \
+        .taq_function_header_print_data(function_name, ticker, ticker, year,
+                                        month, day)
+
+    try:
+        # Load data
+        time_q, midpoint = taq_midpoint_trade_data(ticker, date)
+        time_t, _, trade_sign = taq_trade_signs_data(ticker, date)
+
+        # 34800 s = 9h40 - 57000 s = 15h50
+        levels = market_data_pyramid_shared \
+            .market_pyramid_levels(time_q, midpoint, time_t, trade_sign, 34800,
+                                   57000, resolutions)
+
+        # Saving data
+        taq_data_tools_responses_second \
+            .taq_save_data(taq_data_tools_responses_second
+                           .taq_trade_signs_name(function_name), levels,
+                           ticker, ticker, year, month, day)
+
+        return levels
+
+    except TypeError:
+        return None
+
+# ----------------------------------------------------------------------------
+
+
+def taq_self_response_day_responses_pyramid_data(ticker, date, resolution):
+    """Computes the self-response of a day in a resolution of the pyramid.
+
+    Using the midpoint price and trade signs saved by the taq_pyramid_data
+    function computes the self-response during different time lags
+    (:math:`\tau`) for a day. The time lags are multiples of the resolution.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :param resolution: int with the length in seconds of the intervals. It
+     must be one of the resolutions of the pyramid.
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    date_sep = date.split('-')
+
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
+
+    pyramid_name = taq_data_tools_responses_second \
+        .taq_trade_signs_name('taq_pyramid_data')
+
+    try:
+        # Load data
+        levels = market_data_storage_shared.market_storage_load(
+            f'../../taq_data/responses_second_data_{year}/{pyramid_name}/'
+            + f'{pyramid_name}_{year}{month}{day}_{ticker}.pickle')
+
+        midpoint, sign_sums = levels[resolution]
+        trade_sign = np.sign(sign_sums)
+
+        # Array of the average of each tau
+        self_response_tau = np.zeros(__tau__)
+        num = np.zeros(__tau__)
+
+        # Depending on the tau value
+        for tau_idx in range(__tau__):
+
+            trade_sign_tau = trade_sign[:-tau_idx - 1]
+            trade_sign_no_0_len = len(trade_sign_tau[trade_sign_tau != 0])
+            num[tau_idx] = trade_sign_no_0_len
+
+            # Midpoint price returns
+            log_return = (midpoint[tau_idx + 1:] - midpoint[:-tau_idx - 1]) \
+                / midpoint[:-tau_idx - 1]
+
+            # Obtain the self response value
+            if (trade_sign_no_0_len != 0):
+                product = log_return * trade_sign_tau
+                self_response_tau[tau_idx] = np.sum(product)
+
+        return (self_response_tau, num)
+
+    except FileNotFoundError as e:
+        print('No data')
+        print(e)
+        print()
+        zeros = np.zeros(__tau__)
+        return (zeros, zeros)
+
+# ----------------------------------------------------------------------------
+
+
+def taq_self_response_week_responses_pyramid_data(ticker, dates, resolution):
+    """Computes the self-response of a week in a resolution of the pyramid.
+
+    Using the taq_self_response_day_responses_pyramid_data function computes
+    the self-response function for a week.
+
+    :param ticker: string of the abbreviation of stock to be analized
+     (i.e. 'AAPL').
+    :param dates: list of strings with the date of the data to be extracted
+     (i.e. ['2008-01-02', '2008-01-03]).
+    :param resolution: int with the length in seconds of the intervals.
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    year = dates[0].split('-')[0]
+
+    function_name = taq_self_response_week_responses_pyramid_data.__name__
+    taq_data_tools_responses_second \
+        .taq_function_header_print_data(function_name, ticker, ticker, year,
+                                        '', '')
+    data_name = taq_data_tools_responses_second \
+        .taq_trade_signs_name(function_name)
+
+    args_prod = iprod([ticker], dates, [resolution])
+
+    # Parallel computation of the self-responses
+    self_values = market_data_parallel_shared.market_parallel_starmap(
+        taq_self_response_day_responses_pyramid_data, args_prod,
+        taq_data_tools_responses_second.taq_job_input_paths,
+        '../../taq_data/job_costs.pickle',
+        job_name=taq_data_tools_responses_second.taq_trade_signs_name(
+            taq_self_response_day_responses_pyramid_data.__name__))
+
+    # To obtain the total self-response, I sum over all the self-response
+    # values and all the amount of trades (averaging values)
+    self_v_final = np.sum(self_values, axis=0)
+
+    self_response_val = self_v_final[0] / self_v_final[1]
+    self_response_avg = self_v_final[1]
+
+    # Saving data
+    taq_data_tools_responses_second \
+        .taq_save_data(f'{data_name}_{resolution}',
+                       self_response_val, ticker, ticker, year, '', '')
+
+    return (self_response_val, self_response_avg)
+
+# ----------------------------------------------------------------------------
+
+
+def taq_self_response_batch_responses_second_data(tickers, dates):
+    """Computes the self-response of a week for a batch of tickers.
+
+    The second data of every ticker and day is stacked in the rows of a
+    matrix, and the self-responses of all the rows are computed together with
+    the market_self_response_rows function. The days of every ticker are added
+    as in the taq_self_response_week_responses_second_data function, and the
+    results are saved in the same files.
+
+    :param tickers: list of the string abbreviation of the stocks to be
+     analized (i.e. ['AAPL', 'MSFT']).
+    :param dates: list of strings with the date of the data to be extracted
+     (i.e. ['2008-01-02', '2008-01-03]).
+    :return: dict -- The function returns a dictionary with a tuple of numpy
+     arrays for every ticker.
+    """
+
+    year = dates[0].split('-')[0]
+
+    function_name = taq_self_response_batch_responses_second_data.__name__
+    week_name = taq_data_tools_responses_second.taq_trade_signs_name(
+        taq_self_response_week_responses_second_data.__name__)
+    signs_name = taq_data_tools_responses_second \
+        .taq_trade_signs_name('taq_trade_signs_second_data')
+
+    self_values = {}
+
+    # Groups of tickers to keep the memory used by the FFTs small
+    batch = max(1, 256 // len(dates))
+
+    for t_idx in range(0, len(tickers), batch):
+
+        tickers_batch = tickers[t_idx:t_idx + batch]
+
+        # The rows without data do not add to the self-response
+        midpoint = np.ones((len(tickers_batch) * len(dates), 22200))
+        trade_sign = np.zeros((len(tickers_batch) * len(dates), 22200),
+                              dtype=np.int8)
+
+        for row, (ticker, date) in enumerate(iprod(tickers_batch, dates)):
+
+            date_sep = date.split('-')
+            month = date_sep[1]
+            day = date_sep[2]
+
+            try:
+                # Load data
+                _, midpoint_d = market_data_codec_shared \
+                    .market_decode_prices(
+                        market_data_storage_shared.market_storage_load(
+                            f'../../taq_data/responses_second_data_{year}/taq'
+                            + f'_midpoint_second_data/taq_midpoint_second_data'
+                            + f'_midpoint_{year}{month}{day}_{ticker}.pickle'))
+                _, signs_data = market_data_storage_shared.market_storage_load(
+                    f'../../taq_data/responses_second_data_{year}/'
+                    + f'{signs_name}/{signs_name}_{year}{month}{day}'
+                    + f'_{ticker}.pickle')
+                _, trade_sign_d = market_data_codec_shared \
+                    .market_decode_signs(signs_data)
+                assert len(midpoint_d) == len(trade_sign_d)
+
+                midpoint[row] = midpoint_d
+                trade_sign[row] = trade_sign_d
+
+            except FileNotFoundError as e:
+                print('No data')
+                print(e)
+                print()
+
+        self_response, num = market_data_response_shared \
+            .market_self_response_rows(midpoint, trade_sign, __tau__)
+
+        self_response = self_response.reshape(len(tickers_batch),
+                                              len(dates), __tau__)
+        num = num.reshape(len(tickers_batch), len(dates), __tau__)
+
+        for ticker, self_d, num_d in zip(tickers_batch, self_response, num):
+
+            # The self-response sums and amount of trades of every day are
+            # saved to compute the errors
+            taq_data_tools_responses_second \
+                .taq_save_data(f"{week_name}_days_{dates[0].split('-')[1]}",
+                               {'dates': dates, 'self_response': self_d,
+                                'num': num_d},
+                               ticker, ticker, year, '', '')
+
+        # To obtain the total self-response, I sum over all the self-response
+        # values and all the amount of trades of the days (averaging values)
+        self_response = np.sum(self_response, axis=1)
+        num = np.sum(num, axis=1)
+
+        for ticker, self_v, num_v in zip(tickers_batch, self_response, num):
+
+            taq_data_tools_responses_second \
+                .taq_function_header_print_data(function_name, ticker, ticker,
+                                                year, '', '')
+
+            self_response_val = self_v / num_v
+
+            # Saving data
+            taq_data_tools_responses_second \
+                .taq_save_data(f"{week_name}_{dates[0].split('-')[1]}",
+                               self_response_val, ticker, ticker, year, '',
+                               '')
+
+            self_values[ticker] = (self_response_val, num_v)
+
+    return self_values
+
+# ----------------------------------------------------------------------------
+
+
+def taq_self_response_week_errors_responses_second_data(ticker, dates,
+                                                        replicates=1000):
+    """Computes the errors of the self-response of a week.
+
+    Using the self-response sums and amount of trades of every day saved by
+    the taq_self_response_week_responses_second_data function, computes the
+    errors with a day block bootstrap and a leave-one-day-out jackknife. The
+    days of every replicate are the weights of a row of a matrix, so all the
+    replicates are computed with matrix products.
+
+    :param ticker: string of the abbreviation of stock to be analized
+     (i.e. 'AAPL').
+    :param dates: list of strings with the date of the data to be extracted
+     (i.e. ['2008-01-02', '2008-01-03]).
+    :param replicates: int with the number of bootstrap replicates
+     (default 1000).
+    :return: tuple -- The function returns a tuple with numpy arrays.
+    """
+
+    year = dates[0].split('-')[0]
+    month = dates[0].split('-')[1]
+
+    function_name = \
+        taq_self_response_week_errors_responses_second_data.__name__
+    taq_data_tools_responses_second \
+        .taq_function_header_print_data(function_name, ticker, ticker, year,
+                                        '', '')
+    data_name = taq_data_tools_responses_second \
+        .taq_trade_signs_name(function_name)
+    days_name = taq_data_tools_responses_second.taq_trade_signs_name(
+        'taq_self_response_week_responses_second_data') + f'_days_{month}'
+
+    try:
+        # Load data
+        days_data = market_data_storage_shared.market_storage_load(
+            f'../../taq_data/responses_second_data_{year}/{days_name}/'
+            + f'{days_name}_{year}_{ticker}.pickle')
+        self_days = days_data['self_response']
+        num_days = days_data['num']
+        days = len(self_days)
+
+        # Bootstrap. Every row has the times that every day is drawn. The
+        # seed is fixed to keep the same bands in every run
+        rng = np.random.default_rng(0)
+        weights = rng.multinomial(days, np.ones(days) / days,
+                                  size=replicates)
+        bootstrap = (weights @ self_days) / (weights @ num_days)
+        bootstrap_low, bootstrap_high = np.nanpercentile(bootstrap,
+                                                         [2.5, 97.5], axis=0)
+
+        # Jackknife. Every row leaves one day out
+        weights = 1 - np.eye(days)
+        jackknife = (weights @ self_days) / (weights @ num_days)
+        jackknife_std = np.sqrt((days - 1) / days * np.sum(
+            (jackknife - np.mean(jackknife, axis=0)) ** 2, axis=0))
+
+        # Saving data
+        taq_data_tools_responses_second \
+            .taq_save_data(f'{data_name}_{month}',
+                           {'bootstrap_low': bootstrap_low,
+                            'bootstrap_high': bootstrap_high,
+                            'jackknife_std': jackknife_std},
+                           ticker, ticker, year, '', '')
+
+        return (bootstrap_low, bootstrap_high, jackknife_std)
+
+    except FileNotFoundError as e:
+        print('No data')
+        print(e)
+        print()
+        return None
+
+# ----------------------------------------------------------------------------
+
+
 def main():
     """The main function of the script.
 
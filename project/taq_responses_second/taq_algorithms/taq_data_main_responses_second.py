@@ -4,7 +4,9 @@ The functions in the module analyze and plot the TAQ data for a week.
 
 This script requires the following modules:
     * itertools.product
-    * multiprocessing
+    * os
+    * sys
+    * market_data_parallel_shared
     * taq_data_analysis_responses_second
     * taq_data_plot_responses_second
     * taq_data_tools_responses_second
@@ -21,8 +23,13 @@ The module contains the following functions:
 # Modules
 
 from itertools import product as iprod
-import multiprocessing as mp
+import os
+import sys
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'market_shared', 'market_algorithms'))
+
+import market_data_parallel_shared
 import taq_data_analysis_responses_second
 import taq_data_plot_responses_second
 import taq_data_tools_responses_second
@@ -30,40 +37,87 @@ import taq_data_tools_responses_second
 # -----------------------------------------------------------------------------
 
 
-def taq_data_plot_generator(tickers, dates):
+def taq_data_plot_generator(tickers, dates,
+                            stages=('extract', 'response', 'plot')):
     """Generates all the analysis and plots from the TAQ data.
 
     :param tickers: list of the string abbreviation of the stocks to be
      analized (i.e. ['AAPL', 'MSFT']).
     :param dates: list of strings with the date of the data to be extracted
      (i.e. ['2008-01-02', '2008-01-03]).
+    :param stages: iterable of strings with the stages to run ('extract',
+     'response' and 'plot', default all of them).
     :return: None -- The function saves the data in a file and does not return
      a value.
     """
 
-    # Parallel computing
-    with mp.Pool(processes=mp.cpu_count()) as pool:
-
-        # Basic functions
-        pool.starmap(taq_data_analysis_responses_second
-                     .taq_midpoint_second_data,
-                     iprod(tickers, dates))
-        pool.starmap(taq_data_analysis_responses_second
-                     .taq_trade_signs_second_data,
-                     iprod(tickers, dates))
-
-    # Especific functions
-    for ticker in tickers:
-
-        # Self-response
+    # Parallel computing. The largest jobs are scheduled first and every
+    # worker reads the inputs of its next job while the current job runs
+    costs_path = '../../taq_data/job_costs.pickle'
+
+    # The jobs that use the trade signs have the classifier of the run in
+    # the journal and the timings
+    signs_name = taq_data_tools_responses_second.taq_trade_signs_name
+
+    # Basic functions
+    if ('extract' in stages):
+        market_data_parallel_shared \
+            .market_parallel_starmap(taq_data_analysis_responses_second
+                                     .taq_midpoint_second_data,
+                                     iprod(tickers, dates),
+                                     taq_data_tools_responses_second
+                                     .taq_job_input_paths, costs_path,
+                                     prefetch_depth=1)
+        market_data_parallel_shared \
+            .market_parallel_starmap(taq_data_analysis_responses_second
+                                     .taq_trade_signs_second_data,
+                                     iprod(tickers, dates),
+                                     taq_data_tools_responses_second
+                                     .taq_job_input_paths, costs_path,
+                                     prefetch_depth=1,
+                                     job_name=signs_name(
+                                         'taq_trade_signs_second_data'))
+        market_data_parallel_shared \
+            .market_parallel_starmap(taq_data_analysis_responses_second
+                                     .taq_pyramid_data,
+                                     iprod(tickers, dates),
+                                     taq_data_tools_responses_second
+                                     .taq_job_input_paths, costs_path,
+                                     prefetch_depth=1,
+                                     job_name=signs_name('taq_pyramid_data'))
+
+    # Self-response of all the tickers together
+    if ('response' in stages):
         taq_data_analysis_responses_second \
-            .taq_self_response_week_responses_second_data(ticker, dates)
+            .taq_self_response_batch_responses_second_data(tickers, dates)
 
-        # Plot
-        taq_data_plot_responses_second \
-            .taq_midpoint_second_plot(ticker, dates)
-        taq_data_plot_responses_second \
-            .taq_self_response_week_avg_responses_second_plot(ticker, dates)
+    # Especific functions
+    if ('response' in stages):
+        for ticker in tickers:
+
+            # Errors
+            taq_data_analysis_responses_second \
+                .taq_self_response_week_errors_responses_second_data(ticker,
+                                                                     dates)
+
+    # Plot. The figures of the tickers are rendered in the pool from the
+    # saved data
+    if ('plot' in stages):
+        market_data_parallel_shared \
+            .market_parallel_starmap(taq_data_plot_responses_second
+                                     .taq_midpoint_second_plot,
+                                     iprod(tickers, [dates]),
+                                     taq_data_tools_responses_second
+                                     .taq_job_input_paths, costs_path)
+        market_data_parallel_shared \
+            .market_parallel_starmap(
+                taq_data_plot_responses_second
+                .taq_self_response_week_avg_responses_second_plot,
+                iprod(tickers, [dates]),
+                taq_data_tools_responses_second.taq_job_input_paths,
+                costs_path,
+                job_name=signs_name('taq_self_response_week_avg_responses'
+                                    + '_second_plot'))
 
     return None
 
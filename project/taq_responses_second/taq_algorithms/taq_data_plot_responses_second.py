@@ -5,10 +5,16 @@ taq_data_analysis_responses_second module.
 
 This script requires the following modules:
     * matplotlib
-    * pickle
+    * os
+    * sys
+    * market_data_codec_shared
+    * market_data_plot_shared
+    * market_data_storage_shared
     * taq_data_tools_responses_second
 
 The module contains the following functions:
+    * taq_midpoint_second_plot - plots the midpoint price in second scale for
+     a day.
     * taq_self_response_week_avg_responses_second_plot - plots the self-
      response average for a week.
     * main - the main function of the script.
@@ -19,9 +25,21 @@ The module contains the following functions:
 # ----------------------------------------------------------------------------
 # Modules
 
+import matplotlib
+import os
+import sys
+
+# The figures are only saved, so they are rendered without a window (also in
+# the workers of the pools)
+matplotlib.use(os.environ.get('MPLBACKEND', 'Agg'))
 from matplotlib import pyplot as plt
-import pickle
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'market_shared', 'market_algorithms'))
+
+import market_data_codec_shared
+import market_data_plot_shared
+import market_data_storage_shared
 import taq_data_tools_responses_second
 
 # ----------------------------------------------------------------------------
@@ -59,15 +77,18 @@ def taq_midpoint_second_plot(ticker, dates):
             day = date_sep[2]
 
             # Load data
-            midpoint = pickle.load(open(
-                f'../../taq_data/responses_second_data_{year}/taq_midpoint'
-                + f'_second_data/taq_midpoint_second_data_midpoint'
-                + f'_{year}{month}{day}_{ticker}.pickle', 'rb'))
-            time = pickle.load(open(
-                f'../../taq_data/responses_second_data_{year}/taq_midpoint'
-                + f'_second_data/taq_midpoint_second_data_time.pickle', 'rb'))
-
-            plt.plot(time, midpoint, linewidth=5, label=f'{date}')
+            time, midpoint = market_data_codec_shared \
+                .market_decode_prices(
+                    market_data_storage_shared.market_storage_load(
+                        f'../../taq_data/responses_second_data_{year}/taq'
+                        + f'_midpoint_second_data/taq_midpoint_second_data'
+                        + f'_midpoint_{year}{month}{day}_{ticker}.pickle'))
+
+            # The day has a value every second, more than the pixels of the
+            # figure
+            plt.plot(*market_data_plot_shared
+                     .market_plot_decimate(time, midpoint), linewidth=5,
+                     label=f'{date}')
             plt.legend(loc='best', fontsize=25)
             plt.xlabel(r'Time $[s]$', fontsize=35)
             plt.ylabel(r'$m(t)$', fontsize=35)
@@ -118,15 +139,32 @@ def taq_self_response_week_avg_responses_second_plot(ticker, dates):
             .taq_function_header_print_plot(function_name, ticker, ticker,
                                             year, '', '')
 
+        # The data and the plot have the classifier of the trades of the run
+        signs_name = taq_data_tools_responses_second.taq_trade_signs_name
+        week_name = signs_name('taq_self_response_week_responses_second_data')
+        errors_name = signs_name('taq_self_response_week_errors_responses'
+                                 + '_second_data')
+
         # Load data
-        self_ = pickle.load(open(
-                        f'../../taq_data/responses_second_data_{year}/taq_self'
-                        + f'_response_week_responses_second_data_{month}/taq'
-                        + f'_self_response_week_responses_second_data_{month}'
-                        + f'_{year}_{ticker}.pickle', 'rb'))
+        self_ = market_data_storage_shared.market_storage_load(
+            f'../../taq_data/responses_second_data_{year}/{week_name}_{month}'
+            + f'/{week_name}_{month}_{year}_{ticker}.pickle')
 
         figure = plt.figure(figsize=(16, 9))
         plt.semilogx(self_, linewidth=5, label=f'{ticker}')
+
+        # Error band of the day block bootstrap
+        try:
+            errors = market_data_storage_shared.market_storage_load(
+                f'../../taq_data/responses_second_data_{year}/{errors_name}'
+                + f'_{month}/{errors_name}_{month}_{year}_{ticker}.pickle')
+            plt.fill_between(range(len(self_)), errors['bootstrap_low'],
+                             errors['bootstrap_high'], alpha=0.3,
+                             label='95% bootstrap')
+
+        except FileNotFoundError:
+            print('No errors data')
+
         plt.legend(loc='best', fontsize=25)
         plt.title(f'TAQ Self-response - {ticker} - {year}.{month}'
                   + f'.{day_ini_}/{day_fin_}', fontsize=40)
@@ -142,8 +180,8 @@ def taq_self_response_week_avg_responses_second_plot(ticker, dates):
 
         # Plotting
         taq_data_tools_responses_second \
-            .taq_save_plot(f'{function_name}_{month}', figure, ticker, ticker,
-                           year, '')
+            .taq_save_plot(f'{signs_name(function_name)}_{month}', figure,
+                           ticker, ticker, year, '')
 
         return None
 
@@ -6,14 +6,26 @@ in the modules that use them.
 
 This script requires the following modules:
     * matplotlib
+    * numpy
     * os
-    * pickle
+    * pandas
+    * sys
+    * market_data_parallel_shared
+    * market_data_storage_shared
 
 The module contains the following functions:
     * taq_save_data - saves computed data.
     * taq_save_plot - saves figures.
     * taq_function_header_print_data - prints info about the function running.
     * taq_function_header_print_plot - prints info about the plot.
+    * taq_job_input_paths - returns the input files of a job.
+    * taq_hdf5_data_load - loads the TAQ data of a day.
+    * taq_tick_rule_signs - classifies the trades with the tick rule.
+    * taq_quote_rule_signs - classifies the trades with the quote rule.
+    * taq_trade_signs_method - returns the classifier of the trades of the
+     run.
+    * taq_trade_signs_name - returns the name of the data of a function that
+     uses the trade signs.
     * main - the main function of the script.
 
 .. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
@@ -22,9 +34,21 @@ The module contains the following functions:
 # -----------------------------------------------------------------------------
 # Modules
 
-from matplotlib import pyplot as plt
+import numpy as np
 import os
-import pickle
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'market_shared', 'market_algorithms'))
+
+import market_data_parallel_shared
+import market_data_storage_shared
+
+# Classifier of the trades ('tick' or 'quote') and lag in seconds of the
+# quotes. They can be changed with the MARKET_TRADE_SIGNS and MARKET_QUOTE_LAG
+# environment variables
+__trade_signs__ = 'tick'
+__quote_lag__ = 0
 
 # -----------------------------------------------------------------------------
 
@@ -48,32 +72,23 @@ def taq_save_data(function_name, data, ticker_i, ticker_j, year, month, day):
      a value.
     """
 
-    # Saving data
-
-    if (not os.path.isdir(
-            f'../../taq_data/responses_second_data_{year}/{function_name}/')):
-
-        try:
-            os.mkdir(f'../../taq_data/responses_second_data_{year}/'
-                     + f'{function_name}/')
-            print('Folder to save data created')
-
-        except FileExistsError:
-            print('Folder exists. The folder was not created')
+    # Saving data. The storage creates the folders of the function
 
     # Cross-response data
     if (ticker_i != ticker_j):
 
-        pickle.dump(data, open(f'../../taq_data/responses_second_data_{year}/'
-                    + f'{function_name}/{function_name}_{year}{month}{day}'
-                    + f'_{ticker_i}i_{ticker_j}j.pickle', 'wb'))
+        path = f'../../taq_data/responses_second_data_{year}/' \
+            + f'{function_name}/{function_name}_{year}{month}{day}' \
+            + f'_{ticker_i}i_{ticker_j}j.pickle'
 
     # Self-response data
     else:
 
-        pickle.dump(data, open(f'../../taq_data/responses_second_data_{year}/'
-                    + f'{function_name}/{function_name}_{year}{month}{day}'
-                    + f'_{ticker_i}.pickle', 'wb'))
+        path = f'../../taq_data/responses_second_data_{year}/' \
+            + f'{function_name}/{function_name}_{year}{month}{day}' \
+            + f'_{ticker_i}.pickle'
+
+    market_data_storage_shared.market_storage_save(path, data)
 
     print('Data Saved')
     print()
@@ -101,32 +116,31 @@ def taq_save_plot(function_name, figure, ticker_i, ticker_j, year, month):
      a value.
     """
 
-    # Saving plot data
-
-    if (not os.path.isdir(
-            f'../../plots/taq_responses_second_plot_{year}/{function_name}/')):
+    # The format of the plots can be changed with the MARKET_PLOT_FORMAT
+    # environment variable (i.e. 'pdf' or 'svg')
+    plot_format = os.environ.get('MARKET_PLOT_FORMAT', 'png')
 
-        try:
-            os.mkdir(f'../../plots/taq_responses_second_plot_{year}/'
-                     + f'{function_name}/')
-            print('Folder to save data created')
-
-        except FileExistsError:
-            print('Folder exists. The folder was not created')
+    # Saving plot data. The storage creates the folders of the function
 
     # Cross-response data
     if (ticker_i != ticker_j):
 
-        figure.savefig(f'../../plots/taq_responses_second_plot_{year}/'
-                       + f'{function_name}/{function_name}_{year}{month}'
-                       + f'_{ticker_i}i_{ticker_j}j.png')
+        path = f'../../plots/taq_responses_second_plot_{year}/' \
+            + f'{function_name}/{function_name}_{year}{month}' \
+            + f'_{ticker_i}i_{ticker_j}j.{plot_format}'
 
     # Self-response
     else:
 
-        figure.savefig(f'../../plots/taq_responses_second_plot_{year}/'
-                       + f'{function_name}/{function_name}_{year}{month}'
-                       + f'_{ticker_i}i.png')
+        path = f'../../plots/taq_responses_second_plot_{year}/' \
+            + f'{function_name}/{function_name}_{year}{month}' \
+            + f'_{ticker_i}i.{plot_format}'
+
+    market_data_storage_shared.market_storage_save_plot(path, figure)
+    # The workers of the pools render the figures of many tickers. Pyplot is
+    # imported here, so the workers of the analysis do not import it
+    from matplotlib import pyplot as plt
+    plt.close(figure)
 
     print('Plot saved')
     print()
@@ -202,6 +216,211 @@ def taq_function_header_print_plot(function_name, ticker_i, ticker_j, year,
 # -----------------------------------------------------------------------------
 
 
+def taq_job_input_paths(function_name, ticker, date, *args):
+    """Returns the paths of the input files of a (ticker, date) job.
+
+    The size of the input files is used to estimate the cost of the job.
+
+    :param function_name: name of the function that runs the job.
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02'). The plot jobs use a list of dates and do not have
+     input files to estimate the cost.
+    :param args: other arguments of the job. They do not change the input
+     files.
+    :return: list -- The function returns a list with the paths of the files.
+    """
+
+    if (not isinstance(date, str)):
+        return []
+
+    date_sep = date.split('-')
+    year = date_sep[0]
+    month = date_sep[1]
+    day = date_sep[2]
+
+    if (function_name == 'taq_midpoint_second_data'):
+        return [f'../../taq_data/hdf5_dayly_data_{year}/taq_{ticker}_quotes_'
+                + f'{date}.h5']
+
+    elif (function_name == 'taq_trade_signs_second_data'):
+        paths = [f'../../taq_data/hdf5_dayly_data_{year}/taq_{ticker}_trades_'
+                 + f'{date}.h5']
+
+        # The quote rule also reads the quotes
+        if (taq_trade_signs_method()[0] == 'quote'):
+            paths.append(f'../../taq_data/hdf5_dayly_data_{year}/taq_{ticker}'
+                         + f'_quotes_{date}.h5')
+
+        return paths
+
+    elif (function_name == 'taq_self_response_day_responses_second_data'):
+        signs_name = taq_trade_signs_name('taq_trade_signs_second_data')
+        return [f'../../taq_data/responses_second_data_{year}/taq_midpoint'
+                + f'_second_data/taq_midpoint_second_data_midpoint'
+                + f'_{year}{month}{day}_{ticker}.pickle',
+                f'../../taq_data/responses_second_data_{year}/{signs_name}/'
+                + f'{signs_name}_{year}{month}{day}_{ticker}.pickle']
+
+    elif (function_name in ('taq_self_response_day_responses_trade_data',
+                            'taq_pyramid_data')):
+        return [f'../../taq_data/hdf5_dayly_data_{year}/taq_{ticker}_quotes_'
+                + f'{date}.h5',
+                f'../../taq_data/hdf5_dayly_data_{year}/taq_{ticker}_trades_'
+                + f'{date}.h5']
+
+    elif (function_name == 'taq_self_response_day_responses_pyramid_data'):
+        pyramid_name = taq_trade_signs_name('taq_pyramid_data')
+        return [f'../../taq_data/responses_second_data_{year}/{pyramid_name}/'
+                + f'{pyramid_name}_{year}{month}{day}_{ticker}.pickle']
+
+    return []
+
+# -----------------------------------------------------------------------------
+
+
+def taq_hdf5_data_load(ticker, date, key):
+    """Loads the TAQ data of a day.
+
+    When the worker running the job prefetched the file, the data is read
+    from the image of the file in memory.
+
+    :param ticker: string of the abbreviation of the stock to be analized
+     (i.e. 'AAPL').
+    :param date: string with the date of the data to be extracted
+     (i.e. '2008-01-02').
+    :param key: string with the type of data ('quotes' or 'trades').
+    :return: DataFrame -- The function returns a pandas DataFrame with the
+     data.
+    """
+
+    year = date.split('-')[0]
+
+    path = f'../../taq_data/hdf5_dayly_data_{year}/taq_{ticker}_{key}_' \
+        + f'{date}.h5'
+    data = market_data_parallel_shared.market_prefetched(path)
+
+    # Pandas is only imported by the jobs that read the HDF5 files
+    import pandas as pd
+
+    if (data is None):
+        return pd.read_hdf(path, key=f'/{key}')
+
+    return pd.read_hdf(path, key=f'/{key}', driver='H5FD_CORE',
+                       driver_core_image=data, driver_core_backing_store=0)
+
+# -----------------------------------------------------------------------------
+
+
+def taq_tick_rule_signs(price):
+    """Classifies the trades with the tick rule.
+
+    The sign of a trade is the sign of the change of the price from the
+    previous trade (Eq. 1 of the paper). When the price does not change, the
+    trade has the sign of the previous trade. The first trade is compared
+    with the last trade of the day and is a buy when the price is the same,
+    as in the taq_trade_signs_trade_data function.
+
+    :param price: numpy array with the price of every trade.
+    :return: numpy array -- The function returns the sign of every trade.
+    """
+
+    if (not len(price)):
+        return np.zeros(0)
+
+    signs = np.sign(price - np.roll(price, 1)).astype(float)
+
+    if (not signs[0]):
+        signs[0] = 1.
+
+    # Sign of the last trade with a change of the price
+    last_change = np.where(signs != 0, np.arange(len(signs)), 0)
+    np.maximum.accumulate(last_change, out=last_change)
+
+    return signs[last_change]
+
+# -----------------------------------------------------------------------------
+
+
+def taq_quote_rule_signs(time_t, price_t, time_q, midpoint_q, lag=0,
+                         tick_signs=None):
+    """Classifies the trades with the quote rule (Lee-Ready algorithm).
+
+    Every trade is joined to the last midpoint price before the trade with a
+    search of the trade times in the sorted quote times. TAQ times are in
+    seconds, so the quotes of the second of the trade are not used. A trade
+    above the midpoint price is a buy and a trade below the midpoint price is
+    a sell. The trades at the midpoint price or without a previous quote are
+    classified with the tick rule.
+
+    :param time_t: numpy array with the time of every trade.
+    :param price_t: numpy array with the price of every trade.
+    :param time_q: sorted numpy array with the time of every quote.
+    :param midpoint_q: numpy array with the midpoint price of every quote.
+    :param lag: int with the seconds the quotes are delayed respect to the
+     trades (default 0). The trades are joined to the quotes before the time
+     of the trade minus the lag.
+    :param tick_signs: numpy array with the tick rule sign of every trade
+     (default None, computed with the taq_tick_rule_signs function).
+    :return: numpy array -- The function returns the sign of every trade.
+    """
+
+    if (tick_signs is None):
+        tick_signs = taq_tick_rule_signs(price_t)
+
+    # Last quote before every trade
+    quote_idx = np.searchsorted(time_q, time_t - lag, side='left') - 1
+
+    signs = np.zeros(len(time_t))
+    quoted = quote_idx >= 0
+    signs[quoted] = np.sign(price_t[quoted] - midpoint_q[quote_idx[quoted]])
+
+    return np.where(signs != 0, signs, tick_signs)
+
+# -----------------------------------------------------------------------------
+
+
+def taq_trade_signs_method():
+    """Returns the classifier of the trades of the run.
+
+    The classifier is the one of the MARKET_TRADE_SIGNS environment variable
+    ('tick' or 'quote'), and the lag of the quotes the one of the
+    MARKET_QUOTE_LAG environment variable.
+
+    :return: tuple -- The function returns a tuple with the string of the
+     classifier and the int of the lag in seconds.
+    """
+
+    return (os.environ.get('MARKET_TRADE_SIGNS', __trade_signs__),
+            int(os.environ.get('MARKET_QUOTE_LAG', __quote_lag__)))
+
+# -----------------------------------------------------------------------------
+
+
+def taq_trade_signs_name(function_name):
+    """Returns the name of the data of a function that uses the trade signs.
+
+    The data computed with the tick rule keeps the name of the function. The
+    data computed with the quote rule has the lag of the quotes in the name
+    (i.e. 'taq_trade_signs_second_data_quote_lag2'), so the results of both
+    classifiers are saved in different files and can be compared. The name
+    is also used in the journal and the timings of the jobs.
+
+    :param function_name: name of the function.
+    :return: string -- The function returns the name of the data.
+    """
+
+    classifier, lag = taq_trade_signs_method()
+
+    if (classifier == 'quote'):
+        return f'{function_name}_quote_lag{lag}'
+
+    return function_name
+
+# -----------------------------------------------------------------------------
+
+
 def main():
     """The main function of the script.
 
@@ -0,0 +1,182 @@
+'''Test configuration module.
+
+The fixtures of the module create a data folder with the structure of the
+project folder (taq_data, itch_data and plots) in a temporary folder, and run
+the tests in its market_shared/market_algorithms folder, so the relative
+paths of the implementations work as in a run. The ITCH data of the tests is
+a synthetic day of messages of a limit order book.
+
+This script requires the following modules:
+    * gzip
+    * numpy
+    * os
+    * pytest
+    * sys
+
+The module contains the following functions:
+    * itch_synthetic_day - writes a synthetic day of the ITCH data.
+    * market_folder - fixture with the data folder of a test.
+    * itch_day - fixture with the date of a synthetic ITCH day.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import gzip
+import numpy as np
+import os
+import pytest
+import sys
+
+for folder in (('itch_data_extraction', 'itch_algorithms'),
+               ('itch_responses_second', 'itch_algorithms'),
+               ('market_shared', 'market_algorithms'),
+               ('taq_responses_second', 'taq_algorithms')):
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 '..', *folder))
+
+# -----------------------------------------------------------------------------
+
+
+def itch_synthetic_day(path, seed=0, messages=20000, extra_lines=()):
+    """Writes a synthetic day of the ITCH data.
+
+    The limit orders are added around a price that changes as a random walk,
+    without crossing the best quote of the other side, and every side keeps
+    at least five orders. The executions, cancels and deletes are sent to
+    orders in the book, and some non-displayed executions ('T') are added.
+    The first orders arrive before the start of the market time and a burst
+    of messages arrives in the first second of the analysis (34800 s), which
+    needs a midpoint price.
+
+    :param path: string with the path of the gzip file.
+    :param seed: int with the seed of the random numbers (default 0).
+    :param messages: int with the number of messages (default 20000).
+    :param extra_lines: iterable of strings with messages added to the day
+     and sorted by time with the rest (default ()).
+    :return: None -- The function saves the data in a file and does not return
+     a value.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    times = np.sort(np.concatenate((
+        rng.integers(34000 * 1000, 57600 * 1000, messages - 100),
+        rng.integers(34800 * 1000, 34801 * 1000, 100)))).tolist()
+    actions = rng.random(messages).tolist()
+    sides = rng.random(messages).tolist()
+    picks = rng.random(messages).tolist()
+    offsets = rng.integers(1, 6, messages).tolist()
+    volumes = (100 * rng.integers(2, 10, messages)).tolist()
+    steps = rng.choice([-100, 0, 0, 0, 0, 0, 0, 0, 0, 100], messages)
+    fair = (1000000 + np.cumsum(steps)).tolist()
+
+    # Orders in the book by side, with the price and shares left
+    book = {'B': {}, 'S': {}}
+    order_id = 1
+    rows = []
+
+    for msg_idx, (time, action) in enumerate(zip(times, actions)):
+
+        side = 'B' if sides[msg_idx] < 0.5 else 'S'
+
+        if (action < 0.4 or msg_idx < 40 or len(book[side]) <= 5):
+
+            if (side == 'B'):
+                best_ask = min((price for price, _ in book['S'].values()),
+                               default=fair[msg_idx] + 10000)
+                price = min(fair[msg_idx] - 100 * offsets[msg_idx],
+                            best_ask - 100)
+            else:
+                best_bid = max((price for price, _ in book['B'].values()),
+                               default=fair[msg_idx] - 10000)
+                price = max(fair[msg_idx] + 100 * offsets[msg_idx],
+                            best_bid + 100)
+
+            book[side][order_id] = [price, volumes[msg_idx]]
+            rows.append(f'{time},AAPL,{order_id},{side},{volumes[msg_idx]},'
+                        + f'{price},NSDQ,0')
+            order_id += 1
+
+        elif (action < 0.95):
+
+            ids = sorted(book[side])
+            order = ids[int(picks[msg_idx] * len(ids))]
+            price, shares = book[side][order]
+
+            if (action < 0.5 and shares > 100):
+                msg_type, msg_shares = 'E', 100
+            elif (action < 0.55 and shares > 100):
+                msg_type, msg_shares = 'C', 100
+            elif (action < 0.75):
+                msg_type, msg_shares = 'F', shares
+            else:
+                msg_type, msg_shares = 'D', shares
+
+            if (msg_type in ('E', 'C')):
+                book[side][order][1] -= msg_shares
+            else:
+                del book[side][order]
+
+            rows.append(f'{time},AAPL,{order},{msg_type},{msg_shares},0,'
+                        + 'NSDQ,0')
+
+        else:
+            rows.append(f'{time},AAPL,{10 ** 9 + msg_idx},T,100,'
+                        + f'{fair[msg_idx]},NSDQ,0')
+
+    rows = sorted(rows + list(extra_lines),
+                  key=lambda row: int(row.split(',', 1)[0]))
+
+    with gzip.open(path, 'wt') as data:
+        data.write('Time,Ticker,Order,T,Shares,Price,MPID,X\n'
+                   + '\n'.join(rows) + '\n')
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+@pytest.fixture
+def market_folder(tmp_path, monkeypatch):
+    """Creates the data folder of a test and runs the test in it.
+
+    :param tmp_path: temporary folder of the test.
+    :param monkeypatch: fixture to change the environment of the test.
+    :return: pathlib.Path -- The function returns the data folder.
+    """
+
+    for folder in ('itch_data/original_data_2016',
+                   'itch_data/data_extraction_2016',
+                   'itch_data/responses_second_data_2016',
+                   'taq_data/responses_second_data_2008',
+                   'plots', 'market_shared/market_algorithms'):
+        os.makedirs(tmp_path / folder, exist_ok=True)
+
+    monkeypatch.chdir(tmp_path / 'market_shared' / 'market_algorithms')
+    monkeypatch.setenv('MARKET_STORAGE', 'local')
+    monkeypatch.setenv('MARKET_TRADE_SIGNS', 'tick')
+    monkeypatch.setenv('MARKET_QUOTE_LAG', '0')
+    monkeypatch.delenv('MARKET_RUN_ID', raising=False)
+
+    return tmp_path
+
+# -----------------------------------------------------------------------------
+
+
+@pytest.fixture
+def itch_day(market_folder):
+    """Writes a synthetic ITCH day of AAPL in the data folder of a test.
+
+    :param market_folder: fixture with the data folder of the test.
+    :return: string -- The function returns the date of the day.
+    """
+
+    itch_synthetic_day(market_folder / 'itch_data' / 'original_data_2016'
+                       / '20160307_AAPL.csv.gz')
+
+    return '2016-03-07'
+
+# -----------------------------------------------------------------------------
@@ -0,0 +1,274 @@
+'''ITCH data analysis extraction tests module.
+
+The tests of the module compare the replay of the order book with the
+lifecycle index with the replay of the original messages of the first
+implementation, and check the three cases in which the results of the
+lifecycle index differ from the ones of the original data (unknown orders,
+hidden trades and full executions after partial cancels).
+
+This script requires the following modules:
+    * gzip
+    * numpy
+    * conftest
+    * itch_data_analysis_data_extraction
+
+The module contains the following functions:
+    * itch_reference_quotes - replays the original messages of a day as the
+     first implementation.
+    * test_lifecycle_replay_quotes - compares the best quotes of the replay
+     with the ones of the first implementation.
+    * test_unknown_orders_skipped - checks the messages of orders added
+     before the start of the data.
+    * test_hidden_trades_sign - checks the trade sign of the hidden trades.
+    * test_full_execution_volume - checks the volume of a full execution
+     after partial cancels.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import gzip
+import numpy as np
+
+from conftest import itch_synthetic_day
+import itch_data_analysis_data_extraction
+
+# -----------------------------------------------------------------------------
+
+
+def itch_reference_quotes(path):
+    """Replays the original messages of a day as the first implementation.
+
+    The number of orders of every price level is updated with the add ('B',
+    'S'), full execution ('F') and delete ('D') messages, and the best quotes
+    are saved every time one of them changes. Only the best quotes in the
+    open market time are returned.
+
+    :param path: string with the path of the gzip file.
+    :return: tuple -- The function returns a tuple with numpy arrays of the
+     time, best ask and best bid.
+    """
+
+    with gzip.open(path, 'rt') as data:
+        rows = [line.split(',') for line in data.read().split('\n')[1:]
+                if line]
+
+    types_code = {'B': 1, 'S': 2, 'E': 3, 'C': 4, 'F': 5, 'D': 6}
+    rows = [row for row in rows if row[3] in types_code]
+    times = [int(row[0]) for row in rows]
+    types = [types_code[row[3]] for row in rows]
+
+    # Price and type of the add message of the order of every message
+    orders = {}
+    prices_ref = []
+    types_ref = []
+    for row, msg_type in zip(rows, types):
+        if (msg_type < 3):
+            orders[row[2]] = (int(row[5]), msg_type)
+        prices_ref.append(orders[row[2]][0])
+        types_ref.append(orders[row[2]][1])
+
+    executed = [price for price, msg_type in zip(prices_ref, types)
+                if msg_type == 5]
+    minP = round(0.9 * min(executed) / 10000, 2)
+    maxP = round(1.1 * max(executed) / 10000, 2)
+    valuesP = minP + 0.01 * np.arange(int((maxP - minP) / 0.01))
+
+    nAsk = 0 * valuesP
+    nAsk[-1] = 1
+    nBid = 0 * valuesP
+    nBid[0] = 1
+    bestAsk = 10000000.
+    bestBid = 0.
+    bestTimes = []
+    bestAsks = []
+    bestBids = []
+
+    for iii in range(len(rows)):
+
+        myPriceIndex = int(round((prices_ref[iii] / 10000 - minP) / 0.01))
+        bestAskOld = bestAsk
+        bestBidOld = bestBid
+
+        if (0 <= myPriceIndex < len(valuesP)):
+
+            if (types[iii] == 2):
+                if (nAsk[myPriceIndex] == 0):
+                    bestAsk = min(bestAsk, valuesP[myPriceIndex])
+                nAsk[myPriceIndex] += 1
+
+            if (types[iii] == 1):
+                if (nBid[myPriceIndex] == 0):
+                    bestBid = max(bestBid, valuesP[myPriceIndex])
+                nBid[myPriceIndex] += 1
+
+            if (types[iii] == 5 or types[iii] == 6):
+                if (types_ref[iii] == 2):
+                    nAsk[myPriceIndex] -= 1
+                    if (nAsk[myPriceIndex] == 0
+                            and valuesP[myPriceIndex] == bestAsk):
+                        bestAsk = valuesP[nAsk > 0].min()
+                else:
+                    nBid[myPriceIndex] -= 1
+                    if (nBid[myPriceIndex] == 0
+                            and valuesP[myPriceIndex] == bestBid):
+                        bestBid = valuesP[nBid > 0].max()
+
+        if (bestAsk != bestAskOld or bestBid != bestBidOld):
+            bestTimes.append(times[iii])
+            bestAsks.append(bestAsk)
+            bestBids.append(bestBid)
+
+    timesS = np.array(bestTimes)
+    day_times_ind = (timesS / 3600 / 1000 > 9.5) \
+        * (timesS / 3600 / 1000 < 16) > 0
+
+    return (timesS[day_times_ind], np.array(bestAsks)[day_times_ind],
+            np.array(bestBids)[day_times_ind])
+
+# -----------------------------------------------------------------------------
+
+
+def test_lifecycle_replay_quotes(itch_day, market_folder):
+    """Compares the best quotes of the replay with the first implementation.
+
+    :param itch_day: fixture with the date of a synthetic ITCH day.
+    :param market_folder: fixture with the data folder of the test.
+    :return: None.
+    """
+
+    itch_data_analysis_data_extraction \
+        .itch_order_lifecycle_data('AAPL', itch_day)
+    times, _, asks, bids, _ = itch_data_analysis_data_extraction \
+        .itch_midpoint_millisecond_data('AAPL', itch_day)
+
+    ref_times, ref_asks, ref_bids = itch_reference_quotes(
+        market_folder / 'itch_data' / 'original_data_2016'
+        / '20160307_AAPL.csv.gz')
+
+    assert len(ref_times) > 100
+    np.testing.assert_array_equal(times, ref_times)
+    np.testing.assert_allclose(asks, ref_asks, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(bids, ref_bids, rtol=0, atol=1e-9)
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def test_unknown_orders_skipped(market_folder):
+    """Checks the messages of orders added before the start of the data.
+
+    The messages of unknown orders do not change the order book and their
+    trades have the trade sign 0. The first implementation stopped with an
+    error.
+
+    :param market_folder: fixture with the data folder of the test.
+    :return: None.
+    """
+
+    path = market_folder / 'itch_data' / 'original_data_2016'
+    itch_synthetic_day(path / '20160308_AAPL.csv.gz')
+    itch_synthetic_day(path / '20160307_AAPL.csv.gz',
+                       extra_lines=['40000000,AAPL,777777777,E,100,0,NSDQ,0',
+                                    '40000001,AAPL,777777778,D,100,0,NSDQ,0'])
+
+    itch_data_analysis_data_extraction \
+        .itch_order_lifecycle_data('AAPL', '2016-03-07')
+    times, midpoint, _, _, _ = itch_data_analysis_data_extraction \
+        .itch_midpoint_millisecond_data('AAPL', '2016-03-07')
+    ref_times, ref_asks, ref_bids = itch_reference_quotes(
+        path / '20160308_AAPL.csv.gz')
+
+    np.testing.assert_array_equal(times, ref_times)
+    np.testing.assert_allclose(midpoint, (ref_asks + ref_bids) / 2, rtol=0,
+                               atol=1e-9)
+
+    trade_times, trade_signs, trade_volumes, _ = \
+        itch_data_analysis_data_extraction \
+        .itch_trade_signs_millisecond_data('AAPL', '2016-03-07')
+    unknown = trade_times == 40000000
+
+    assert np.sum(unknown) == 1
+    assert trade_signs[unknown][0] == 0
+    assert trade_volumes[unknown][0] == 0
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def test_hidden_trades_sign(market_folder):
+    """Checks the trade sign of the hidden trades.
+
+    The hidden trades with the order id 0 have the trade sign 0, also after
+    a full execution. The first implementation gave them the sign of the
+    fully executed order.
+
+    :param market_folder: fixture with the data folder of the test.
+    :return: None.
+    """
+
+    extra_lines = ['40000000,AAPL,888888888,S,300,1100000,NSDQ,0',
+                   '40000001,AAPL,888888888,F,300,0,NSDQ,0',
+                   '40000002,AAPL,0,T,100,1100000,NSDQ,0']
+    itch_synthetic_day(market_folder / 'itch_data' / 'original_data_2016'
+                       / '20160307_AAPL.csv.gz', extra_lines=extra_lines)
+
+    itch_data_analysis_data_extraction \
+        .itch_order_lifecycle_data('AAPL', '2016-03-07')
+    trade_times, trade_signs, _, trade_price = \
+        itch_data_analysis_data_extraction \
+        .itch_trade_signs_millisecond_data('AAPL', '2016-03-07')
+    extra = trade_price == 110.
+
+    np.testing.assert_array_equal(trade_times[extra], [40000001, 40000002])
+    np.testing.assert_array_equal(trade_signs[extra], [1, 0])
+    # The hidden trades of the day are the trades with the trade sign 0
+    with gzip.open(market_folder / 'itch_data' / 'original_data_2016'
+                   / '20160307_AAPL.csv.gz', 'rt') as data:
+        hidden = [line for line in data.read().split('\n')[1:]
+                  if line and line.split(',')[3] == 'T'
+                  and 34200000 <= int(line.split(',')[0]) < 57600000]
+
+    assert len(hidden) > 100
+    assert np.sum(trade_signs == 0) == len(hidden)
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def test_full_execution_volume(market_folder):
+    """Checks the volume of a full execution after partial cancels.
+
+    The volume of a full execution ('F') is the volume left in the order
+    after the partial executions ('E') and the partial cancels ('C').
+
+    :param market_folder: fixture with the data folder of the test.
+    :return: None.
+    """
+
+    extra_lines = ['40000000,AAPL,999999999,B,500,900000,NSDQ,0',
+                   '40000001,AAPL,999999999,C,100,0,NSDQ,0',
+                   '40000002,AAPL,999999999,E,100,0,NSDQ,0',
+                   '40000003,AAPL,999999999,F,300,0,NSDQ,0']
+    itch_synthetic_day(market_folder / 'itch_data' / 'original_data_2016'
+                       / '20160307_AAPL.csv.gz', extra_lines=extra_lines)
+
+    itch_data_analysis_data_extraction \
+        .itch_order_lifecycle_data('AAPL', '2016-03-07')
+    trade_times, trade_signs, trade_volumes, trade_price = \
+        itch_data_analysis_data_extraction \
+        .itch_trade_signs_millisecond_data('AAPL', '2016-03-07')
+    extra = trade_price == 90.
+
+    np.testing.assert_array_equal(trade_times[extra], [40000002, 40000003])
+    np.testing.assert_array_equal(trade_signs[extra], [-1, -1])
+    np.testing.assert_array_equal(trade_volumes[extra], [100, 300])
+
+    return None
+
+# -----------------------------------------------------------------------------
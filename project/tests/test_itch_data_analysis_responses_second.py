@@ -0,0 +1,59 @@
+'''ITCH data analysis responses tests module.
+
+The tests of the module check the self-responses of the events of days
+without midpoint price changes.
+
+This script requires the following modules:
+    * numpy
+    * itch_data_analysis_responses_second
+    * market_data_storage_shared
+
+The module contains the following functions:
+    * test_millisecond_day_without_midpoint - computes the millisecond
+     self-response of a day without midpoint price changes.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import numpy as np
+
+import itch_data_analysis_responses_second
+import market_data_storage_shared
+
+# -----------------------------------------------------------------------------
+
+
+def test_millisecond_day_without_midpoint(market_folder):
+    """Computes the millisecond self-response of a day without quotes.
+
+    The events of a halted day have trades but no midpoint price changes, so
+    the self-response and the amount of trades are zero, as in a day without
+    data.
+
+    :param market_folder: fixture with the data folder of the test.
+    :return: None.
+    """
+
+    events = {'midpoint_time': np.zeros(0, dtype=np.int32),
+              'midpoint': np.zeros(0),
+              'trade_time': np.array([35000000, 36000000], dtype=np.int32),
+              'trade_sign': np.array([1, -1], dtype=np.int8),
+              'trade_volume': np.array([100, 200])}
+    market_data_storage_shared.market_storage_save(
+        '../../itch_data/data_extraction_2016/itch_events_millisecond_data/'
+        + 'itch_events_millisecond_data_20160307_AAPL.pickle', events)
+
+    self_response, num = itch_data_analysis_responses_second \
+        .itch_self_response_day_responses_millisecond_data('AAPL',
+                                                           '2016-03-07', 10)
+
+    assert len(self_response) == len(num) > 0
+    assert not self_response.any()
+    assert not num.any()
+
+    return None
+
+# -----------------------------------------------------------------------------
@@ -0,0 +1,93 @@
+'''ITCH data online tests module.
+
+The tests of the module compare the online self-response with the
+self-response of the extracted second data.
+
+This script requires the following modules:
+    * numpy
+    * itch_data_analysis_data_extraction
+    * itch_data_analysis_responses_second
+    * itch_data_online_responses_second
+
+The module contains the following functions:
+    * test_online_replay_day_data - compares the replay of a day with the
+     self-response of the second data.
+    * test_online_first_quote_after_start - checks a stream without quotes
+     at the start of the market time.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import numpy as np
+
+import itch_data_analysis_data_extraction
+import itch_data_analysis_responses_second
+import itch_data_online_responses_second
+
+# -----------------------------------------------------------------------------
+
+
+def test_online_replay_day_data(itch_day):
+    """Compares the replay of a day with the self-response of the second data.
+
+    :param itch_day: fixture with the date of a synthetic ITCH day.
+    :return: None.
+    """
+
+    itch_data_analysis_data_extraction \
+        .itch_order_lifecycle_data('AAPL', itch_day)
+    itch_data_analysis_data_extraction \
+        .itch_midpoint_second_data('AAPL', itch_day)
+    itch_data_analysis_data_extraction \
+        .itch_trade_signs_second_data('AAPL', itch_day)
+
+    self_response, num = itch_data_analysis_responses_second \
+        .itch_self_response_day_responses_second_data('AAPL', itch_day)
+    online_val, online_num = itch_data_online_responses_second \
+        .itch_online_replay_data('AAPL', itch_day, report_seconds=10 ** 6)
+
+    assert num[0] > 1000
+    np.testing.assert_array_equal(online_num, num)
+    np.testing.assert_allclose(online_val[num > 0],
+                               self_response[num > 0] / num[num > 0],
+                               rtol=1e-9, atol=1e-15)
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def test_online_first_quote_after_start():
+    """Checks a stream whose first two-sided quotes arrive after 9h40.
+
+    The trades before the first midpoint price are not used, the time lags
+    only use the midpoint prices of the stream and the trades of the last
+    second are added at the end of the stream.
+
+    :return: None.
+    """
+
+    lines = ['Time,Ticker,Order,T,Shares,Price,MPID,X',
+             '34810000,AAPL,1,S,500,1000100,NSDQ,0',
+             '34820000,AAPL,1,E,100,0,NSDQ,0',
+             '35000000,AAPL,2,B,500,999900,NSDQ,0',
+             '35001500,AAPL,3,S,500,1000200,NSDQ,0',
+             '35002000,AAPL,1,E,100,0,NSDQ,0',
+             '35010000,AAPL,4,B,500,999800,NSDQ,0',
+             '35020500,AAPL,2,E,100,0,NSDQ,0']
+
+    state = itch_data_online_responses_second.itch_online_state_init()
+    self_response_val, num = itch_data_online_responses_second \
+        .itch_online_stream(state, lines, report_seconds=10 ** 6)
+
+    assert num[0] == 2
+    assert not num[21:].any()
+    # The placeholders of the midpoint prices would give returns near 100
+    assert np.nanmax(np.abs(self_response_val)) < 1e-3
+
+    return None
+
+# -----------------------------------------------------------------------------
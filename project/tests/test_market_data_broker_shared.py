@@ -0,0 +1,79 @@
+'''Market data broker tests module.
+
+The tests of the module run the stages of a synthetic ITCH day in a worker of
+a broker in localhost, and compare the results with the local run.
+
+This script requires the following modules:
+    * multiprocessing
+    * numpy
+    * itch_data_analysis_responses_second
+    * market_data_broker_shared
+
+The module contains the following functions:
+    * test_broker_localhost_stage - runs the stages of a day in a worker of a
+     broker in localhost.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import multiprocessing as mp
+import numpy as np
+
+import itch_data_analysis_responses_second
+import market_data_broker_shared
+
+# -----------------------------------------------------------------------------
+
+
+def test_broker_localhost_stage(itch_day):
+    """Runs the stages of a day in a worker of a broker in localhost.
+
+    The broker listens in a free port and one worker loop runs the jobs in
+    another process. The self-response of the day sent by the worker must be
+    the one of the local run.
+
+    :param itch_day: fixture with the date of a synthetic ITCH day.
+    :return: None.
+    """
+
+    authkey = b'market_broker_test'
+    job_queue, result_queue, address = market_data_broker_shared \
+        .market_broker_serve(0, authkey)
+
+    worker = mp.Process(target=market_data_broker_shared
+                        .market_broker_worker_loop,
+                        args=(address[0], address[1], authkey))
+    worker.start()
+
+    try:
+        for function_name in ('itch_order_lifecycle_data',
+                              'itch_midpoint_second_data',
+                              'itch_trade_signs_second_data'):
+            market_data_broker_shared.market_broker_run_stage(
+                job_queue, result_queue, function_name,
+                [('AAPL', itch_day)], job_timeout=60)
+
+        (result,) = market_data_broker_shared.market_broker_run_stage(
+            job_queue, result_queue,
+            'itch_self_response_day_responses_second_data',
+            [('AAPL', itch_day)], keep_results=True, job_timeout=60)
+
+    finally:
+        job_queue.put(None)
+        worker.join(timeout=60)
+
+    assert worker.exitcode == 0
+
+    self_response, num = itch_data_analysis_responses_second \
+        .itch_self_response_day_responses_second_data('AAPL', itch_day)
+
+    assert num[0] > 1000
+    np.testing.assert_array_equal(result[1], num)
+    np.testing.assert_array_equal(result[0], self_response)
+
+    return None
+
+# -----------------------------------------------------------------------------
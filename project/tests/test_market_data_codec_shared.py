@@ -0,0 +1,101 @@
+'''Market data codec tests module.
+
+The tests of the module encode and decode the price and trade signs series
+and check that the decoded series are the original ones.
+
+This script requires the following modules:
+    * numpy
+    * market_data_codec_shared
+
+The module contains the following functions:
+    * test_prices_round_trip - encodes and decodes prices that are multiples
+     of the tick.
+    * test_prices_off_tick - encodes and decodes prices that are not
+     multiples of the tick.
+    * test_signs_round_trip - encodes and decodes trade signs series with and
+     without the run-length encoding.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import numpy as np
+
+import market_data_codec_shared
+
+# -----------------------------------------------------------------------------
+
+
+def test_prices_round_trip():
+    """Encodes and decodes midpoint prices that are multiples of the tick.
+
+    :return: None.
+    """
+
+    rng = np.random.default_rng(0)
+    time = np.arange(34800, 57000)
+    prices = 0.005 * (20000 + np.cumsum(rng.integers(-2, 3, len(time))))
+
+    data = market_data_codec_shared.market_encode_prices(time, prices, 0.005)
+    dec_time, dec_prices = market_data_codec_shared.market_decode_prices(data)
+
+    assert data['prices'].dtype == np.int32
+    assert data['tick'] == 0.005
+    np.testing.assert_array_equal(dec_time, time)
+    np.testing.assert_allclose(dec_prices, prices, rtol=0, atol=1e-9)
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def test_prices_off_tick():
+    """Encodes and decodes prices that are not multiples of the tick.
+
+    :return: None.
+    """
+
+    time = np.arange(34800, 34810)
+    prices = np.linspace(100.0013, 100.0571, len(time))
+
+    data = market_data_codec_shared.market_encode_prices(time, prices, 0.005)
+    dec_time, dec_prices = market_data_codec_shared.market_decode_prices(data)
+
+    assert data['tick'] is None
+    assert data['prices'].dtype == np.float32
+    np.testing.assert_array_equal(dec_time, time)
+    np.testing.assert_allclose(dec_prices, prices, rtol=1e-6)
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def test_signs_round_trip():
+    """Encodes and decodes trade signs with and without run-length encoding.
+
+    :return: None.
+    """
+
+    rng = np.random.default_rng(0)
+    time = np.arange(34801, 57001)
+    sparse = np.where(rng.random(len(time)) < 0.02,
+                      rng.choice([-1, 1], len(time)), 0)
+    dense = rng.choice([-1, 0, 1], len(time))
+
+    for signs, rle, runs in ((sparse, True, True), (sparse, False, False),
+                             (dense, True, False)):
+        data = market_data_codec_shared.market_encode_signs(time, signs, rle)
+        dec_time, dec_signs = market_data_codec_shared \
+            .market_decode_signs(data)
+
+        assert (data['runs'] is not None) == runs
+        assert dec_signs.dtype == np.int8
+        np.testing.assert_array_equal(dec_time, time)
+        np.testing.assert_array_equal(dec_signs, signs)
+
+    return None
+
+# -----------------------------------------------------------------------------
@@ -0,0 +1,134 @@
+'''TAQ data tools tests module.
+
+The tests of the module check the classification of the trades with the tick
+rule and the quote rule, and the names of the data of both classifiers.
+
+This script requires the following modules:
+    * numpy
+    * taq_data_tools_responses_second
+
+The module contains the following functions:
+    * test_tick_rule_signs - classifies trades with the tick rule.
+    * test_quote_rule_signs - classifies trades with the quote rule.
+    * test_quote_rule_lag - classifies trades with delayed quotes.
+    * test_trade_signs_name - returns the names of the data of both
+     classifiers.
+
+.. moduleauthor:: Juan Camilo Henao Londono <www.github.com/juanhenao21>
+'''
+
+# -----------------------------------------------------------------------------
+# Modules
+
+import numpy as np
+
+import taq_data_tools_responses_second
+
+# -----------------------------------------------------------------------------
+
+
+def test_tick_rule_signs():
+    """Classifies trades with the tick rule.
+
+    :return: None.
+    """
+
+    price = np.array([10.00, 10.01, 10.01, 10.00, 10.00, 10.02])
+    signs = taq_data_tools_responses_second.taq_tick_rule_signs(price)
+
+    np.testing.assert_array_equal(signs, [-1, 1, 1, -1, -1, 1])
+    assert not len(taq_data_tools_responses_second
+                   .taq_tick_rule_signs(np.zeros(0)))
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def test_quote_rule_signs():
+    """Classifies trades with the quote rule.
+
+    The trades above and below the last midpoint price before their second
+    are buys and sells. The trades at the midpoint price, before the first
+    quote or with only quotes of the same second use the tick rule.
+
+    :return: None.
+    """
+
+    time_q = np.array([100, 105])
+    midpoint_q = np.array([10.005, 10.015])
+    # Before the first quote, quote of the same second, above, below, at
+    # the midpoint price
+    time_t = np.array([99, 100, 101, 104, 106])
+    price_t = np.array([10.00, 10.01, 10.00, 10.01, 10.015])
+    tick_signs = np.array([-1., 1., -1., 1., 1.])
+
+    signs = taq_data_tools_responses_second.taq_quote_rule_signs(
+        time_t, price_t, time_q, midpoint_q, tick_signs=tick_signs)
+
+    np.testing.assert_array_equal(signs, [-1, 1, -1, 1, 1])
+
+    tick_signs = -tick_signs
+    signs = taq_data_tools_responses_second.taq_quote_rule_signs(
+        time_t, price_t, time_q, midpoint_q, tick_signs=tick_signs)
+
+    np.testing.assert_array_equal(signs, [1, -1, -1, 1, -1])
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def test_quote_rule_lag():
+    """Classifies trades with quotes delayed respect to the trades.
+
+    :return: None.
+    """
+
+    time_q = np.array([100, 103])
+    midpoint_q = np.array([10.00, 10.02])
+    time_t = np.array([104, 106])
+    price_t = np.array([10.01, 10.01])
+    tick_signs = np.zeros(2)
+
+    no_lag = taq_data_tools_responses_second.taq_quote_rule_signs(
+        time_t, price_t, time_q, midpoint_q, tick_signs=tick_signs)
+    lag = taq_data_tools_responses_second.taq_quote_rule_signs(
+        time_t, price_t, time_q, midpoint_q, lag=2, tick_signs=tick_signs)
+
+    np.testing.assert_array_equal(no_lag, [-1, -1])
+    np.testing.assert_array_equal(lag, [1, -1])
+
+    return None
+
+# -----------------------------------------------------------------------------
+
+
+def test_trade_signs_name(monkeypatch):
+    """Returns the names of the data of the tick rule and the quote rule.
+
+    :param monkeypatch: fixture to change the environment of the test.
+    :return: None.
+    """
+
+    monkeypatch.delenv('MARKET_TRADE_SIGNS', raising=False)
+    monkeypatch.delenv('MARKET_QUOTE_LAG', raising=False)
+
+    assert taq_data_tools_responses_second.taq_trade_signs_method() \
+        == ('tick', 0)
+    assert taq_data_tools_responses_second \
+        .taq_trade_signs_name('taq_trade_signs_second_data') \
+        == 'taq_trade_signs_second_data'
+
+    monkeypatch.setenv('MARKET_TRADE_SIGNS', 'quote')
+    monkeypatch.setenv('MARKET_QUOTE_LAG', '2')
+
+    assert taq_data_tools_responses_second.taq_trade_signs_method() \
+        == ('quote', 2)
+    assert taq_data_tools_responses_second \
+        .taq_trade_signs_name('taq_trade_signs_second_data') \
+        == 'taq_trade_signs_second_data_quote_lag2'
+
+    return None
+
+# -----------------------------------------------------------------------------